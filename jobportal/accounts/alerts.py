@@ -0,0 +1,297 @@
+"""
+Job alerts: match each new Job against every saved search in one pass.
+
+Saved searches are indexed the reverse way round (percolation). Each search
+predicate becomes a key that points at a bitmap of search ids, and searches that
+leave a dimension blank go into that dimension's wildcard bitmap. A new job then
+needs one lookup per dimension plus an AND of a few big ints. The role and
+free-text location substring predicates are matched by looking up every
+substring of the job's text in the index, which gives the same result as
+``icontains``. No saved query is re-run. Bits are dense search ordinals (see
+facets.Ordinals), not search ids.
+
+The index is rebuilt every SAVED_SEARCH_INDEX_TTL seconds in a background
+thread; matching keeps using the previous build meanwhile. ``manage.py
+bench_alerts`` times matching against 100k synthetic searches.
+
+Matches are delivered after the transaction that created the job commits. A
+failed delivery is logged and does not fail the request; the job is already
+saved.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import geo
+from .facets import Ordinals, ids_from_bitmap
+from .models import Job, Notification, SavedSearch, SavedSearchMatch
+from .salaries import salary_bucket
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ('job_type', 'salary', 'role', 'location')
+FIELDS = ('id', 'role', 'location', 'job_type', 'salary', 'radius_km', 'place', 'latitude', 'longitude')
+
+
+class SearchIndex:
+    """One build of the reverse index, plus the saves and deletes applied since"""
+
+    def __init__(self):
+        self._index = {
+            'job_type': {}, 'salary': {}, 'role': {},
+            'place': {}, 'location_text': {}, 'geo': {},
+        }
+        self._wildcard = {dim: 0 for dim in DIMENSIONS}
+        self._ordinals = Ordinals()
+        self._keys = {}
+        self._circles = {}
+        self._max_text = {'role': 0, 'location_text': 0}
+
+    @classmethod
+    def build(cls):
+        index = cls()
+        for search in SavedSearch.objects.filter(is_active=True).values(*FIELDS).iterator(chunk_size=5000):
+            index.add(search)
+        return index
+
+    def _put(self, sid, bit, index, key):
+        bucket = self._index[index]
+        bucket[key] = bucket.get(key, 0) | bit
+        self._keys[sid].append((index, key))
+
+    def add(self, search):
+        sid = search['id']
+        ordinal = self._ordinals.assign(sid)
+        bit = 1 << ordinal
+        self._keys[sid] = []
+
+        for dim in ('job_type', 'salary'):
+            if search[dim]:
+                self._put(sid, bit, dim, search[dim])
+            else:
+                self._wildcard[dim] |= bit
+
+        role = search['role'].strip().lower()
+        if role:
+            self._put(sid, bit, 'role', role)
+            self._max_text['role'] = max(self._max_text['role'], len(role))
+        else:
+            self._wildcard['role'] |= bit
+
+        location = search['location'].strip().lower()
+        if search['radius_km'] and search['latitude'] is not None:
+            for prefix in geo.covering_prefixes(search['latitude'], search['longitude'], search['radius_km']):
+                self._put(sid, bit, 'geo', prefix)
+            self._circles[ordinal] = (search['latitude'], search['longitude'], search['radius_km'])
+        elif search['place']:
+            self._put(sid, bit, 'place', search['place'])
+        elif location:
+            self._put(sid, bit, 'location_text', location)
+            self._max_text['location_text'] = max(self._max_text['location_text'], len(location))
+        else:
+            self._wildcard['location'] |= bit
+
+    def remove(self, sid):
+        keys = self._keys.pop(sid, None)
+        if keys is None:
+            return
+        ordinal = self._ordinals.release(sid)
+        mask = ~(1 << ordinal)
+        for index, key in keys:
+            bucket = self._index[index]
+            bucket[key] &= mask
+            if not bucket[key]:
+                del bucket[key]
+        for dim in DIMENSIONS:
+            self._wildcard[dim] &= mask
+        self._circles.pop(ordinal, None)
+
+    def _substring_hits(self, index, text):
+        bucket = self._index[index]
+        if not bucket or not text:
+            return 0
+        text = text.lower()
+        longest = self._max_text[index]
+        hits = 0
+        for start in range(len(text)):
+            for end in range(start + 1, min(len(text), start + longest) + 1):
+                bits = bucket.get(text[start:end])
+                if bits:
+                    hits |= bits
+        return hits
+
+    def _geo_hits(self, job):
+        if not job.geohash:
+            return 0
+        candidates = 0
+        for length in range(1, len(job.geohash) + 1):
+            candidates |= self._index['geo'].get(job.geohash[:length], 0)
+        hits = 0
+        for ordinal in ids_from_bitmap(candidates):
+            lat, lon, radius_km = self._circles[ordinal]
+            if geo.haversine_km(lat, lon, job.latitude, job.longitude) <= radius_km:
+                hits |= 1 << ordinal
+        return hits
+
+    def match(self, job):
+        """Ids of the indexed saved searches that ``job`` satisfies"""
+        index = self._index
+        bits = self._wildcard['job_type'] | index['job_type'].get(job.job_type, 0)
+        bits &= self._wildcard['salary'] | index['salary'].get(salary_bucket(job.salary), 0)
+        if not bits:
+            return []
+        bits &= self._wildcard['role'] | self._substring_hits('role', job.role)
+        if not bits:
+            return []
+        location_bits = (
+            self._wildcard['location']
+            | index['place'].get(job.place, 0)
+            | self._substring_hits('location_text', job.location)
+            | self._geo_hits(job)
+        )
+        return self._ordinals.keys(bits & location_bits)
+
+    def apply(self, search):
+        self.remove(search['id'])
+        if search['is_active']:
+            self.add(search)
+
+
+class SearchPercolator:
+    """
+    The first match in a process builds the index. After SAVED_SEARCH_INDEX_TTL, a
+    background thread builds the replacement while matching keeps using the old one,
+    as FacetIndex does; saves and deletes signalled meanwhile are replayed onto it.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._index = None
+        self._built_at = None
+        # changes seen while a background build runs, or None when none is running
+        self._pending = None
+
+    def _ensure_fresh(self):
+        if self._index is None:
+            self._index = SearchIndex.build()
+            self._built_at = time.monotonic()
+        elif self._pending is None and time.monotonic() - self._built_at > getattr(settings, 'SAVED_SEARCH_INDEX_TTL', 300):
+            self._pending = []
+            threading.Thread(target=self._rebuild, name='saved-search-rebuild', daemon=True).start()
+        return self._index
+
+    def _rebuild(self):
+        try:
+            index = SearchIndex.build()
+        except Exception:
+            with self._lock:
+                # keep matching against the old index; the next match retries
+                self._pending = None
+                self._built_at = time.monotonic()
+            raise
+        finally:
+            connections.close_all()
+        with self._lock:
+            for change in self._pending:
+                if isinstance(change, dict):
+                    index.apply(change)
+                else:
+                    index.remove(change)
+            self._index = index
+            self._built_at = time.monotonic()
+            self._pending = None
+
+    def match(self, job):
+        """Ids of the active saved searches that ``job`` satisfies"""
+        with self._lock:
+            return self._ensure_fresh().match(job)
+
+    def update(self, search):
+        change = {field: getattr(search, field) for field in FIELDS}
+        change['is_active'] = search.is_active
+        with self._lock:
+            if self._index is None:
+                return
+            self._index.apply(change)
+            if self._pending is not None:
+                self._pending.append(change)
+
+    def discard(self, search_id):
+        with self._lock:
+            if self._index is None:
+                return
+            self._index.remove(search_id)
+            if self._pending is not None:
+                self._pending.append(search_id)
+
+
+percolator = SearchPercolator()
+
+
+def deliver_matches(job, batch_size=1000):
+    """Record the saved searches matching ``job`` and notify 'instant' subscribers"""
+    search_ids = percolator.match(job)
+    if not search_ids:
+        return 0
+
+    matched = 0
+    for start in range(0, len(search_ids), batch_size):
+        chunk = search_ids[start:start + batch_size]
+        searches = list(
+            SavedSearch.objects.filter(id__in=chunk, is_active=True)
+            .exclude(user_id=job.posted_by_id)
+            .values('id', 'user_id', 'name', 'frequency')
+        )
+        with transaction.atomic():
+            SavedSearchMatch.objects.bulk_create(
+                [
+                    SavedSearchMatch(search_id=s['id'], job=job, notified=s['frequency'] == 'instant')
+                    for s in searches
+                ],
+                ignore_conflicts=True,
+            )
+            # one notification per user, however many of their searches matched
+            instant = {}
+            for s in searches:
+                if s['frequency'] == 'instant':
+                    instant.setdefault(s['user_id'], s)
+            Notification.objects.bulk_create([
+                Notification(
+                    recipient_id=user_id,
+                    verb=f"New job matching your saved search '{s['name'] or job.role}': {job.role} at {job.company_name}",
+                    job=job,
+                )
+                for user_id, s in instant.items()
+            ])
+        matched += len(searches)
+    return matched
+
+
+def _deliver_after_commit(job):
+    try:
+        deliver_matches(job)
+    except Exception:
+        logger.exception("Saved-search delivery failed for job %s", job.pk)
+
+
+@receiver(post_save, sender=Job)
+def percolate_new_job(sender, instance, created, **kwargs):
+    if created:
+        # runs once the job is committed; outside an atomic block that is straight away
+        transaction.on_commit(lambda: _deliver_after_commit(instance))
+
+
+@receiver(post_save, sender=SavedSearch)
+def reindex_saved_search(sender, instance, **kwargs):
+    transaction.on_commit(lambda: percolator.update(instance))
+
+
+@receiver(post_delete, sender=SavedSearch)
+def unindex_saved_search(sender, instance, **kwargs):
+    search_id = instance.id
+    transaction.on_commit(lambda: percolator.discard(search_id))
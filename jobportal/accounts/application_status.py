@@ -0,0 +1,95 @@
+"""
+Write paths for JobApplication status changes.
+
+Every change takes the job row lock, moves the per-status counters on Job with
+F() expressions, and appends JobApplicationStatusHistory rows. The counters and
+the history table stay consistent with the applications this way. The same
+UPDATE bumps Job.updated_at, which is all the job list ETag looks at.
+"""
+from collections import Counter
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job, JobApplication, JobApplicationStatusHistory, Notification
+
+# what the applicant is told for each target status
+VERBS = {
+    'pending': "was moved back to pending",
+    'shortlisted': "was shortlisted",
+    'approved': "was approved",
+    'rejected': "was rejected",
+}
+
+
+def lock_job(job_id):
+    """SELECT ... FOR UPDATE the job; call inside transaction.atomic()"""
+    return Job.objects.select_for_update().get(id=job_id)
+
+
+def record_application(job, application, actor):
+    """Count a freshly inserted (pending) application against its (locked) job"""
+    now = timezone.now()
+    Job.objects.filter(pk=job.pk).update(
+        applications_count=F('applications_count') + 1,
+        pending_count=F('pending_count') + 1,
+        updated_at=now,
+    )
+    # lock_job() read the row under the lock, so the same increments keep the instance exact
+    job.applications_count += 1
+    job.pending_count += 1
+    job.updated_at = now
+    JobApplicationStatusHistory.objects.bulk_create([
+        JobApplicationStatusHistory(
+            application=application, job=job, from_status=None, to_status='pending', changed_by=actor
+        )
+    ])
+
+
+def forget_application(job, status):
+    """Undo the counters of an application that was just deleted"""
+    Job.objects.filter(pk=job.pk).update(
+        applications_count=F('applications_count') - 1,
+        **{Job.STATUS_COUNTERS[status]: F(Job.STATUS_COUNTERS[status]) - 1},
+        updated_at=timezone.now(),
+    )
+
+
+def change_status(job, rows, target, actor):
+    """
+    Move ``rows`` (dicts with id, status and applied_by_id) of a locked ``job`` to ``target``.
+
+    The caller has already validated the transitions and seat limits. This issues one
+    UPDATE for the applications, one for the job counters, and one bulk_create each for
+    history and notifications.
+    """
+    if not rows:
+        return 0
+
+    ids = [row['id'] for row in rows]
+    values = {'status': target, 'approved': target == 'approved'}
+    values['approved_at'] = timezone.now() if target == 'approved' else None
+    updated = JobApplication.objects.filter(job=job, id__in=ids).exclude(status=target).update(**values)
+
+    deltas = Counter()
+    for row in rows:
+        deltas[row['status']] -= 1
+        deltas[target] += 1
+    Job.objects.filter(pk=job.pk).update(updated_at=timezone.now(), **{
+        Job.STATUS_COUNTERS[status]: F(Job.STATUS_COUNTERS[status]) + delta
+        for status, delta in deltas.items() if delta
+    })
+
+    JobApplicationStatusHistory.objects.bulk_create([
+        JobApplicationStatusHistory(
+            application_id=row['id'], job=job, from_status=row['status'], to_status=target, changed_by=actor
+        )
+        for row in rows
+    ])
+
+    verb = f"Your application for '{job.role}' {VERBS[target]}"
+    Notification.objects.bulk_create([
+        Notification(recipient_id=row['applied_by_id'], actor=actor, verb=verb, job=job)
+        for row in rows
+    ])
+    return updated
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        # registers the Job/SavedSearch signal handlers that keep the in-process indexes current
+        from . import alerts, facets  # noqa: F401
@@ -0,0 +1,177 @@
+"""
+Async variants of the I/O-bound read endpoints, for the ASGI deployment.
+
+Each view answers GET with the fastpath builders. Its queries run on the
+bounded database thread pool (accounts/db/threads.py), so requests waiting on
+the database overlap instead of queueing behind Django's single
+thread-sensitive executor. It authenticates and throttles like the DRF view
+and renders the same bytes. Requests it does not handle natively go to the
+sync DRF view (``sync_view``) on the same pool:
+
+- every other method (POST and so on)
+- ``?stream=``, ``?fields=`` / ``?expand=``, ``?format=`` and ``?before=``
+- the browsable API
+- FAST_SERIALIZERS turned off
+
+accounts/urls.py mounts these in place of the sync views when
+settings.ASYNC_VIEWS is on (JOBPORTAL_ASYNC_VIEWS=1). ``manage.py
+bench_async`` compares the two deployments under simulated database latency.
+"""
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db.models import Q
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.http import quote_etag, urlencode
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from . import fastpath, message_archive
+from .authentication import ClaimsJWTAuthentication
+from .conditional import message_thread_etag
+from .db.threads import run_db
+from .models import Account, Job, Message, Notification, Skill
+from . import views
+
+# query parameters only the DRF view understands
+SYNC_PARAMS = ('stream', 'fields', 'expand', 'format', 'before')
+
+
+def error_response(request, exc, authenticator):
+    # what DRF's exception_handler + JSONRenderer produce for the same exception
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    response = HttpResponse(JSONRenderer().render(data), status=exc.status_code, content_type='application/json')
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response.status_code = 401
+        response.headers['WWW-Authenticate'] = authenticator.authenticate_header(request)
+    if getattr(exc, 'wait', None):
+        response.headers['Retry-After'] = '%d' % exc.wait
+    return response
+
+
+# token auth like DRF's APIView, which is csrf-exempt too
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncReadView(View):
+    """Base class: subclasses set ``sync_view`` and implement ``async def get``"""
+    sync_view = None
+    requires_auth = True
+    throttle_scope = None
+    # sync callable(request, *args, **kwargs) -> ETag or None, run on the pool
+    etag_func = None
+
+    def needs_sync(self, request):
+        if request.method not in ('GET', 'HEAD') or not getattr(settings, 'FAST_SERIALIZERS', True):
+            return True
+        if any(param in request.GET for param in SYNC_PARAMS):
+            return True
+        return 'text/html' in request.META.get('HTTP_ACCEPT', '')
+
+    async def dispatch(self, request, *args, **kwargs):
+        if self.needs_sync(request):
+            return await run_db(self.sync_view.as_view(), request, *args, **kwargs)
+
+        authenticator = ClaimsJWTAuthentication()
+        try:
+            user_auth = await authenticator.aauthenticate(request)
+            if user_auth is None and self.requires_auth:
+                raise exceptions.NotAuthenticated()
+            request.user = user_auth[0] if user_auth else AnonymousUser()
+            self.check_throttles(request)
+        except exceptions.APIException as exc:
+            return error_response(request, exc, authenticator)
+
+        etag = None
+        if self.etag_func is not None:
+            etag = await run_db(self.etag_func, request, *args, **kwargs)
+            etag = quote_etag(etag) if etag is not None else None
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+
+        response = await self.get(request, *args, **kwargs)
+        if etag:
+            response.headers.setdefault('ETag', etag)
+        return response
+
+    def check_throttles(self, request):
+        # the bucket stores do no database I/O, so they run inline
+        waits = []
+        for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+            throttle = throttle_class()
+            if not throttle.allow_request(request, self):
+                waits.append(throttle.wait())
+        if waits:
+            raise exceptions.Throttled(max((wait for wait in waits if wait is not None), default=None))
+
+
+class AsyncSkillListView(AsyncReadView):
+    sync_view = views.SkillListView
+    requires_auth = False
+
+    async def get(self, request):
+        return fastpath.FastJSONResponse(await run_db(list, Skill.objects.values('id', 'name')))
+
+
+class AsyncJobDetailView(AsyncReadView):
+    sync_view = views.JobDetailView
+
+    async def get(self, request, job_id):
+        rows = await run_db(fastpath.jobs, Job.objects.filter(id=job_id), request.user)
+        if not rows:
+            return fastpath.FastJSONResponse({"error": "Job not found"}, status=404)
+        return fastpath.FastJSONResponse(rows[0])
+
+
+class AsyncMessageView(AsyncReadView):
+    sync_view = views.MessageView
+    etag_func = staticmethod(message_thread_etag)
+
+    async def get(self, request):
+        other_user_id = request.GET.get('user_id')
+
+        if not other_user_id:
+            users_messaged = Account.objects.filter(
+                messages_received__sender=request.user
+            ).distinct() | Account.objects.filter(
+                messages_sent__recipient=request.user
+            ).distinct()
+            return fastpath.FastJSONResponse(
+                await run_db(list, users_messaged.values('id', 'username', 'email'))
+            )
+
+        try:
+            other_user, data, archived = await run_db(self.thread, request.user, other_user_id)
+        except Account.DoesNotExist:
+            return fastpath.FastJSONResponse({"error": "User not found"}, status=404)
+
+        response = fastpath.FastJSONResponse(data)
+        # same rel="prev" link to the archived months as MessageView
+        if archived:
+            before = data[0]['created_at'] if data else timezone.now().isoformat()
+            query = urlencode({'user_id': other_user.id, 'before': before})
+            response['Link'] = f'<{request.path}?{query}>; rel="prev"'
+        return response
+
+
+    @staticmethod
+    def thread(user, other_user_id):
+        # one trip to the pool for the lookup, the page and the archive check
+        other_user = Account.objects.only('id').get(id=other_user_id)
+        messages = Message.objects.filter(
+            (Q(sender=user, recipient=other_user) |
+             Q(sender=other_user, recipient=user))
+        ).order_by('created_at')
+        return other_user, fastpath.messages(messages), message_archive.has_archive(user, other_user)
+
+
+class AsyncNotificationsView(AsyncReadView):
+    sync_view = views.NotificationsView
+
+    async def get(self, request):
+        notes = Notification.objects.filter(recipient=request.user).order_by('-created_at')[:100]
+        return fastpath.FastJSONResponse(await run_db(fastpath.notifications, notes))
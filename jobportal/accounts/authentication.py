@@ -0,0 +1,138 @@
+"""
+JWT authentication without a per-request Account SELECT.
+
+Access tokens carry ``username``, ``role`` and ``ver`` (the account's
+token_version) claims; see CustomTokenObtainPairSerializer. ClaimsJWTAuthentication
+turns them into an Account instance whose other fields are deferred. A view
+that only needs ``request.user.id`` / ``role`` / ``username`` never queries the
+table. The first access to any other field loads the rest of the row in a
+single query.
+
+Revocation is checked against a small in-process TTL cache of
+(is_active, token_version) per user. Deactivating a user or calling
+revoke_tokens() therefore takes effect within JWT_USER_STATE_TTL seconds in
+other worker processes, and immediately in the one that made the change.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import router
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .db.threads import run_db
+from .models import Account
+
+# claims copied onto the user; everything else is loaded on first touch
+CLAIM_FIELDS = ('username', 'role')
+VERSION_CLAIM = 'ver'
+
+
+class UserStateCache:
+    """user id -> (expires_at, is_active, token_version), bounded and TTL'd"""
+
+    def __init__(self, max_entries=50000):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _cached(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1:]
+        return None
+
+    def _store(self, user_id, row):
+        if row is None:
+            return None
+        ttl = getattr(settings, 'JWT_USER_STATE_TTL', 30)
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[user_id] = (time.monotonic() + ttl, *row)
+        return row
+
+    def _query(self, user_id):
+        return Account.objects.filter(pk=user_id).values_list('is_active', 'token_version')
+
+    def get(self, user_id):
+        return self._cached(user_id) or self._store(user_id, self._query(user_id).first())
+
+    async def aget(self, user_id):
+        return self._cached(user_id) or await run_db(self.get, user_id)
+
+    def forget(self, user_id):
+        self._entries.pop(user_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+user_state = UserStateCache()
+
+
+def revoke_tokens(user):
+    """Invalidate every token issued to ``user`` so far (forced logout)"""
+    Account.objects.filter(pk=user.pk).update(token_version=F('token_version') + 1)
+    user_state.forget(user.pk)
+
+
+def claims_user(user_id, token, is_active, token_version):
+    loaded = {'id': user_id, 'is_active': is_active, 'token_version': token_version}
+    loaded.update((field, token[field]) for field in CLAIM_FIELDS)
+    names = [f.attname for f in Account._meta.concrete_fields if f.attname in loaded]
+    user = Account.from_db(router.db_for_read(Account), names, [loaded[name] for name in names])
+    user._from_claims = True
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def _user_id(self, validated_token):
+        try:
+            # simplejwt writes the id claim as a string
+            return Account._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def _has_claims(self, validated_token):
+        # tokens issued before these claims existed take the regular lookup
+        return all(field in validated_token for field in CLAIM_FIELDS)
+
+    def _claims_user(self, user_id, validated_token, state):
+        if state is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        is_active, token_version = state
+        if api_settings.CHECK_USER_IS_ACTIVE and not is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if validated_token.get(VERSION_CLAIM, 0) != token_version:
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        return claims_user(user_id, validated_token, is_active, token_version)
+
+    def get_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        if not self._has_claims(validated_token):
+            return super().get_user(validated_token)
+        return self._claims_user(user_id, validated_token, user_state.get(user_id))
+
+    async def aget_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        if not self._has_claims(validated_token):
+            return await run_db(super().get_user, validated_token)
+        return self._claims_user(user_id, validated_token, await user_state.aget(user_id))
+
+    async def aauthenticate(self, request):
+        """authenticate() for async views; the token checks are CPU only, the state lookup runs on the db pool"""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
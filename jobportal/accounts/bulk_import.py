@@ -0,0 +1,229 @@
+"""
+Bulk account import (campus / partner onboarding).
+
+Rows come from CSV (with a header) or JSONL with the columns
+username, email, password, role, company_name, plus the optional profile
+fields description, currently and location. They are validated one at a
+time as the file is read, then inserted in chunks:
+
+1. One query finds usernames and emails that are already taken.
+2. Passwords are hashed. ``manage.py import_accounts`` hashes them in a
+   process pool (``workers``), since PBKDF2 is CPU bound and holds the GIL.
+   The API imports small files only (ACCOUNT_IMPORT_API_MAX_ROWS) and hashes
+   in the request, so a request never forks a pool of its own.
+3. Accounts are inserted with bulk_create, their ids are read back by
+   username (MySQL does not return them), and the profiles are inserted
+   with bulk_create.
+
+bulk_create skips the Account post_save signals, so there is no extra
+Profile INSERT or re-save per user.
+"""
+import csv
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from . import geo
+from .models import Account, Profile
+
+FORMATS = ('csv', 'jsonl')
+ROLES = {role for role, _ in Account.ROLE_CHOICES}
+PROFILE_FIELDS = ('description', 'currently', 'location')
+# errors kept in the result; the rest are only counted
+MAX_ERRORS = 1000
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self, max_errors=100):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'failed': self.failed,
+            'seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+            'errors': self.errors[:max_errors],
+        }
+
+
+def guess_format(name):
+    return 'jsonl' if name and name.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def read_rows(fh, fmt):
+    """Yield (line number, dict) pairs without loading the file"""
+    if fmt == 'csv':
+        reader = csv.DictReader(fh)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_no, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_no, row if isinstance(row, dict) else None
+
+
+def clean_row(raw, seen_usernames, seen_emails, check_password=True):
+    """(cleaned row, None) or (None, error message)"""
+    if raw is None:
+        return None, "not a JSON object"
+    row = {key: (str(value).strip() if value is not None else '') for key, value in raw.items() if key}
+
+    username = row.get('username', '')
+    if not username or len(username) > 150:
+        return None, "username is required (max 150 characters)"
+    email = Account.objects.normalize_email(row.get('email', ''))
+    try:
+        validate_email(email)
+    except ValidationError:
+        return None, "invalid email"
+    role = row.get('role') or 'user'
+    if role not in ROLES:
+        return None, f"role must be one of {', '.join(sorted(ROLES))}"
+    if username in seen_usernames:
+        return None, "duplicate username in file"
+    if email in seen_emails:
+        return None, "duplicate email in file"
+
+    password = row.get('password') or None
+    if password and check_password:
+        try:
+            validate_password(password, user=Account(username=username, email=email))
+        except ValidationError as e:
+            return None, ' '.join(e.messages)
+
+    seen_usernames.add(username)
+    seen_emails.add(email)
+    return {
+        'username': username,
+        'email': email,
+        'password': password,
+        'role': role,
+        'company_name': row.get('company_name') or None,
+        **{field: row.get(field) or None for field in PROFILE_FIELDS},
+    }, None
+
+
+def _init_worker():
+    # spawned (non-fork) workers need Django set up before make_password reads the hasher settings
+    import django
+    django.setup()
+
+
+def _flush(chunk, pool, workers, result, dry_run):
+    # pool is None when hashing runs in this process
+    usernames = [row['username'] for _, row in chunk]
+    emails = [row['email'] for _, row in chunk]
+    taken_usernames, taken_emails = set(), set()
+    for username, email in Account.objects.filter(Q(username__in=usernames) | Q(email__in=emails)).values_list('username', 'email'):
+        taken_usernames.add(username)
+        taken_emails.add(email)
+
+    rows = []
+    for line, row in chunk:
+        if row['username'] in taken_usernames:
+            result.error(line, "username already exists")
+        elif row['email'] in taken_emails:
+            result.error(line, "email already exists")
+        else:
+            rows.append((line, row))
+    if dry_run:
+        result.created += len(rows)
+        return
+    if not rows:
+        return
+
+    # rows without a password get an unusable one and can use password reset
+    passwords = [row['password'] for _, row in rows]
+    if pool is None:
+        hashes = [make_password(password) for password in passwords]
+    else:
+        hashes = list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+    try:
+        with transaction.atomic():
+            Account.objects.bulk_create([
+                Account(
+                    username=row['username'], email=row['email'], role=row['role'],
+                    company_name=row['company_name'], password=password_hash,
+                )
+                for (_, row), password_hash in zip(rows, hashes)
+            ])
+            ids = dict(Account.objects.filter(username__in=[row['username'] for _, row in rows]).values_list('username', 'id'))
+            profiles = []
+            for _, row in rows:
+                profile = Profile(user_id=ids[row['username']], **{field: row[field] for field in PROFILE_FIELDS})
+                geo.apply_location(profile, profile.location)
+                profiles.append(profile)
+            Profile.objects.bulk_create(profiles)
+    except IntegrityError:
+        # lost a race with another signup; report the chunk rather than guessing which row
+        for line, _ in rows:
+            result.error(line, "conflicts with an account created during the import")
+        return
+    result.created += len(rows)
+
+
+def import_accounts(fh, fmt='csv', **options):
+    """Validate and insert the accounts in ``fh``; returns an ImportResult"""
+    return import_rows(read_rows(fh, fmt), **options)
+
+
+def import_rows(rows, chunk_size=1000, workers=0, dry_run=False, check_passwords=True, progress=None):
+    """
+    Validate and insert (line number, dict) rows from read_rows(); returns an ImportResult.
+    ``workers`` > 0 hashes passwords in that many processes, 0 in this one.
+    """
+    result = ImportResult()
+    seen_usernames, seen_emails = set(), set()
+    start = time.perf_counter()
+
+    use_pool = workers > 0 and not dry_run
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if use_pool else nullcontext()
+    with executor as pool:
+        chunk = []
+        for line, raw in rows:
+            result.rows += 1
+            row, error = clean_row(raw, seen_usernames, seen_emails, check_passwords)
+            if error:
+                result.error(line, error)
+                continue
+            chunk.append((line, row))
+            if len(chunk) >= chunk_size:
+                _flush(chunk, pool, workers, result, dry_run)
+                chunk = []
+                if progress:
+                    progress(result)
+        if chunk:
+            _flush(chunk, pool, workers, result, dry_run)
+
+    result.elapsed = time.perf_counter() - start
+    return result
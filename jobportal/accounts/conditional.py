@@ -0,0 +1,56 @@
+"""
+ETags for the polled read endpoints, for use with django.views.decorators.http.condition.
+
+Each ETag is derived from a few aggregates over the rows behind the response
+(count, newest updated_at / id, counter sums), never from the rendered body.
+A poll that gets a 304 therefore costs one to three small aggregate queries
+and no serialization. The tags are weak because compression changes the bytes
+on the wire.
+"""
+import hashlib
+
+from django.db.models import Count, Max, Q, Sum
+
+from .models import Job, JobApplication, JobApplicationStatusHistory, Message, Profile
+
+
+def weak_etag(request, *parts):
+    # the same rows render differently per viewer (has_applied), per ?fields= and per renderer
+    key = repr((request.user.id, request.META.get('QUERY_STRING', ''), request.META.get('HTTP_ACCEPT', ''), parts))
+    return 'W/"%s"' % hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
+
+
+def job_list_etag(request, *args, **kwargs):
+    # applies and status changes bump Job.updated_at (application_status.py). The list also
+    # renders each poster's account and each applicant's account and profile, so their
+    # newest updated_at goes in too; edits to them write no job rows.
+    jobs = Job.objects.open()
+    changed = jobs.aggregate(count=Count('id'), changed=Max('updated_at'), posters=Max('posted_by__updated_at'))
+    applicants = JobApplication.objects.filter(job__in=jobs).aggregate(
+        accounts=Max('applied_by__updated_at'), profiles=Max('applied_by__profile__updated_at'),
+    )
+    return weak_etag(request, changed, applicants)
+
+
+def profile_etag(request, user_id=None, *args, **kwargs):
+    user_id = user_id or request.user.id
+    profile = Profile.objects.filter(user_id=user_id).values_list('updated_at', flat=True).first()
+    applications = JobApplication.objects.filter(applied_by_id=user_id).aggregate(
+        count=Count('id'), jobs=Max('job__updated_at'), applicants=Sum('job__applications_count'),
+    )
+    history = JobApplicationStatusHistory.objects.filter(application__applied_by_id=user_id).aggregate(
+        last=Max('id'),
+    )
+    return weak_etag(request, user_id, profile, applications, history)
+
+
+def message_thread_etag(request, *args, **kwargs):
+    other_id = request.GET.get('user_id', '')
+    if not other_id.isdigit():
+        return None
+    me = request.user.id
+    # messages are only ever inserted or marked read, so count + max id + read count covers every change
+    thread = Message.objects.filter(
+        Q(sender_id=me, recipient_id=other_id) | Q(sender_id=other_id, recipient_id=me)
+    ).aggregate(count=Count('id'), last=Max('id'), read=Count('id', filter=Q(is_read=True)))
+    return weak_etag(request, thread)
@@ -0,0 +1,15 @@
+"""MySQL backend with connection pooling (see accounts/db/pool.py)"""
+from django.db.backends.mysql import base, creation
+
+from ..pool import PooledCreationMixin, PooledDatabaseWrapperMixin
+
+
+class DatabaseCreation(PooledCreationMixin, creation.DatabaseCreation):
+    pass
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def ping_connection(self, conn):
+        conn.ping()
@@ -0,0 +1,243 @@
+"""
+A connection pool for database backends that have none built in.
+
+Django only pools PostgreSQL connections. The backends in accounts.db
+(``accounts.db.mysql``, plus ``accounts.db.sqlite3`` for local runs) mix in
+PooledDatabaseWrapperMixin. It takes raw connections from a per-process pool
+in ``get_new_connection`` and hands them back in ``_close``. A request that
+ends (CONN_MAX_AGE = 0) therefore returns its connection instead of hanging
+up. The ASGI views, which run each request in a fresh thread, reuse
+connections as well.
+
+Turn it on with ``DATABASES[...]['OPTIONS']['pool']``, either ``True`` or a
+dict with any of the following keys:
+
+- max_size: connections open at once (default 10)
+- timeout: seconds to wait for a free connection before raising
+  OperationalError (default 5)
+- max_idle: seconds an idle connection is kept (default 300)
+- max_lifetime: seconds before a connection is replaced (default 1800). Keep
+  this below the server's wait_timeout.
+- check_interval: a connection idle for longer than this is pinged before it
+  is handed out (default 30)
+
+As with Django's PostgreSQL pool, CONN_MAX_AGE must stay 0 when pooling.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from django.core.exceptions import ImproperlyConfigured
+
+DEFAULTS = {
+    'max_size': 10,
+    'timeout': 5.0,
+    'max_idle': 300.0,
+    'max_lifetime': 1800.0,
+    'check_interval': 30.0,
+}
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Thread-safe LIFO pool of raw DB-API connections"""
+
+    def __init__(self, ping, max_size, timeout, max_idle, max_lifetime, check_interval):
+        self.ping = ping
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.check_interval = check_interval
+        # (connection, created_at, returned_at); the most recently returned is reused first
+        self._idle = deque()
+        self._created_at = {}
+        self._size = 0
+        self._cond = threading.Condition()
+        self.stats = {'opened': 0, 'closed': 0, 'reused': 0, 'waits': 0, 'timeouts': 0}
+
+    def acquire(self, connect):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            conn, check = self._checkout(deadline)
+            if conn is not None:
+                if check and not self._ping(conn):
+                    with self._cond:
+                        self._discard(conn)
+                    continue
+                return conn
+            # a free slot: open a new connection outside the lock
+            try:
+                conn = connect()
+            except BaseException:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._created_at[id(conn)] = time.monotonic()
+                self.stats['opened'] += 1
+            return conn
+
+    def _checkout(self, deadline):
+        """(idle connection, needs a ping), or (None, False) after reserving a slot for a new one"""
+        with self._cond:
+            waited = False
+            while True:
+                now = time.monotonic()
+                while self._idle:
+                    conn, created_at, returned_at = self._idle.pop()
+                    if now - created_at > self.max_lifetime or now - returned_at > self.max_idle:
+                        self._discard(conn)
+                        continue
+                    self.stats['reused'] += 1
+                    return conn, now - returned_at > self.check_interval
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, False
+                remaining = deadline - now
+                if remaining <= 0:
+                    self.stats['timeouts'] += 1
+                    raise PoolTimeout(
+                        f"No database connection free within {self.timeout:g}s (pool max_size={self.max_size})"
+                    )
+                if not waited:
+                    self.stats['waits'] += 1
+                    waited = True
+                self._cond.wait(remaining)
+
+    def _ping(self, conn):
+        try:
+            self.ping(conn)
+        except Exception:
+            return False
+        return True
+
+    def release(self, conn, broken=False):
+        with self._cond:
+            created_at = self._created_at.get(id(conn))
+            if broken or created_at is None or time.monotonic() - created_at > self.max_lifetime:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def _discard(self, conn):
+        # called with the lock held; closing a dead socket returns at once
+        self._created_at.pop(id(conn), None)
+        self._size -= 1
+        self.stats['closed'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._cond:
+            while self._idle:
+                self._discard(self._idle.pop()[0])
+            self._cond.notify_all()
+
+    def status(self):
+        with self._cond:
+            return {'size': self._size, 'idle': len(self._idle), 'max_size': self.max_size, **self.stats}
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pid = os.getpid()
+
+
+def get_pool(key, factory):
+    global _pid
+    with _pools_lock:
+        if os.getpid() != _pid:
+            # forked worker: the parent's sockets are not ours to use or close
+            _pools.clear()
+            _pid = os.getpid()
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = factory()
+        return pool
+
+
+def all_pools():
+    with _pools_lock:
+        return dict(_pools)
+
+
+def close_all(alias=None):
+    with _pools_lock:
+        keys = [key for key in _pools if alias is None or key[0] == alias]
+        pools = [_pools.pop(key) for key in keys]
+    for pool in pools:
+        pool.close()
+
+
+class PooledCreationMixin:
+    """Drops pooled connections before the test database is created or destroyed"""
+
+    def _create_test_db(self, *args, **kwargs):
+        self.connection.close_pool()
+        return super()._create_test_db(*args, **kwargs)
+
+    def _destroy_test_db(self, *args, **kwargs):
+        self.connection.close_pool()
+        return super()._destroy_test_db(*args, **kwargs)
+
+
+class PooledDatabaseWrapperMixin:
+    """Mixed in before a backend's DatabaseWrapper"""
+
+    def pool_options(self):
+        options = self.settings_dict['OPTIONS'].get('pool')
+        if not options:
+            return None
+        if self.settings_dict['CONN_MAX_AGE'] != 0:
+            raise ImproperlyConfigured("Pooling doesn't support persistent connections (CONN_MAX_AGE must be 0).")
+        return {**DEFAULTS, **(options if isinstance(options, dict) else {})}
+
+    def close_pool(self):
+        close_all(self.alias)
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    def ping_connection(self, conn):
+        conn.cursor().execute('SELECT 1')
+
+    def get_new_connection(self, conn_params):
+        options = self.pool_options()
+        self._pool = None
+        if options is None:
+            return super().get_new_connection(conn_params)
+        # one pool per alias and per connection parameters (the test runner renames the database)
+        pool = get_pool(
+            (self.alias, repr(sorted(conn_params.items()))),
+            lambda: ConnectionPool(self.ping_connection, **options),
+        )
+        try:
+            conn = pool.acquire(lambda: super(PooledDatabaseWrapperMixin, self).get_new_connection(conn_params))
+        except PoolTimeout as e:
+            raise self.Database.OperationalError(str(e)) from e
+        self._pool = pool
+        return conn
+
+    def _close(self):
+        pool = getattr(self, '_pool', None)
+        if pool is None or self.connection is None:
+            return super()._close()
+        broken = self.errors_occurred
+        if not broken and (not self.autocommit or self.in_atomic_block):
+            try:
+                # never hand out a connection with an open transaction
+                self.connection.rollback()
+            except self.Database.Error:
+                broken = True
+        pool.release(self.connection, broken=broken)
@@ -0,0 +1,27 @@
+"""SQLite backend with connection pooling, a stand-in for local runs and benchmarks"""
+from django.db.backends.sqlite3 import base, creation
+
+from ..pool import PooledCreationMixin, PooledDatabaseWrapperMixin
+
+
+class DatabaseCreation(PooledCreationMixin, creation.DatabaseCreation):
+    pass
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def pool_options(self):
+        # an in-memory database lives and dies with its one connection
+        if self.is_in_memory_db():
+            return None
+        return super().pool_options()
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        # SQLite ignores SELECT ... FOR UPDATE; taking the write lock at BEGIN makes lock_job()
+        # callers queue on the busy timeout, as they do on the row lock in MySQL, instead of
+        # failing with "database is locked" when two readers both try to write
+        if 'transaction_mode' not in self.settings_dict['OPTIONS']:
+            self.transaction_mode = 'IMMEDIATE'
+        return params
@@ -0,0 +1,50 @@
+"""
+A bounded thread pool for the blocking database calls of the async views.
+
+Django's async ORM (``afirst``, ``async for``) and a default ``sync_to_async``
+run their work in one shared thread per request loop (thread_sensitive=True).
+Every in-flight request queues behind the others there, so under load the ASGI
+deployment answered fewer requests per second than four WSGI threads.
+
+``run_db(func, *args)`` runs ``func`` on one of settings.ASYNC_DB_THREADS
+worker threads instead. Each worker keeps its own connection and handles it
+the way a request does: stale connections are dropped before the call, and
+the connection goes back to the pool (accounts/db/pool.py) after it. Keep
+ASYNC_DB_THREADS at or below DB_POOL_MAX_SIZE.
+
+Only code that needs no transaction or other state of the calling thread may
+run here. A call inside ``transaction.atomic()`` would run on a different
+connection.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+_executor = None
+_lock = threading.Lock()
+
+
+def executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'ASYNC_DB_THREADS', 8), thread_name_prefix='async-db',
+            )
+        return _executor
+
+
+def _call(func, args, kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_db(func, *args, **kwargs):
+    """Await ``func(*args, **kwargs)`` run on the bounded database thread pool"""
+    return await sync_to_async(_call, thread_sensitive=False, executor=executor())(func, args, kwargs)
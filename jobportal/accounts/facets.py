@@ -0,0 +1,271 @@
+"""
+In-process facet index for the job search filters.
+
+Each facet value (job type, location, salary bucket) maps to a bitmap of open
+jobs, stored as a Python int so AND is a single big-int operation and counts are
+int.bit_count(). Bits are dense ordinals (Ordinals), not job ids, so memory and
+build time follow the number of open jobs, not the largest id ever issued.
+
+The index is built once from the open jobs and updated on Job save/delete
+signals. Every FACET_INDEX_TTL seconds it is rebuilt in a background thread, to
+pick up writes made by other worker processes. Requests keep using the previous
+build while that runs.
+"""
+import heapq
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Job
+from .salaries import salary_bucket
+
+FACETS = ('job_type', 'location', 'salary')
+
+def _facet_values(job):
+    return {
+        'job_type': job['job_type'],
+        # canonical gazetteer place when known, so Bangalore/Bengaluru/BLR count together
+        'location': job['place'] or (job['location'] or '').strip(),
+        'salary': salary_bucket(job['salary']),
+    }
+
+
+def ids_from_bitmap(bitmap):
+    """Positions of the set bits, lowest first"""
+    # scanning the binary string keeps the loop in C instead of one big-int op per set bit
+    bits = bin(bitmap)[:1:-1]
+    ids = []
+    pos = bits.find('1')
+    while pos != -1:
+        ids.append(pos)
+        pos = bits.find('1', pos + 1)
+    return ids
+
+
+class Ordinals:
+    """
+    Dense bit positions for sparse ids. Freed positions are reused, so bitmaps are as wide
+    as the number of live entries rather than the largest id ever issued.
+    """
+
+    def __init__(self):
+        self.by_id = {}
+        self.ids = []
+        self._free = []
+
+    def assign(self, key):
+        if self._free:
+            ordinal = heapq.heappop(self._free)
+            self.ids[ordinal] = key
+        else:
+            ordinal = len(self.ids)
+            self.ids.append(key)
+        self.by_id[key] = ordinal
+        return ordinal
+
+    def release(self, key):
+        ordinal = self.by_id.pop(key)
+        self.ids[ordinal] = None
+        # lowest free position first keeps the bitmaps narrow
+        heapq.heappush(self._free, ordinal)
+        return ordinal
+
+    def bitmap(self, keys):
+        bitmap = 0
+        by_id = self.by_id
+        for key in keys:
+            ordinal = by_id.get(key)
+            if ordinal is not None:
+                bitmap |= 1 << ordinal
+        return bitmap
+
+    def keys(self, bitmap):
+        return [self.ids[ordinal] for ordinal in ids_from_bitmap(bitmap)]
+
+
+class FacetSnapshot:
+    """The bitmaps for one build of the index, plus the changes signalled since"""
+
+    def __init__(self):
+        self.bitmaps = {facet: {} for facet in FACETS}
+        self.docs = {}
+        self.deadlines = []
+        self.open = 0
+        self.ordinals = Ordinals()
+
+    @classmethod
+    def build(cls):
+        snapshot = cls()
+        now = timezone.now()
+        for job in Job.objects.filter(deadline__gt=now).values('id', 'job_type', 'location', 'place', 'salary', 'deadline'):
+            snapshot.add(job)
+        return snapshot
+
+    def add(self, job):
+        bit = 1 << self.ordinals.assign(job['id'])
+        values = _facet_values(job)
+        for facet, value in values.items():
+            by_value = self.bitmaps[facet]
+            by_value[value] = by_value.get(value, 0) | bit
+        self.docs[job['id']] = (job['deadline'], values)
+        self.open |= bit
+        heapq.heappush(self.deadlines, (job['deadline'], job['id']))
+
+    def remove(self, job_id):
+        doc = self.docs.pop(job_id, None)
+        if doc is None:
+            return
+        mask = ~(1 << self.ordinals.release(job_id))
+        for facet, value in doc[1].items():
+            by_value = self.bitmaps[facet]
+            by_value[value] &= mask
+            if not by_value[value]:
+                del by_value[value]
+        self.open &= mask
+
+    def expire(self, now):
+        # drop jobs whose deadline passed since they were indexed
+        while self.deadlines and self.deadlines[0][0] <= now:
+            deadline, job_id = heapq.heappop(self.deadlines)
+            doc = self.docs.get(job_id)
+            if doc and doc[0] == deadline:
+                self.remove(job_id)
+
+    def apply(self, job):
+        self.remove(job['id'])
+        if job['deadline'] > timezone.now():
+            self.add(job)
+
+
+class FacetIndex:
+    """
+    The first search in a process builds the index. After that, a stale index keeps
+    serving while a background thread builds the replacement; saves and deletes
+    signalled during the build are replayed onto it before the swap.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._snapshot = None
+        self._built_at = None
+        # changes seen while a background build runs, or None when none is running
+        self._pending = None
+
+    def _ensure_fresh(self):
+        if self._snapshot is None:
+            self._snapshot = FacetSnapshot.build()
+            self._built_at = time.monotonic()
+        elif self._pending is None and time.monotonic() - self._built_at > getattr(settings, 'FACET_INDEX_TTL', 300):
+            self._pending = []
+            threading.Thread(target=self._rebuild, name='facet-index-rebuild', daemon=True).start()
+        self._snapshot.expire(timezone.now())
+        return self._snapshot
+
+    def _rebuild(self):
+        try:
+            snapshot = FacetSnapshot.build()
+        except Exception:
+            with self._lock:
+                # keep serving the old snapshot; the next search retries
+                self._pending = None
+                self._built_at = time.monotonic()
+            raise
+        finally:
+            connections.close_all()
+        with self._lock:
+            for change in self._pending:
+                if isinstance(change, dict):
+                    snapshot.apply(change)
+                else:
+                    snapshot.remove(change)
+            self._snapshot = snapshot
+            self._built_at = time.monotonic()
+            self._pending = None
+
+    def update(self, job):
+        """Reindex a single job (called from the Job save signal)"""
+        change = {
+            'id': job.id, 'job_type': job.job_type, 'location': job.location,
+            'place': job.place, 'salary': job.salary, 'deadline': job.deadline,
+        }
+        with self._lock:
+            if self._snapshot is None:
+                return
+            self._snapshot.apply(change)
+            if self._pending is not None:
+                self._pending.append(change)
+
+    def discard(self, job_id):
+        with self._lock:
+            if self._snapshot is None:
+                return
+            self._snapshot.remove(job_id)
+            if self._pending is not None:
+                self._pending.append(job_id)
+
+    @staticmethod
+    def _filter_bitmap(snapshot, facet, wanted):
+        """OR of the bitmaps of every value of ``facet`` accepted by ``wanted``"""
+        bitmap = 0
+        for value, bits in snapshot.bitmaps[facet].items():
+            if wanted(value):
+                bitmap |= bits
+        return bitmap
+
+    def ids(self, filters):
+        """Open job ids matching every facet filter"""
+        with self._lock:
+            snapshot = self._ensure_fresh()
+            bitmap = snapshot.open
+            for facet, wanted in filters.items():
+                bitmap &= self._filter_bitmap(snapshot, facet, wanted)
+            return snapshot.ordinals.keys(bitmap)
+
+    def counts(self, filters, candidates=None, limit=20):
+        """
+        Facet counts for the current search.
+
+        ``filters`` maps facet name to a predicate on facet values. Each facet is counted
+        against all the *other* filters so the UI can show how many results selecting a
+        different value would give. ``candidates`` is an optional collection of job ids
+        from non-facet filters (e.g. a role text search).
+        """
+        with self._lock:
+            snapshot = self._ensure_fresh()
+            base = snapshot.open
+            if candidates is not None:
+                base &= snapshot.ordinals.bitmap(candidates)
+            selected = {facet: self._filter_bitmap(snapshot, facet, wanted) for facet, wanted in filters.items()}
+
+            result = {}
+            for facet in FACETS:
+                scope = base
+                for other, bitmap in selected.items():
+                    if other != facet:
+                        scope &= bitmap
+                counts = [
+                    (value, (bits & scope).bit_count())
+                    for value, bits in snapshot.bitmaps[facet].items()
+                ]
+                counts = sorted((c for c in counts if c[1]), key=lambda c: (-c[1], c[0]))[:limit]
+                result[facet] = [{'value': value, 'count': count} for value, count in counts]
+            return result
+
+
+facet_index = FacetIndex()
+
+
+@receiver(post_save, sender=Job)
+def reindex_job_facets(sender, instance, **kwargs):
+    transaction.on_commit(lambda: facet_index.update(instance))
+
+
+@receiver(post_delete, sender=Job)
+def unindex_job_facets(sender, instance, **kwargs):
+    job_id = instance.id
+    transaction.on_commit(lambda: facet_index.discard(job_id))
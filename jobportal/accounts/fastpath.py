@@ -0,0 +1,281 @@
+"""
+Read-only fast path for the hottest list endpoints.
+
+The DRF serializers dispatch through one Field object per value and run a
+SerializerMethodField per nested dict. Here each endpoint runs one or two
+``values()`` queries, builds plain dicts in a single loop, and encodes them
+straight to bytes. The output is byte-for-byte what JobSerializer,
+NotificationSerializer and MessageSerializer produce through JSONRenderer;
+``manage.py bench_serializers`` checks that and compares throughput.
+
+Each endpoint has a ``build_*`` function that takes the rows and a wrapper that
+fetches them. The async views call the same wrappers on the database thread
+pool (accounts/db/threads.py).
+
+orjson is used when installed; otherwise the stdlib encoder with DRF's compact
+settings is used.
+"""
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Exists, OuterRef
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .instrumentation import timed_serializer
+from .models import Job, JobApplication
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+@timed_serializer
+def dumps(data):
+    if orjson is not None:
+        body = orjson.dumps(data)
+    else:
+        body = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
+    # JSONRenderer escapes the two line terminators that are valid JSON but not JavaScript
+    return body.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+def enabled(request):
+    """Use the fast path only for plain JSON requests without sparse-fieldset params"""
+    if not getattr(settings, 'FAST_SERIALIZERS', True):
+        return False
+    params = request.query_params
+    if 'fields' in params or 'expand' in params:
+        return False
+    renderer = getattr(request, 'accepted_renderer', None)
+    return renderer is None or renderer.format == 'json'
+
+
+class FastJSONResponse(HttpResponse):
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(dumps(data), **kwargs)
+
+
+def _dt(value):
+    # same text as DRF's DateTimeField / JSONEncoder: ISO 8601, UTC spelled "Z"
+    if value is None:
+        return None
+    if settings.USE_TZ and timezone.is_aware(value):
+        value = timezone.localtime(value)
+    text = value.isoformat()
+    if text.endswith('+00:00'):
+        text = text[:-6] + 'Z'
+    return text
+
+
+def _raw_dt(value):
+    # datetimes inside SerializerMethodField dicts skip the timezone conversion
+    if value is None:
+        return None
+    text = value.isoformat()
+    if text.endswith('+00:00'):
+        text = text[:-6] + 'Z'
+    return text
+
+
+def _float(value):
+    return None if value is None else float(value)
+
+
+JOB_COLUMNS = (
+    'id', 'posted_by_id', 'posted_by__username', 'posted_by__email', 'posted_by__company_name',
+    'company_name', 'role', 'description', 'job_type', 'location', 'place', 'latitude', 'longitude',
+    'salary', 'max_members', 'deadline', 'created_at', 'applications_count',
+)
+APPLICATION_COLUMNS = (
+    'id', 'job_id', 'applied_by_id', 'applied_by__username', 'applied_by__email',
+    'applied_by__profile__id', 'applied_by__profile__profile_picture', 'applied_by__profile__description',
+    'applied_by__profile__currently', 'applied_by__profile__experience',
+    'created_at', 'status', 'approved', 'approved_at',
+)
+
+
+def _nested_job(row):
+    # JobApplicationSerializer.get_job: no applications, raw datetimes, has_applied always True
+    return {
+        'id': row['id'],
+        'posted_by': {
+            'id': row['posted_by_id'],
+            'username': row['posted_by__username'],
+            'email': row['posted_by__email'],
+            'company_name': row['posted_by__company_name'],
+        },
+        'company_name': row['company_name'],
+        'role': row['role'],
+        'description': row['description'],
+        'job_type': row['job_type'],
+        'location': row['location'],
+        'salary': row['salary'],
+        'max_members': row['max_members'],
+        'deadline': _raw_dt(row['deadline']),
+        'created_at': _raw_dt(row['created_at']),
+        'applications_count': row['applications_count'],
+        'has_applied': True,
+    }
+
+
+def _application(app, job):
+    has_profile = app['applied_by__profile__id'] is not None
+    picture = app['applied_by__profile__profile_picture']
+    return {
+        'id': app['id'],
+        'job': job,
+        'applied_by': {
+            'id': app['applied_by_id'],
+            'username': app['applied_by__username'],
+            'email': app['applied_by__email'],
+            'profile_picture': default_storage.url(picture) if picture else None,
+            'description': app['applied_by__profile__description'] if has_profile else None,
+            'currently': app['applied_by__profile__currently'] if has_profile else None,
+            'experience': app['applied_by__profile__experience'] if has_profile else None,
+        },
+        'created_at': _dt(app['created_at']),
+        'status': app['status'],
+        'approved': app['approved'],
+        'approved_at': _dt(app['approved_at']),
+    }
+
+
+def applications(queryset):
+    """Rows shaped exactly like JobApplicationSerializer(many=True).data"""
+    apps = list(queryset.values(*APPLICATION_COLUMNS))
+    job_ids = {app['job_id'] for app in apps}
+    nested_job = {row['id']: _nested_job(row) for row in Job.objects.filter(id__in=job_ids).values(*JOB_COLUMNS)}
+    return [_application(app, nested_job[app['job_id']]) for app in apps]
+
+
+def _job_values(queryset, user):
+    if user is not None and user.is_authenticated:
+        queryset = queryset.annotate(has_applied=Exists(
+            JobApplication.objects.filter(job=OuterRef('pk'), applied_by=user)
+        ))
+        return queryset.values(*JOB_COLUMNS, 'has_applied')
+    return queryset.values(*JOB_COLUMNS)
+
+
+def _job_applications(job_ids):
+    return JobApplication.objects.filter(job_id__in=job_ids).order_by('id').values(*APPLICATION_COLUMNS)
+
+
+@timed_serializer
+def build_jobs(rows, apps):
+    """JobSerializer(many=True).data from _job_values() rows and their _job_applications() rows"""
+    # The nested application dicts repeat their job (minus applications), so build that once per job
+    nested_job = {row['id']: _nested_job(row) for row in rows}
+    applications = {job_id: [] for job_id in nested_job}
+    for app in apps:
+        applications[app['job_id']].append(_application(app, nested_job[app['job_id']]))
+
+    out = []
+    for row in rows:
+        out.append({
+            'id': row['id'],
+            'posted_by': nested_job[row['id']]['posted_by'],
+            'company_name': row['company_name'],
+            'role': row['role'],
+            'description': row['description'],
+            'job_type': row['job_type'],
+            'location': row['location'],
+            'place': row['place'],
+            'latitude': _float(row['latitude']),
+            'longitude': _float(row['longitude']),
+            'salary': row['salary'],
+            'max_members': row['max_members'],
+            'deadline': _dt(row['deadline']),
+            'created_at': _dt(row['created_at']),
+            'applications': applications[row['id']],
+            'applications_count': row['applications_count'],
+            'has_applied': row.get('has_applied', False),
+        })
+    return out
+
+
+def jobs(queryset, user):
+    """Rows shaped exactly like JobSerializer(many=True).data"""
+    rows = list(_job_values(queryset, user))
+    apps = _job_applications([row['id'] for row in rows]) if rows else ()
+    return build_jobs(rows, apps)
+
+
+NOTIFICATION_COLUMNS = (
+    'id', 'actor_id', 'actor__username', 'actor__email', 'actor_count',
+    'recipient_id', 'recipient__username', 'recipient__email',
+    'verb', 'job_id', 'job__role', 'job__company_name', 'is_read', 'created_at',
+)
+
+
+@timed_serializer
+def build_notifications(rows):
+    out = []
+    for row in rows:
+        out.append({
+            'id': row['id'],
+            'actor': None if row['actor_id'] is None else {
+                'id': row['actor_id'],
+                'username': row['actor__username'],
+                'email': row['actor__email'],
+            },
+            'actor_count': row['actor_count'],
+            'recipient': {
+                'id': row['recipient_id'],
+                'username': row['recipient__username'],
+                'email': row['recipient__email'],
+            },
+            'verb': row['verb'],
+            'job': None if row['job_id'] is None else {
+                'id': row['job_id'],
+                'role': row['job__role'],
+                'company_name': row['job__company_name'],
+            },
+            'is_read': row['is_read'],
+            'created_at': _dt(row['created_at']),
+        })
+    return out
+
+
+def notifications(queryset):
+    """Rows shaped exactly like NotificationSerializer(many=True).data"""
+    return build_notifications(queryset.values(*NOTIFICATION_COLUMNS))
+
+
+MESSAGE_COLUMNS = (
+    'id', 'sender_id', 'sender__username', 'sender__email',
+    'recipient_id', 'recipient__username', 'recipient__email',
+    'content', 'created_at', 'is_read',
+)
+
+
+@timed_serializer
+def build_messages(rows):
+    out = []
+    for row in rows:
+        out.append({
+            'id': row['id'],
+            'sender': {
+                'id': row['sender_id'],
+                'username': row['sender__username'],
+                'email': row['sender__email'],
+            },
+            'recipient': {
+                'id': row['recipient_id'],
+                'username': row['recipient__username'],
+                'email': row['recipient__email'],
+            },
+            'content': row['content'],
+            'created_at': _dt(row['created_at']),
+            'is_read': row['is_read'],
+        })
+    return out
+
+
+def messages(queryset):
+    """Rows shaped exactly like MessageSerializer(many=True).data"""
+    return build_messages(queryset.values(*MESSAGE_COLUMNS))
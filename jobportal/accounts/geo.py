@@ -0,0 +1,155 @@
+"""
+Location normalization and radius search helpers.
+
+Free-text locations ("Bangalore", "BLR, India", "Bengaluru") are resolved against
+the bundled offline gazetteer in data/gazetteer.json. Matched rows store the
+canonical place name, lat/lon, and a geohash. Radius queries become a handful of
+indexed ``geohash LIKE 'prefix%'`` scans over the cells around the centre, and an
+exact haversine check then runs on that small candidate set.
+"""
+import functools
+import json
+import math
+import re
+from pathlib import Path
+
+from django.db.models import Q
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / 'data' / 'gazetteer.json'
+GEOHASH_PRECISION = 8
+EARTH_RADIUS_KM = 6371.0
+# model fields written by apply_location()
+GEO_FIELDS = ('place', 'latitude', 'longitude', 'geohash')
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_SPLIT_RE = re.compile(r'[,/|;()]|\s+-\s+')
+_CLEAN_RE = re.compile(r'[^a-z0-9 ]+')
+
+
+class Place:
+    def __init__(self, name, country, lat, lon):
+        self.name = name
+        self.country = country
+        self.lat = lat
+        self.lon = lon
+
+    def __repr__(self):
+        return f"Place({self.name!r})"
+
+
+@functools.lru_cache(maxsize=1)
+def _gazetteer():
+    aliases = {}
+    with open(GAZETTEER_PATH, encoding='utf-8') as fh:
+        for entry in json.load(fh):
+            place = Place(entry['name'], entry['country'], entry['lat'], entry['lon'])
+            for alias in [entry['name'], *entry.get('aliases', [])]:
+                aliases[_clean(alias)] = place
+    return aliases
+
+
+def _clean(text):
+    return ' '.join(_CLEAN_RE.sub(' ', text.lower()).split())
+
+
+def normalize_location(text):
+    """Resolve free text to a canonical Place, or None if nothing in the gazetteer matches"""
+    if not text:
+        return None
+    aliases = _gazetteer()
+    cleaned = _clean(text)
+    if cleaned in aliases:
+        return aliases[cleaned]
+    # "Koramangala, Bangalore, India" -> try each part, then each word
+    for part in _SPLIT_RE.split(text):
+        part = _clean(part)
+        if part in aliases:
+            return aliases[part]
+    for word in cleaned.split():
+        if word in aliases:
+            return aliases[word]
+    return None
+
+
+def apply_location(instance, text):
+    """Fill the place/latitude/longitude/geohash fields of a Job or Profile from ``text``"""
+    place = normalize_location(text)
+    if place is None:
+        instance.place = None
+        instance.latitude = instance.longitude = None
+        instance.geohash = None
+    else:
+        instance.place = place.name
+        instance.latitude = place.lat
+        instance.longitude = place.lon
+        instance.geohash = geohash_encode(place.lat, place.lon)
+
+
+def geohash_encode(lat, lon, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = bit_count = 0
+    return ''.join(chars)
+
+
+def _cell_size_deg(precision):
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def covering_prefixes(lat, lon, radius_km):
+    """
+    Geohash prefixes of the 3x3 block of cells around (lat, lon) at the finest precision
+    whose cells are still at least ``radius_km`` across, which together cover the circle.
+    """
+    precision = 1
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        lat_deg, lon_deg = _cell_size_deg(candidate)
+        height_km = lat_deg * 111.32
+        width_km = lon_deg * 111.32 * max(math.cos(math.radians(lat)), 0.01)
+        if min(height_km, width_km) >= radius_km:
+            precision = candidate
+            break
+
+    lat_deg, lon_deg = _cell_size_deg(precision)
+    prefixes = set()
+    for dlat in (-lat_deg, 0, lat_deg):
+        for dlon in (-lon_deg, 0, lon_deg):
+            cell_lat = min(max(lat + dlat, -89.999999), 89.999999)
+            cell_lon = (lon + dlon + 180) % 360 - 180
+            prefixes.add(geohash_encode(cell_lat, cell_lon, precision))
+    return sorted(prefixes)
+
+
+def within_radius_q(lat, lon, radius_km):
+    """Q object selecting rows whose geohash falls in a cell that may intersect the circle"""
+    q = Q()
+    for prefix in covering_prefixes(lat, lon, radius_km):
+        q |= Q(geohash__startswith=prefix)
+    return q
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
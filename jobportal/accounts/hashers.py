@@ -0,0 +1,100 @@
+"""
+Password hasher profiles.
+
+settings.PASSWORD_HASHER_PROFILES holds the cost parameters for each
+algorithm, and PASSWORD_HASHER_PROFILE picks the one that hashes new
+passwords. The other hashers stay in PASSWORD_HASHERS only to verify
+existing hashes. Django's check_password() rehashes on a successful login
+whenever the stored hash uses another algorithm or other parameters
+(``must_update``), so changing the profile or its costs upgrades users as
+they log in. No migration is needed.
+
+With PASSWORD_HASHING_WORKERS > 0, encode/verify run in a bounded process
+pool. The request thread waits on a future, which releases the GIL, while
+the hashing runs on other cores. At most 2 * workers hashes are queued, and
+any further callers block until a slot frees up.
+"""
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+# set in pool processes so the hasher there runs inline instead of re-submitting
+_in_worker = False
+
+
+def _init_worker():
+    global _in_worker
+    _in_worker = True
+    import django
+    django.setup()
+
+
+def _call(algorithm, method, args, kwargs):
+    return getattr(hashers.get_hasher(algorithm), method)(*args, **kwargs)
+
+
+def get_pool():
+    """The shared hashing pool, or None when hashing runs inline"""
+    global _pool, _slots
+    workers = getattr(settings, 'PASSWORD_HASHING_WORKERS', 0)
+    if not workers or _in_worker:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _slots = threading.BoundedSemaphore(workers * 2)
+                _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    return _pool
+
+
+def offload(inline, algorithm, method, args, kwargs):
+    pool = get_pool()
+    if pool is None:
+        return inline(*args, **kwargs)
+    with _slots:
+        return pool.submit(_call, algorithm, method, args, kwargs).result()
+
+
+def profile_params(name):
+    return settings.PASSWORD_HASHER_PROFILES.get(name, {})
+
+
+class OffloadedHasherMixin:
+    """Runs encode/verify through the hashing pool when one is configured"""
+
+    def encode(self, *args, **kwargs):
+        return offload(super().encode, self.algorithm, 'encode', args, kwargs)
+
+    def verify(self, *args, **kwargs):
+        return offload(super().verify, self.algorithm, 'verify', args, kwargs)
+
+
+class Argon2PasswordHasher(OffloadedHasherMixin, hashers.Argon2PasswordHasher):
+    """Needs the optional argon2-cffi package"""
+
+    def __init__(self):
+        params = profile_params('argon2')
+        self.time_cost = params.get('time_cost', self.time_cost)
+        self.memory_cost = params.get('memory_cost', self.memory_cost)
+        self.parallelism = params.get('parallelism', self.parallelism)
+
+
+class ScryptPasswordHasher(OffloadedHasherMixin, hashers.ScryptPasswordHasher):
+    def __init__(self):
+        params = profile_params('scrypt')
+        self.work_factor = params.get('work_factor', self.work_factor)
+        self.block_size = params.get('block_size', self.block_size)
+        self.parallelism = params.get('parallelism', self.parallelism)
+        # OpenSSL refuses anything over 32 MiB unless maxmem is raised; scrypt needs ~128 * n * r bytes,
+        # and the headroom lets hashes made with a larger (older) work factor still verify
+        self.maxmem = 4 * 128 * self.work_factor * self.block_size
+
+
+class PBKDF2PasswordHasher(OffloadedHasherMixin, hashers.PBKDF2PasswordHasher):
+    def __init__(self):
+        self.iterations = profile_params('pbkdf2').get('iterations', self.iterations)
@@ -0,0 +1,60 @@
+"""
+Idempotency-Key support for write endpoints.
+
+A client may send an ``Idempotency-Key`` header with a POST. The first response
+for a (user, path, key) triple is kept in the cache for IDEMPOTENCY_KEY_TTL
+seconds and replayed for any retry carrying the same key, so double clicks and
+network retries never execute the view twice.
+"""
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+_PENDING = '__pending__'
+
+
+def _cache_key(request, key):
+    raw = f"{request.user.pk}:{request.method}:{request.path}:{key}"
+    return 'idem:' + hashlib.sha256(raw.encode()).hexdigest()
+
+
+def idempotent(view_method):
+    """Decorate an APIView handler so repeated Idempotency-Keys replay the first response"""
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.META.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        ttl = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 60 * 10)
+        cache_key = _cache_key(request, key)
+
+        # cache.add is atomic: only the first request with this key gets to run the view
+        if not cache.add(cache_key, _PENDING, ttl):
+            stored = cache.get(cache_key)
+            if stored == _PENDING or stored is None:
+                return Response({"error": "A request with this Idempotency-Key is in progress"}, status=409)
+            status_code, data = stored
+            response = Response(data, status=status_code)
+            response['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            cache.delete(cache_key)
+            raise
+
+        # Only remember outcomes; server errors should be retryable
+        if response.status_code < 500:
+            cache.set(cache_key, (response.status_code, response.data), ttl)
+        else:
+            cache.delete(cache_key)
+        return response
+
+    return wrapper
@@ -0,0 +1,320 @@
+"""
+Per-request performance instrumentation, exported in Prometheus text format.
+
+InstrumentationMiddleware records the following for every request, labelled
+with the URL name (``accounts/urls.py``):
+
+- wall time;
+- the number and total time of DB queries. One ``execute_wrapper`` is
+  installed on each database connection when it opens, and it adds to the
+  metrics of the request in the current context (a contextvar). Under ASGI,
+  sync_to_async copies that context into the thread running the ORM call, so
+  concurrent requests sharing a thread and connection are counted apart;
+- serializer time: to_representation() of the accounts serializers
+  (TimedRepresentationMixin), rendering through TimedJSONRenderer (the
+  default renderer in REST_FRAMEWORK) and the accounts/fastpath.py
+  builders. Queries that run inside these, such as lazy querysets and
+  per-row lookups, count as DB time, not serializer time;
+- response size in bytes, after compression.
+
+Observations go into in-process histograms. ``GET /metrics`` exposes them.
+Each worker process has its own histograms, so scrape every worker or sum
+across them. /metrics answers 404 unless METRICS_TOKEN or
+METRICS_ALLOWED_IPS is set. Then it requires ``Authorization: Bearer <token>``
+or a REMOTE_ADDR from the allowlist, and answers 403 otherwise.
+
+N+1 detection: queries are reduced to their shape, with literals and
+placeholder lists collapsed. When one shape runs more than
+N_PLUS_ONE_THRESHOLD times in a request, the request is logged as a warning
+and counted in ``jobportal_n_plus_one_total``.
+
+Streamed bodies (``?stream=``) are produced after the middleware returns.
+Their queries and size are not included.
+"""
+import contextvars
+import functools
+import hmac
+import logging
+import re
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden, HttpResponseNotFound
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+_state = contextvars.ContextVar('request_metrics', default=None)
+_lock = threading.Lock()
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [count per bucket..., sum, count]
+        self._series = {}
+
+    def observe(self, value, *label_values):
+        with _lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with _lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for label_values, series in items:
+            labels = _labels(self.labels, label_values)
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound:g}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series[-1]}')
+            lines.append(f'{self.name}_sum{{{labels}}} {series[-2]:g}')
+            lines.append(f'{self.name}_count{{{labels}}} {series[-1]}')
+        return lines
+
+
+class CounterMetric:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = Counter()
+
+    def inc(self, *label_values, amount=1):
+        with _lock:
+            self._values[label_values] += amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with _lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f'{self.name}{{{_labels(self.labels, label_values)}}} {value}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+REQUESTS = CounterMetric('jobportal_requests_total', "Requests by view, method and status", ('view', 'method', 'status'))
+DURATION = Histogram('jobportal_request_duration_seconds', "Wall time per request", ('view', 'method'), TIME_BUCKETS)
+DB_QUERIES = Histogram('jobportal_db_queries', "DB queries per request", ('view', 'method'), QUERY_BUCKETS)
+DB_TIME = Histogram('jobportal_db_time_seconds', "Total DB time per request", ('view', 'method'), TIME_BUCKETS)
+SERIALIZE_TIME = Histogram(
+    'jobportal_serialize_seconds', "Serializer and JSON rendering time per request, excluding DB time",
+    ('view', 'method'), TIME_BUCKETS,
+)
+RESPONSE_SIZE = Histogram('jobportal_response_bytes', "Response body size per request", ('view', 'method'), SIZE_BUCKETS)
+N_PLUS_ONE = CounterMetric(
+    'jobportal_n_plus_one_total', "Requests that repeated one SQL shape more than N_PLUS_ONE_THRESHOLD times", ('view',),
+)
+METRICS = (REQUESTS, DURATION, DB_QUERIES, DB_TIME, SERIALIZE_TIME, RESPONSE_SIZE, N_PLUS_ONE)
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db_time', 'serialize_time', 'shapes', '_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.shapes = Counter()
+        self._depth = 0
+
+
+_IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)+\s*\)')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+
+
+def sql_shape(sql):
+    """``sql`` with literals and IN (%s, %s, ...) lists collapsed, so repeats of one query compare equal"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _IN_LIST.sub('(%s...)', sql)
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _state.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - start
+        metrics.queries += 1
+        # shapes are worked out once per distinct statement, at the end of the request
+        metrics.shapes[sql] += 1
+
+
+class serializer_timer:
+    """Adds the time spent inside to the request's serializer time, minus DB time; nested uses count once"""
+
+    def __enter__(self):
+        self.metrics = metrics = _state.get()
+        if metrics is not None:
+            metrics._depth += 1
+            if metrics._depth == 1:
+                self.start = time.perf_counter()
+                self.db_time = metrics.db_time
+        return self
+
+    def __exit__(self, *exc):
+        metrics = self.metrics
+        if metrics is not None:
+            metrics._depth -= 1
+            if metrics._depth == 0:
+                elapsed = time.perf_counter() - self.start
+                metrics.serialize_time += elapsed - (metrics.db_time - self.db_time)
+        return False
+
+
+def timed_serializer(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with serializer_timer():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+class TimedRepresentationMixin:
+    """Serializer mixin: to_representation() counts as serializer time (once, however deeply nested)"""
+
+    def to_representation(self, instance):
+        with serializer_timer():
+            return super().to_representation(instance)
+
+
+class TimedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with serializer_timer():
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unmatched>'
+    return match.view_name or match.route
+
+
+def _install_wrapper(sender, connection, **kwargs):
+    # once per connection object; it reads the request's metrics from the context on every query
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERF_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        connection_created.connect(_install_wrapper, dispatch_uid='accounts.instrumentation')
+        # connections this thread opened before the middleware loaded
+        for connection in connections.all(initialized_only=True):
+            _install_wrapper(None, connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path == '/metrics':
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = _state.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        self.observe(request, response, metrics, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if request.path == '/metrics':
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        token = _state.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        self.observe(request, response, metrics, time.perf_counter() - start)
+        return response
+
+    def observe(self, request, response, metrics, elapsed):
+        view = view_name(request)
+        method = request.method
+        REQUESTS.inc(view, method, response.status_code)
+        DURATION.observe(elapsed, view, method)
+        DB_QUERIES.observe(metrics.queries, view, method)
+        DB_TIME.observe(metrics.db_time, view, method)
+        SERIALIZE_TIME.observe(max(metrics.serialize_time, 0.0), view, method)
+        if not response.streaming:
+            RESPONSE_SIZE.observe(len(response.content), view, method)
+
+        threshold = getattr(settings, 'N_PLUS_ONE_THRESHOLD', 10)
+        shapes = Counter()
+        for sql, count in metrics.shapes.items():
+            shapes[sql_shape(sql)] += count
+        repeated = [(count, shape) for shape, count in shapes.items() if count > threshold]
+        if repeated:
+            N_PLUS_ONE.inc(view)
+            count, shape = max(repeated)
+            logger.warning("Possible N+1 in %s %s (%s): %d runs of %s", method, request.path, view, count, shape)
+
+
+def render_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_allowed(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+            return True
+    return request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ())
+
+
+def metrics_view(request):
+    """GET /metrics in the Prometheus text exposition format"""
+    if not (getattr(settings, 'METRICS_TOKEN', '') or getattr(settings, 'METRICS_ALLOWED_IPS', ())):
+        # not configured: do not reveal that the endpoint exists
+        return HttpResponseNotFound()
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
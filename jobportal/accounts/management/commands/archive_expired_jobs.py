@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import ArchivedJob, ArchivedJobApplication, Job, JobApplication, Notification
+
+JOB_FIELDS = [
+    'id', 'posted_by_id', 'company_name', 'role', 'description', 'job_type', 'location', 'salary',
+    'max_members', 'deadline', 'created_at', 'updated_at', 'applications_count', 'approved_count',
+]
+APPLICATION_FIELDS = ['id', 'job_id', 'applied_by_id', 'created_at', 'status', 'approved', 'approved_at']
+
+
+class Command(BaseCommand):
+    help = "Move jobs past their deadline (and their applications) into the archive tables in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-days', type=int, default=7, help="Keep expired jobs live for this many days")
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['grace_days'])
+        batch_size = options['batch_size']
+
+        if options['dry_run']:
+            count = Job.objects.expired(before=cutoff).count()
+            self.stdout.write(f"{count} jobs would be archived")
+            return
+
+        jobs_done = applications_done = 0
+        while True:
+            with transaction.atomic():
+                jobs = list(
+                    Job.objects.expired(before=cutoff).order_by('deadline', 'created_at')
+                    .select_for_update().values(*JOB_FIELDS)[:batch_size]
+                )
+                if not jobs:
+                    break
+                job_ids = [job['id'] for job in jobs]
+                applications = list(JobApplication.objects.filter(job_id__in=job_ids).values(*APPLICATION_FIELDS))
+
+                ArchivedJob.objects.bulk_create([ArchivedJob(**job) for job in jobs], ignore_conflicts=True)
+                ArchivedJobApplication.objects.bulk_create(
+                    [ArchivedJobApplication(**application) for application in applications], ignore_conflicts=True
+                )
+                # keep the notification text, just drop the link to the live row
+                Notification.objects.filter(job_id__in=job_ids).update(job=None)
+                # status history, saved-search matches and the stats rollups have no cascade,
+                # so they stay behind with the archived job's id
+                Job.objects.filter(id__in=job_ids).delete()
+
+            jobs_done += len(jobs)
+            applications_done += len(applications)
+            self.stdout.write(f"archived {jobs_done} jobs so far")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {jobs_done} jobs and {applications_done} applications"
+        ))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from accounts import message_archive
+from accounts.models import Message
+
+
+class Command(BaseCommand):
+    help = "Move whole months of messages older than MESSAGE_ARCHIVE_DAYS into compressed cold-storage segments"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help="Override MESSAGE_ARCHIVE_DAYS")
+        parser.add_argument('--block-rows', type=int, help="Override MESSAGE_ARCHIVE_BLOCK_ROWS")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        cutoff = message_archive.archive_cutoff(days=options['days'])
+        months = message_archive.months_to_archive(cutoff)
+
+        if options['dry_run']:
+            count = Message.objects.filter(created_at__lt=cutoff).count()
+            self.stdout.write(f"{count} messages in {len(months)} months before {cutoff:%Y-%m-%d} would be archived")
+            return
+
+        archived = 0
+        for month in months:
+            segment = message_archive.archive_month(month, block_rows=options['block_rows'])
+            if segment is None:
+                continue
+            archived += segment.message_count
+            self.stdout.write(
+                f"{month:%Y-%m}: {segment.message_count} messages, {segment.threads.count()} threads, "
+                f"{len(segment.blocks)} blocks -> {segment.path}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} messages (codec {message_archive.default_codec()})"))
@@ -0,0 +1,74 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts import geo
+from accounts.alerts import SearchIndex
+from accounts.models import Account, Job, SavedSearch
+
+ROLES = ['python', 'java', 'react', 'backend', 'data', 'ml', 'devops', 'golang', 'sales', 'design']
+LOCATIONS = ['Pune', 'Bangalore', 'Delhi', 'Chennai', 'Mumbai', 'Hyderabad', 'remote', 'kochi']
+JOB_TYPES = ['full_time', 'part_time', 'contract']
+
+
+class Command(BaseCommand):
+    help = "Time matching a new job against N saved searches (accounts/alerts.py); synthetic rows are rolled back"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--searches', type=int, default=100000)
+        parser.add_argument('--jobs', type=int, default=50, help="Jobs to match")
+        parser.add_argument('--budget-ms', type=float, default=50.0)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            tag = int(time.time())
+            users = Account.objects.bulk_create([
+                Account(username=f'bench-alert-{tag}-{i}', email=f'bench-alert-{tag}-{i}@example.com')
+                for i in range(100)
+            ])
+            searches = []
+            for i in range(options['searches']):
+                search = SavedSearch(
+                    user=users[i % len(users)], role=rng.choice(ROLES + ['']), location=rng.choice(LOCATIONS + ['']),
+                    job_type=rng.choice(JOB_TYPES + ['']), radius_km=rng.choice([None, None, 50]),
+                )
+                geo.apply_location(search, search.location)
+                if search.latitude is None:
+                    search.radius_km = None
+                searches.append(search)
+            SavedSearch.objects.bulk_create(searches, batch_size=5000)
+
+            start = time.perf_counter()
+            index = SearchIndex.build()
+            self.stdout.write(f"Built the index of {options['searches']} searches in {time.perf_counter() - start:.2f} s "
+                              "(background thread; requests keep the previous index meanwhile)")
+
+            timings = []
+            matched = 0
+            for _ in range(options['jobs']):
+                # matching only reads the job's fields, so it is never saved
+                job = Job(
+                    role=f"{rng.choice(ROLES).title()} {rng.choice(['Developer', 'Engineer', 'Lead'])}",
+                    job_type=rng.choice(JOB_TYPES), salary=rng.choice(['', '40k', '12 LPA']),
+                )
+                geo.apply_location(job, rng.choice(LOCATIONS))
+                start = time.perf_counter()
+                matched += len(index.match(job))
+                timings.append((time.perf_counter() - start) * 1000)
+            transaction.set_rollback(True)
+
+        timings.sort()
+        p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+        self.stdout.write(
+            f"match: p50 {statistics.median(timings):.1f} ms  p95 {p95:.1f} ms  max {timings[-1]:.1f} ms  "
+            f"({matched / len(timings):.0f} searches matched per job)"
+        )
+        if p95 <= options['budget_ms']:
+            self.stdout.write(self.style.SUCCESS(f"p95 within the {options['budget_ms']:g} ms budget"))
+        else:
+            self.stdout.write(self.style.ERROR(f"p95 over the {options['budget_ms']:g} ms budget"))
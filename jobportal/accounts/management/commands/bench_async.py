@@ -0,0 +1,99 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+from accounts.management import loadgen
+from accounts.models import Account, Job, Message, Notification, Skill
+from accounts.serializers import CustomTokenObtainPairSerializer
+
+ENDPOINTS = ('notifications', 'messages', 'job', 'skills')
+
+
+class Command(BaseCommand):
+    help = ("Compare request throughput of the sync views behind a WSGI thread pool with the async views "
+            "behind the ASGI handler, with simulated database latency on every query")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=ENDPOINTS, default='notifications')
+        parser.add_argument('--requests', type=int, default=200, help="Requests per deployment")
+        parser.add_argument('--latency', type=float, default=20.0, help="Milliseconds added to every query")
+        parser.add_argument('--wsgi-threads', type=int, default=4,
+                            help="WSGI worker threads (e.g. gunicorn --threads)")
+        parser.add_argument('--concurrency', type=int, default=32, help="In-flight requests against ASGI")
+
+    def handle(self, *args, **options):
+        # Synthetic rows are committed so the server threads can see them, then deleted
+        tag = int(time.time())
+        user, path = self._seed(tag, options['endpoint'])
+        token = str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+        delay = options['latency'] / 1000
+
+        def slow_query(execute, sql, params, many, context):
+            time.sleep(delay)
+            return execute(sql, params, many, context)
+
+        def add_latency(sender, connection, **kwargs):
+            # fires on every reconnect of a thread's (reused) connection wrapper
+            if slow_query not in connection.execute_wrappers:
+                connection.execute_wrappers.append(slow_query)
+
+        connection_created.connect(add_latency)
+        try:
+            with loadgen.unthrottled():
+                self.stdout.write(f"GET {path}, {options['requests']} requests, {options['latency']:g} ms per query")
+                wsgi = self._run_wsgi(path, token, options['requests'], options['wsgi_threads'])
+                self._report(f"WSGI, {options['wsgi_threads']} threads", *wsgi)
+                asgi = self._run_asgi(path, token, options['requests'], options['concurrency'])
+                self._report(f"ASGI, {options['concurrency']} concurrent", *asgi)
+                if wsgi[0] and asgi[0]:
+                    ratio = (len(asgi[1]) / asgi[0]) / (len(wsgi[1]) / wsgi[0])
+                    self.stdout.write(f"ASGI / WSGI throughput: x{ratio:.1f}")
+        finally:
+            connection_created.disconnect(add_latency)
+            connections.close_all()
+            Account.objects.filter(username__startswith=f'bench-async-{tag}').delete()
+            Skill.objects.filter(name__startswith=f'bench-async-{tag}').delete()
+
+    def _seed(self, tag, endpoint):
+        user = Account.objects.create(username=f'bench-async-{tag}', email=f'bench-async-{tag}@example.com')
+        other = Account.objects.create(
+            username=f'bench-async-{tag}-co', email=f'bench-async-{tag}-co@example.com',
+            role='company', company_name='Bench Co',
+        )
+        job = Job.objects.create(
+            posted_by=other, company_name='Bench Co', role='Engineer', description='x' * 400,
+            job_type='full_time', location='Bangalore', max_members=5, deadline=timezone.now() + timedelta(days=30),
+        )
+        Notification.objects.bulk_create([
+            Notification(recipient=user, actor=other, verb=f'notification {i}', job=job) for i in range(50)
+        ])
+        Message.objects.bulk_create([
+            Message(sender=user if i % 2 else other, recipient=other if i % 2 else user, content=f'message {i}')
+            for i in range(50)
+        ])
+        Skill.objects.bulk_create([Skill(name=f'bench-async-{tag}-{i}') for i in range(50)])
+        return user, {
+            'notifications': '/api/accounts/notifications/',
+            'messages': f'/api/accounts/messages/?user_id={other.id}',
+            'job': f'/api/accounts/jobs/{job.id}/',
+            'skills': '/api/accounts/skills/',
+        }[endpoint]
+
+    def _run_wsgi(self, path, token, count, threads):
+        loadgen.use_async_views(False)
+        return loadgen.wsgi_requests(path, token, count, threads)
+
+    def _run_asgi(self, path, token, count, concurrency):
+        loadgen.use_async_views(True)
+        try:
+            return loadgen.asgi_requests(path, token, count, concurrency)
+        finally:
+            loadgen.use_async_views(False)
+
+    def _report(self, label, elapsed, results):
+        line, errors = loadgen.summary(label, elapsed, results)
+        self.stdout.write(line + (self.style.ERROR(f"  {errors} non-200 responses") if errors else ''))
@@ -0,0 +1,80 @@
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from accounts.db import pool as db_pool
+from accounts.management import loadgen
+from accounts.models import Account, Notification
+from accounts.serializers import CustomTokenObtainPairSerializer
+
+MODES = ('per-request', 'persistent', 'pooled')
+
+
+class Command(BaseCommand):
+    help = ("Requests per second on GET /api/accounts/notifications/ with a new DB connection per request, "
+            "persistent per-thread connections (CONN_MAX_AGE) and the accounts.db connection pool")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300, help="Requests per mode")
+        parser.add_argument('--server', choices=('wsgi', 'asgi'), default='wsgi',
+                            help="asgi runs each request in a new thread, so persistent connections never get reused")
+        parser.add_argument('--threads', type=int, default=8, help="WSGI threads / ASGI requests in flight")
+        parser.add_argument('--pool-size', type=int, default=8)
+        parser.add_argument('--connect-latency', type=float, default=0.0,
+                            help="Milliseconds added to every new connection (TCP + auth handshake). "
+                                 "Use with the SQLite stand-in, which opens connections in microseconds")
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+
+    def handle(self, *args, **options):
+        connection = connections['default']
+        if not isinstance(connection, db_pool.PooledDatabaseWrapperMixin):
+            raise CommandError("DATABASES['default'] must use accounts.db.mysql or accounts.db.sqlite3")
+        # every thread's wrapper shares this dict, so changing it switches the mode for new connections
+        settings_dict = connection.settings_dict
+        saved = settings_dict['CONN_MAX_AGE'], settings_dict['OPTIONS'].get('pool')
+
+        tag = int(time.time())
+        user = Account.objects.create(username=f'bench-pool-{tag}', email=f'bench-pool-{tag}@example.com')
+        Notification.objects.bulk_create([Notification(recipient=user, verb=f'notification {i}') for i in range(20)])
+        token = str(CustomTokenObtainPairSerializer.get_token(user).access_token)
+        connections.close_all()
+
+        opened = [0]
+        backend_class = next(
+            klass for klass in type(connection).__mro__
+            if 'get_new_connection' in vars(klass) and not issubclass(klass, db_pool.PooledDatabaseWrapperMixin)
+        )
+        raw_connect = backend_class.get_new_connection
+        delay = options['connect_latency'] / 1000
+
+        def connect(wrapper, conn_params):
+            opened[0] += 1
+            time.sleep(delay)
+            return raw_connect(wrapper, conn_params)
+
+        self.stdout.write(f"{options['server'].upper()}, {options['threads']} concurrent, {options['requests']} "
+                          f"requests per mode, {options['connect_latency']:g} ms per new connection")
+        loadgen.use_async_views(options['server'] == 'asgi')
+        try:
+            with loadgen.unthrottled(), mock.patch.object(backend_class, 'get_new_connection', connect):
+                for mode in options['modes']:
+                    settings_dict['CONN_MAX_AGE'] = 600 if mode == 'persistent' else 0
+                    settings_dict['OPTIONS']['pool'] = {'max_size': options['pool_size']} if mode == 'pooled' else False
+                    opened[0] = 0
+                    if options['server'] == 'asgi':
+                        elapsed, results = loadgen.asgi_requests(
+                            '/api/accounts/notifications/', token, options['requests'], options['threads'])
+                    else:
+                        elapsed, results = loadgen.wsgi_requests(
+                            '/api/accounts/notifications/', token, options['requests'], options['threads'])
+                    line, errors = loadgen.summary(mode, elapsed, results)
+                    self.stdout.write(f"{line}  {opened[0]:5d} connections opened"
+                                      + (self.style.ERROR(f"  {errors} non-200 responses") if errors else ''))
+                    db_pool.close_all()
+        finally:
+            settings_dict['CONN_MAX_AGE'], settings_dict['OPTIONS']['pool'] = saved
+            loadgen.use_async_views(False)
+            connections.close_all()
+            user.delete()
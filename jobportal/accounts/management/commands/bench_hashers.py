@@ -0,0 +1,53 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.utils.module_loading import import_string
+
+from accounts.hashers import OffloadedHasherMixin
+
+
+class Command(BaseCommand):
+    help = "Logins per second per core for each password hasher profile (and through the hashing pool)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=10, help="Verifications timed per profile")
+        parser.add_argument('--workers', type=int, default=0,
+                            help="Also measure total throughput through a hashing pool of this size")
+
+    def handle(self, *args, **options):
+        rounds = options['rounds']
+        for name, profile in settings.PASSWORD_HASHER_PROFILES.items():
+            hasher = import_string(profile['hasher'])()
+            # bypass the pool so this measures one core
+            inline = super(OffloadedHasherMixin, hasher)
+            try:
+                start = time.perf_counter()
+                encoded = inline.encode('correct horse battery staple', hasher.salt())
+            except (ImportError, ValueError) as e:
+                self.stdout.write(f"{name:<8} skipped: {e}")
+                continue
+            encode_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            for _ in range(rounds):
+                assert inline.verify('correct horse battery staple', encoded)
+            per_login = (time.perf_counter() - start) / rounds
+            line = (f"{name:<8} hash {encode_ms:7.1f}ms  verify {per_login * 1000:7.1f}ms  "
+                    f"{1 / per_login:7.1f} logins/s/core")
+
+            if options['workers']:
+                line += f"  pool x{options['workers']}: {self._pooled(hasher, encoded, rounds, options['workers']):7.1f} logins/s"
+            self.stdout.write(line)
+
+    def _pooled(self, hasher, encoded, rounds, workers):
+        with override_settings(PASSWORD_HASHING_WORKERS=workers):
+            total = rounds * workers
+            with ThreadPoolExecutor(max_workers=workers * 2) as threads:
+                # warm the process pool up before timing
+                list(threads.map(lambda _: hasher.verify('correct horse battery staple', encoded), range(workers)))
+                start = time.perf_counter()
+                list(threads.map(lambda _: hasher.verify('correct horse battery staple', encoded), range(total)))
+                return total / (time.perf_counter() - start)
@@ -0,0 +1,131 @@
+import json
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts import fastpath
+from accounts.models import Account, Job, JobApplication, Message, Notification, Profile
+from accounts.serializers import JobSerializer, MessageSerializer, NotificationSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare DRF serializer + JSONRenderer against accounts.fastpath on the hot list endpoints"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Create this many synthetic jobs (plus applicants, messages and "
+                                 "notifications) for the run; they are rolled back afterwards")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per endpoint; the best is reported")
+        parser.add_argument('--username', help="Render as this user (default: the seeded user or the first user)")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user, other = self._seed(options['seed']) if options['seed'] else self._existing(options['username'])
+            self._run(user, other, options['repeat'])
+            transaction.set_rollback(True)
+
+    def _existing(self, username):
+        users = Account.objects.filter(username=username) if username else Account.objects.order_by('id')
+        user = users.first()
+        if user is None:
+            raise CommandError("No users to render as; pass --seed N to generate data")
+        message = Message.objects.filter(Q(sender=user) | Q(recipient=user)).first()
+        if message is None:
+            other = user
+        else:
+            other = message.recipient if message.sender_id == user.id else message.sender
+        return user, other
+
+    def _seed(self, count):
+        now = timezone.now()
+        tag = int(time.time())
+        company = Account.objects.create(
+            username=f'bench-co-{tag}', email=f'bench-co-{tag}@example.com', role='company', company_name='Bench Co'
+        )
+        users = Account.objects.bulk_create([
+            Account(username=f'bench-{tag}-{i}', email=f'bench-{tag}-{i}@example.com')
+            for i in range(max(count // 2, 10))
+        ])
+        Profile.objects.bulk_create([
+            Profile(user=u, description='Synthetic profile', currently='Benchmarking', experience='3 years')
+            for u in users
+        ], ignore_conflicts=True)
+        jobs = Job.objects.bulk_create([
+            Job(
+                posted_by=company, company_name='Bench Co', role=f'Engineer {i}', description='x' * 400,
+                job_type='full_time', location='Bangalore', salary='50,000', max_members=5,
+                deadline=now + timedelta(days=30),
+            )
+            for i in range(count)
+        ])
+        applications = [
+            JobApplication(job=job, applied_by=users[(i + k) % len(users)])
+            for i, job in enumerate(jobs) for k in range(3)
+        ]
+        JobApplication.objects.bulk_create(applications, ignore_conflicts=True)
+        Job.objects.filter(id__in=[job.id for job in jobs]).update(applications_count=3, pending_count=3)
+
+        user, other = users[0], users[1]
+        Message.objects.bulk_create([
+            Message(sender=user if i % 2 else other, recipient=other if i % 2 else user, content=f'message {i}')
+            for i in range(count)
+        ])
+        Notification.objects.bulk_create([
+            Notification(recipient=user, actor=company, verb=f'notification {i}', job=jobs[i % len(jobs)])
+            for i in range(max(count, 100))
+        ])
+        return user, other
+
+    def _time(self, fn, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, body
+
+    def _run(self, user, other, repeat):
+        request = Request(APIRequestFactory().get('/'))
+        request.user = user
+        renderer = JSONRenderer()
+
+        jobs = Job.objects.open().order_by('-created_at')
+        notes = Notification.objects.filter(recipient=user).order_by('-created_at')[:100]
+        messages = Message.objects.filter(
+            Q(sender=user, recipient=other) | Q(sender=other, recipient=user)
+        ).order_by('created_at')
+
+        def drf_jobs():
+            context = {'request': request}
+            queryset = JobSerializer.optimize_queryset(jobs, context)
+            return renderer.render(JobSerializer(queryset, many=True, context=context).data)
+
+        # .all() so each run queries afresh instead of reusing the evaluated queryset cache
+        endpoints = [
+            ('jobs', drf_jobs, lambda: fastpath.dumps(fastpath.jobs(jobs, user))),
+            ('notifications', lambda: renderer.render(NotificationSerializer(notes.all(), many=True).data),
+             lambda: fastpath.dumps(fastpath.notifications(notes))),
+            ('messages', lambda: renderer.render(MessageSerializer(messages.all(), many=True).data),
+             lambda: fastpath.dumps(fastpath.messages(messages))),
+        ]
+
+        encoder = 'orjson' if fastpath.orjson is not None else 'json'
+        self.stdout.write(f"rendering as {user.username}, encoder={encoder}, best of {repeat}")
+        for name, slow, fast in endpoints:
+            slow_time, slow_body = self._time(slow, repeat)
+            fast_time, fast_body = self._time(fast, repeat)
+            rows = len(json.loads(fast_body))
+            same = 'identical' if slow_body == fast_body else 'DIFFERENT'
+            self.stdout.write(
+                f"{name:<14} rows={rows:<6} drf={slow_time * 1000:8.1f}ms ({rows / slow_time:9.0f} rows/s)  "
+                f"fast={fast_time * 1000:8.1f}ms ({rows / fast_time:9.0f} rows/s)  "
+                f"x{slow_time / fast_time:4.1f}  output {same}"
+            )
@@ -0,0 +1,66 @@
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts import fastpath, streaming
+from accounts.models import Account, Job, JobApplication
+from accounts.serializers import JobApplicationSerializer
+
+
+class Command(BaseCommand):
+    help = "Peak memory (tracemalloc) of a buffered vs streamed applicant export at growing row counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 4000, 16000],
+                            help="Applicant counts to measure; synthetic rows are rolled back afterwards")
+        parser.add_argument('--chunk-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            tag = int(time.time())
+            company = Account.objects.create(
+                username=f'bench-co-{tag}', email=f'bench-co-{tag}@example.com', role='company', company_name='Bench Co'
+            )
+            job = Job.objects.create(
+                posted_by=company, company_name='Bench Co', role='Engineer', description='x' * 400,
+                job_type='full_time', location='Bangalore', salary='50,000', max_members=5,
+                deadline=timezone.now() + timedelta(days=30),
+            )
+            request = Request(APIRequestFactory().get('/', {'stream': 'json'}))
+            request.user = company
+
+            have = 0
+            for rows in sorted(options['rows']):
+                users = Account.objects.bulk_create([
+                    Account(username=f'bench-{tag}-{i}', email=f'bench-{tag}-{i}@example.com')
+                    for i in range(have, rows)
+                ])
+                JobApplication.objects.bulk_create([JobApplication(job=job, applied_by=u) for u in users])
+                have = rows
+                applications = job.applications.all()
+
+                def buffered():
+                    data = JobApplicationSerializer(applications, many=True, context={'request': request}).data
+                    return len(JSONRenderer().render(data))
+
+                def streamed():
+                    rows = streaming.fast_rows(applications, fastpath.applications, chunk_size=options['chunk_size'])
+                    response = streaming.stream_response(rows, 'json')
+                    return sum(len(part) for part in response.streaming_content)
+
+                for name, fn in (('buffered', buffered), ('streamed', streamed)):
+                    tracemalloc.start()
+                    size = fn()
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                    self.stdout.write(
+                        f"{rows:>7} rows  {name:<9} {size / 1024:9.0f} KiB out  peak {peak / 1024 / 1024:7.2f} MiB"
+                    )
+            transaction.set_rollback(True)
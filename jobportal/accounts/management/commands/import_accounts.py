@@ -0,0 +1,44 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.bulk_import import FORMATS, guess_format, import_accounts
+
+
+class Command(BaseCommand):
+    help = "Bulk-create accounts and profiles from a CSV or JSONL file ('-' reads stdin)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help="Default: from the file extension, else csv")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=None, help="Password hashing processes (default: CPU count)")
+        parser.add_argument('--skip-password-validation', action='store_true')
+        parser.add_argument('--dry-run', action='store_true', help="Validate and check for duplicates only")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or guess_format(path)
+        try:
+            fh = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        except OSError as e:
+            raise CommandError(str(e))
+
+        def progress(result):
+            self.stdout.write(f"{result.rows} rows read, {result.created} created, {result.failed} failed")
+
+        with fh:
+            result = import_accounts(
+                fh, fmt, chunk_size=options['chunk_size'], workers=options['workers'] or os.cpu_count() or 1,
+                dry_run=options['dry_run'], check_passwords=not options['skip_password_validation'],
+                progress=progress,
+            )
+
+        for error in result.errors:
+            self.stdout.write(f"line {error['line']}: {error['error']}")
+        verb = "would create" if options['dry_run'] else "created"
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.rows} rows in {result.elapsed:.2f}s ({result.rows_per_second:.0f} rows/s): "
+            f"{verb} {result.created}, {result.failed} failed"
+        ))
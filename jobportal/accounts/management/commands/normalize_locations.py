@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from accounts import geo
+from accounts.models import Job, Profile
+
+
+class Command(BaseCommand):
+    help = "Resolve Job/Profile locations against the bundled gazetteer and store place, lat/lon and geohash"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for model in (Job, Profile):
+            matched = total = 0
+            last_id = 0
+            while True:
+                rows = list(model.objects.filter(id__gt=last_id).order_by('id').only('id', 'location')[:options['batch_size']])
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                for row in rows:
+                    geo.apply_location(row, row.location)
+                    matched += row.place is not None
+                # bulk_update skips save(), so the geo fields are written exactly as computed here
+                model.objects.bulk_update(rows, list(geo.GEO_FIELDS))
+                total += len(rows)
+            self.stdout.write(f"{model.__name__}: {matched}/{total} locations matched")
@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts import notifications
+from accounts.models import Notification
+
+
+class Command(BaseCommand):
+    help = ("Merge duplicate unread application notifications and delete read notifications "
+            "older than NOTIFICATION_RETENTION_DAYS in batches")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help="Override NOTIFICATION_RETENTION_DAYS")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per DELETE")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else settings.NOTIFICATION_RETENTION_DAYS
+        cutoff = timezone.now() - timedelta(days=days)
+
+        if options['dry_run']:
+            count = Notification.objects.filter(is_read=True, created_at__lt=cutoff).count()
+            self.stdout.write(f"{count} read notifications before {cutoff:%Y-%m-%d} would be deleted")
+            return
+
+        merged = notifications.compact_applications()
+        self.stdout.write(f"merged {merged} application notifications into their aggregates")
+
+        deleted = 0
+        for deleted in notifications.prune_read(cutoff, batch_size=options['batch_size']):
+            self.stdout.write(f"deleted {deleted} read notifications so far")
+        self.stdout.write(self.style.SUCCESS(
+            f"Removed {merged + deleted} notifications, {Notification.objects.count()} left"
+        ))
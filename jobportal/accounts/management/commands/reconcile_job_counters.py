@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from accounts.models import Job, JobApplication
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized application counters on Job and fix any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without writing")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        fields = ['applications_count', *Job.STATUS_COUNTERS.values()]
+        aggregates = {'applications_count': Count('id')}
+        for status, field in Job.STATUS_COUNTERS.items():
+            aggregates[field] = Count('id', filter=Q(status=status))
+
+        last_id = 0
+        checked = fixed = 0
+        while True:
+            with transaction.atomic():
+                jobs = Job.objects.filter(id__gt=last_id).order_by('id')
+                if not dry_run:
+                    # the row lock every counter update takes (application_status.lock_job), so no
+                    # apply or status change lands between the recount and the write
+                    jobs = jobs.select_for_update()
+                jobs = list(jobs.values('id', *fields)[:batch_size])
+                if not jobs:
+                    break
+                last_id = jobs[-1]['id']
+
+                # one grouped query per batch instead of a count per job and status
+                actual = {
+                    row['job']: row
+                    for row in JobApplication.objects.filter(job_id__in=[j['id'] for j in jobs])
+                    .values('job').annotate(**aggregates)
+                }
+
+                for job in jobs:
+                    row = actual.get(job['id'], {})
+                    expected = {field: row.get(field, 0) for field in fields}
+                    checked += 1
+                    drift = {field: (job[field], value) for field, value in expected.items() if job[field] != value}
+                    if not drift:
+                        continue
+                    fixed += 1
+                    changes = ", ".join(f"{field} {old} -> {new}" for field, (old, new) in drift.items())
+                    self.stdout.write(f"job {job['id']}: {changes}")
+                    if not dry_run:
+                        Job.objects.filter(pk=job['id']).update(updated_at=timezone.now(), **expected)
+
+        verb = "would fix" if dry_run else "fixed"
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} jobs, {verb} {fixed}"))
@@ -0,0 +1,43 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import profiling
+
+
+class Command(BaseCommand):
+    help = "List the saved request profiles (PROFILE_DIR), or dump one as speedscope JSON or collapsed stacks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('profile_id', nargs='?', help="Profile to dump, or 'latest'; lists them when omitted")
+        parser.add_argument('--format', choices=('speedscope', 'collapsed'), default='speedscope')
+        parser.add_argument('-o', '--output', help="Write to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        ids = profiling.list_profiles()
+        if not options['profile_id']:
+            for profile_id in ids:
+                data = profiling.load(profile_id)
+                size = os.path.getsize(os.path.join(profiling.profile_dir(), profile_id + profiling.SUFFIX))
+                samples = data['profiles'][0]['endValue']
+                self.stdout.write(f"{profile_id}  {samples:6d} samples  {size / 1024:7.1f} KiB  {data['name']}")
+            self.stdout.write(f"{len(ids)} profiles in {profiling.profile_dir()}")
+            return
+
+        profile_id = options['profile_id']
+        if profile_id == 'latest':
+            if not ids:
+                raise CommandError("No profiles saved yet")
+            profile_id = ids[-1]
+        elif profile_id not in ids:
+            raise CommandError(f"No profile {profile_id!r} in {profiling.profile_dir()}")
+
+        data = profiling.load(profile_id)
+        text = profiling.collapsed(data) if options['format'] == 'collapsed' else json.dumps(data)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(text)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {profile_id} to {options['output']}"))
+        else:
+            self.stdout.write(text, ending='')
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.authentication import revoke_tokens
+from accounts.models import Account
+
+
+class Command(BaseCommand):
+    help = "Log users out everywhere by invalidating every JWT issued to them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='+')
+
+    def handle(self, *args, **options):
+        users = list(Account.objects.filter(username__in=options['usernames']))
+        missing = set(options['usernames']) - {user.username for user in users}
+        if missing:
+            raise CommandError(f"Unknown users: {', '.join(sorted(missing))}")
+        for user in users:
+            revoke_tokens(user)
+            self.stdout.write(f"revoked tokens for {user.username}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Revoked tokens for {len(users)} users; other workers pick this up within JWT_USER_STATE_TTL seconds"
+        ))
@@ -0,0 +1,116 @@
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.models import (
+    JobApplication, JobApplicationStatusHistory, JobStatsDaily, JobStatsHourly, RollupWatermark,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold new applications and approvals into the hourly/daily job stats tables. "
+        "Only rows past the stored watermark are read, so it is cheap to run from cron every hour. "
+        "Rows younger than ROLLUP_SETTLE_SECONDS wait for the next run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--rebuild', action='store_true', help="Drop all rollups and start from scratch")
+        parser.add_argument('--settle-seconds', type=int, help="Override ROLLUP_SETTLE_SECONDS")
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            with transaction.atomic():
+                JobStatsHourly.objects.all().delete()
+                JobStatsDaily.objects.all().delete()
+                RollupWatermark.objects.filter(name__in=['applications', 'approvals']).delete()
+
+        settle = options['settle_seconds']
+        if settle is None:
+            settle = getattr(settings, 'ROLLUP_SETTLE_SECONDS', 300)
+        settled_before = timezone.now() - timedelta(seconds=settle)
+
+        applications = self.consume(
+            'applications',
+            JobApplication.objects.all(),
+            ['id', 'job_id', 'created_at'],
+            self.application_delta,
+            settled_before,
+            options['batch_size'],
+        )
+        approvals = self.consume(
+            'approvals',
+            JobApplicationStatusHistory.objects.filter(to_status='approved'),
+            ['id', 'job_id', 'created_at', 'application__created_at'],
+            self.approval_delta,
+            settled_before,
+            options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {applications} applications and {approvals} approvals"))
+
+    def consume(self, name, queryset, fields, to_delta, settled_before, batch_size):
+        total = 0
+        while True:
+            with transaction.atomic():
+                watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=name)
+                pending = queryset.filter(id__gt=watermark.last_id)
+                # stop below the first unsettled row, so rows still being committed around it are not skipped
+                unsettled = pending.filter(created_at__gte=settled_before).order_by('id').values_list('id', flat=True).first()
+                if unsettled is not None:
+                    pending = pending.filter(id__lt=unsettled)
+                rows = list(pending.order_by('id').values(*fields)[:batch_size])
+                if not rows:
+                    return total
+
+                hourly = defaultdict(lambda: [0, 0, 0])
+                for row in rows:
+                    hour = row['created_at'].astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+                    delta = to_delta(row)
+                    bucket = hourly[(row['job_id'], hour)]
+                    for i, value in enumerate(delta):
+                        bucket[i] += value
+
+                daily = defaultdict(lambda: [0, 0, 0])
+                for (job_id, hour), delta in hourly.items():
+                    bucket = daily[(job_id, hour.date())]
+                    for i, value in enumerate(delta):
+                        bucket[i] += value
+
+                self.merge(JobStatsHourly, 'hour', hourly)
+                self.merge(JobStatsDaily, 'day', daily)
+
+                watermark.last_id = rows[-1]['id']
+                watermark.save(update_fields=['last_id', 'updated_at'])
+                total += len(rows)
+
+    @staticmethod
+    def application_delta(row):
+        return (1, 0, 0)
+
+    @staticmethod
+    def approval_delta(row):
+        waited = row['created_at'] - row['application__created_at']
+        return (0, 1, max(int(waited.total_seconds()), 0))
+
+    @staticmethod
+    def merge(model, bucket_field, deltas):
+        """Add deltas onto existing rollup rows and bulk-insert the missing ones"""
+        missing = []
+        for (job_id, bucket), (applications, approvals, seconds) in deltas.items():
+            updated = model.objects.filter(job_id=job_id, **{bucket_field: bucket}).update(
+                applications=F('applications') + applications,
+                approvals=F('approvals') + approvals,
+                approve_seconds=F('approve_seconds') + seconds,
+            )
+            if not updated:
+                missing.append(model(
+                    job_id=job_id, applications=applications, approvals=approvals,
+                    approve_seconds=seconds, **{bucket_field: bucket},
+                ))
+        model.objects.bulk_create(missing)
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Exists, Max, OuterRef
+
+from accounts.models import Job, Notification, SavedSearch, SavedSearchMatch
+
+
+class Command(BaseCommand):
+    help = "Send one digest notification per saved search with unnotified job matches (run daily)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        sent = 0
+        while True:
+            with transaction.atomic():
+                # matches are kept when their job is archived; only live jobs go in a digest
+                pending = list(
+                    SavedSearchMatch.objects.filter(notified=False)
+                    .filter(Exists(Job.objects.filter(id=OuterRef('job_id'))))
+                    .values('search_id')
+                    .annotate(count=Count('id'), last_match=Max('id'))
+                    .order_by('search_id')[:options['batch_size']]
+                )
+                if not pending:
+                    break
+                search_ids = [row['search_id'] for row in pending]
+                searches = SavedSearch.objects.in_bulk(search_ids)
+                latest_jobs = dict(
+                    SavedSearchMatch.objects.filter(id__in=[row['last_match'] for row in pending])
+                    .values_list('search_id', 'job_id')
+                )
+
+                notes = []
+                for row in pending:
+                    search = searches[row['search_id']]
+                    label = search.name or search.role or "your saved search"
+                    noun = "job matches" if row['count'] == 1 else "jobs match"
+                    notes.append(Notification(
+                        recipient_id=search.user_id,
+                        verb=f"{row['count']} new {noun} '{label}'",
+                        job_id=latest_jobs.get(search.id),
+                    ))
+                Notification.objects.bulk_create(notes)
+                SavedSearchMatch.objects.filter(search_id__in=search_ids, notified=False).update(notified=True)
+                sent += len(notes)
+
+        # matches of archived jobs would otherwise stay pending forever
+        SavedSearchMatch.objects.filter(notified=False).exclude(
+            Exists(Job.objects.filter(id=OuterRef('job_id')))
+        ).update(notified=True)
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} digest notifications"))
@@ -0,0 +1,114 @@
+"""
+In-process load generation for the benchmark commands.
+
+Requests go straight into Django's WSGI handler, from a thread pool like a
+threaded WSGI server, or into its ASGI handler from one event loop like
+uvicorn. No server, sockets or HTTP client are needed. Each runner returns
+(elapsed seconds, [(status, latency seconds), ...]).
+"""
+import asyncio
+import importlib
+import io
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.test.utils import override_settings
+from django.urls import clear_url_caches
+
+
+def use_async_views(enabled):
+    """Re-import the URLconfs with settings.ASYNC_VIEWS switched"""
+    settings.ASYNC_VIEWS = enabled
+    import accounts.urls
+    importlib.reload(accounts.urls)
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+def unthrottled():
+    """Context manager: no throttle rates, so the token buckets let every request through"""
+    return override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}})
+
+
+def wsgi_requests(path, token, count, threads):
+    handler = WSGIHandler()
+    path, _, query = path.partition('?')
+
+    def one(_):
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'localhost', 'HTTP_AUTHORIZATION': f'Bearer {token}',
+            'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+        }
+        start = time.perf_counter()
+        status = []
+        body = handler(environ, lambda s, headers, exc_info=None: status.append(s))
+        b''.join(body)
+        body.close()
+        return int(status[0].split()[0]), time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(one, range(count)))
+    return time.perf_counter() - start, results
+
+
+def asgi_requests(path, token, count, concurrency):
+    return asyncio.run(_asgi_requests(ASGIHandler(), path, token, count, concurrency))
+
+
+async def _asgi_requests(app, path, token, count, concurrency):
+    path, _, query = path.partition('?')
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one():
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+            'root_path': '', 'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+            'headers': [(b'host', b'localhost'), (b'authorization', f'Bearer {token}'.encode())],
+        }
+        finished = asyncio.Event()
+        sent_request = False
+        status = []
+
+        async def receive():
+            nonlocal sent_request
+            if not sent_request:
+                sent_request = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            # Django listens for a disconnect while the view runs
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif not message.get('more_body'):
+                finished.set()
+
+        async with slots:
+            start = time.perf_counter()
+            await app(scope, receive, send)
+            finished.set()
+            return status[0], time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(count)))
+    return time.perf_counter() - start, results
+
+
+def summary(label, elapsed, results):
+    """One report line, plus the number of non-200 responses"""
+    errors = sum(1 for status, _ in results if status != 200)
+    latencies = sorted(seconds for _, seconds in results)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+    line = (f"{label:<24} {len(results) / elapsed:8.1f} req/s  "
+            f"p50 {statistics.median(latencies) * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms")
+    return line, errors
@@ -0,0 +1,253 @@
+"""
+Cold storage for old messages.
+
+``manage.py archive_messages`` moves every complete calendar month older than
+MESSAGE_ARCHIVE_DAYS out of the Message table into one segment file per
+month under MESSAGE_ARCHIVE_DIR. This keeps the hot table, and the thread
+index on it, bounded. (MySQL cannot partition Message by date, because
+InnoDB partitioned tables cannot have foreign keys.)
+
+Segment layout: rows sorted by (conversation pair, created_at, id), written
+as JSONL in blocks of MESSAGE_ARCHIVE_BLOCK_ROWS. Each block is compressed
+on its own, with zstd when the optional ``zstandard`` package is installed
+and zlib otherwise. MessageSegment.blocks is the sparse index, holding the
+first and last pair, offset and length of every block. ArchivedThread
+records which segments hold each conversation. Reading a thread's archived
+history therefore touches only that conversation's segments, and within each
+only the blocks whose pair range covers it.
+
+Archived messages are immutable. MessageView serves them through
+``?before=`` pages (older_messages), and the thread response links to the
+first such page.
+"""
+import json
+import os
+import zlib
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from . import fastpath
+from .models import Account, ArchivedThread, Message, MessageSegment
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+ROW_FIELDS = ('id', 'sender_id', 'recipient_id', 'content', 'created_at', 'is_read')
+
+
+def default_codec():
+    return 'zstd' if zstandard is not None else 'zlib'
+
+
+def compress(data, codec):
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=9).compress(data)
+    return zlib.compress(data, 6)
+
+
+def decompress(data, codec):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("This segment is zstd-compressed; install the zstandard package to read it")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def archive_dir():
+    return str(getattr(settings, 'MESSAGE_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'archive', 'messages')))
+
+
+def pair(a, b):
+    return (a, b) if a < b else (b, a)
+
+
+def archive_cutoff(now=None, days=None):
+    """Start of the month that holds the horizon; everything before it is archived"""
+    if days is None:
+        days = getattr(settings, 'MESSAGE_ARCHIVE_DAYS', 180)
+    horizon = timezone.localtime((now or timezone.now()) - timedelta(days=days))
+    return horizon.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(month):
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+def months_to_archive(cutoff):
+    """Months (first day, tz-aware) with live messages before ``cutoff``, oldest first"""
+    oldest = (
+        Message.objects.filter(created_at__lt=cutoff).order_by('created_at')
+        .values_list('created_at', flat=True).first()
+    )
+    if oldest is None:
+        return []
+    month = timezone.localtime(oldest).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    months = []
+    while month < cutoff:
+        months.append(month)
+        month = _next_month(month)
+    return months
+
+
+class SegmentWriter:
+    def __init__(self, fh, codec, block_rows):
+        self.fh = fh
+        self.codec = codec
+        self.block_rows = block_rows
+        self.offset = 0
+        self.blocks = []
+        self.threads = {}
+        self.count = 0
+        self._rows = []
+
+    def add(self, row):
+        key = pair(row['sender_id'], row['recipient_id'])
+        thread = self.threads.get(key)
+        if thread is None:
+            self.threads[key] = [1, row['created_at'], row['created_at']]
+        else:
+            thread[0] += 1
+            thread[2] = row['created_at']
+        self._rows.append((key, row))
+        self.count += 1
+        if len(self._rows) >= self.block_rows:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        lines = [
+            json.dumps({**row, 'created_at': row['created_at'].isoformat()}, ensure_ascii=False, separators=(',', ':'))
+            for _, row in self._rows
+        ]
+        data = compress('\n'.join(lines).encode('utf-8'), self.codec)
+        self.fh.write(data)
+        self.blocks.append([list(self._rows[0][0]), list(self._rows[-1][0]), self.offset, len(data)])
+        self.offset += len(data)
+        self._rows = []
+
+
+def archive_month(month, block_rows=None, batch_size=5000):
+    """Write one segment for ``month`` and delete its rows from Message; returns the segment or None"""
+    end = _next_month(month)
+    queryset = Message.objects.filter(created_at__gte=month, created_at__lt=end)
+    last_id = queryset.order_by('-id').values_list('id', flat=True).first()
+    if last_id is None:
+        return None
+    queryset = queryset.filter(id__lte=last_id)
+    codec = default_codec()
+    block_rows = block_rows or getattr(settings, 'MESSAGE_ARCHIVE_BLOCK_ROWS', 256)
+
+    directory = archive_dir()
+    os.makedirs(directory, exist_ok=True)
+    name = f"messages-{month:%Y-%m}-{last_id}.{codec}.seg"
+    path = os.path.join(directory, name)
+    with open(path + '.tmp', 'wb') as fh:
+        writer = SegmentWriter(fh, codec, block_rows)
+        rows = (
+            queryset.annotate(low=Least('sender_id', 'recipient_id'), high=Greatest('sender_id', 'recipient_id'))
+            .order_by('low', 'high', 'created_at', 'id').values(*ROW_FIELDS).iterator(chunk_size=batch_size)
+        )
+        for row in rows:
+            writer.add(row)
+        writer.flush()
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(path + '.tmp', path)
+
+    try:
+        with transaction.atomic():
+            segment = MessageSegment.objects.create(
+                month=date(month.year, month.month, 1), path=name, codec=codec,
+                message_count=writer.count, blocks=writer.blocks,
+            )
+            ArchivedThread.objects.bulk_create([
+                ArchivedThread(
+                    user_low_id=low, user_high_id=high, segment=segment,
+                    message_count=count, first_at=first_at, last_at=last_at,
+                )
+                for (low, high), (count, first_at, last_at) in writer.threads.items()
+            ], batch_size=1000)
+            # in the same transaction, so a thread is never served from both places
+            queryset.delete()
+    except BaseException:
+        os.remove(path)
+        raise
+    return segment
+
+
+@lru_cache(maxsize=256)
+def _read_block(path, codec, offset, length):
+    with open(os.path.join(archive_dir(), path), 'rb') as fh:
+        fh.seek(offset)
+        data = fh.read(length)
+    return tuple(json.loads(line) for line in decompress(data, codec).decode('utf-8').split('\n'))
+
+
+def segment_rows(segment, key):
+    """The archived rows of conversation ``key`` in ``segment``, oldest first"""
+    key = list(key)
+    for first, last, offset, length in segment.blocks:
+        if first <= key <= last:
+            for row in _read_block(segment.path, segment.codec, offset, length):
+                if pair(row['sender_id'], row['recipient_id']) == tuple(key):
+                    yield row
+
+
+def older_messages(user, other, before, limit):
+    """Up to ``limit`` messages of the thread older than ``before``, oldest first, shaped like
+    MessageSerializer output: the live table first, then the archive segments"""
+    live = list(
+        Message.objects.filter(
+            Q(sender=user, recipient=other) | Q(sender=other, recipient=user), created_at__lt=before,
+        ).order_by('-created_at', '-id').values(*fastpath.MESSAGE_COLUMNS)[:limit]
+    )
+    rows = live[::-1]
+    if len(rows) < limit:
+        rows = archived_messages(user, other, rows[0]['created_at'] if rows else before, limit - len(rows)) + rows
+    return fastpath.build_messages(rows)
+
+
+def archived_messages(user, other, before, limit):
+    low, high = pair(user.id, other.id)
+    # usernames and emails can change, so they are looked up rather than archived
+    users = {row[0]: row[1:] for row in Account.objects.filter(id__in=(low, high)).values_list('id', 'username', 'email')}
+    threads = (
+        ArchivedThread.objects.filter(user_low_id=low, user_high_id=high, first_at__lt=before)
+        .select_related('segment').order_by('-last_at')
+    )
+    out = []
+    for thread in threads:
+        older = [row for row in segment_rows(thread.segment, (low, high)) if _parse(row['created_at']) < before]
+        out = older[-(limit - len(out)):] + out
+        if len(out) >= limit:
+            break
+    return [{
+        'id': row['id'],
+        'sender_id': row['sender_id'],
+        'sender__username': users.get(row['sender_id'], (None, None))[0],
+        'sender__email': users.get(row['sender_id'], (None, None))[1],
+        'recipient_id': row['recipient_id'],
+        'recipient__username': users.get(row['recipient_id'], (None, None))[0],
+        'recipient__email': users.get(row['recipient_id'], (None, None))[1],
+        'content': row['content'],
+        'created_at': _parse(row['created_at']),
+        'is_read': row['is_read'],
+    } for row in out]
+
+
+def has_archive(user, other):
+    low, high = pair(user.id, other.id)
+    return ArchivedThread.objects.filter(user_low_id=low, user_high_id=high).exists()
+
+
+def _parse(value):
+    return datetime.fromisoformat(value)
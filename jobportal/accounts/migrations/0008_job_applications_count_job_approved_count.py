@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:21
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Job = apps.get_model('accounts', 'Job')
+    JobApplication = apps.get_model('accounts', 'JobApplication')
+
+    def counted(**filters):
+        rows = (
+            JobApplication.objects.filter(job=OuterRef('pk'), **filters)
+            .order_by().values('job').annotate(n=Count('pk')).values('n')
+        )
+        return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+    Job.objects.update(
+        applications_count=counted(),
+        approved_count=counted(approved=True),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_jobapplication_approved_jobapplication_approved_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='applications_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='approved_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:22
+
+from django.db import migrations, models
+
+
+def backfill_status(apps, schema_editor):
+    JobApplication = apps.get_model('accounts', 'JobApplication')
+    JobApplication.objects.filter(approved=True).update(status='approved')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_job_applications_count_job_approved_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobapplication',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('shortlisted', 'Shortlisted'), ('approved', 'Approved'), ('rejected', 'Rejected')], default='pending', max_length=20),
+        ),
+        migrations.RunPython(backfill_status, migrations.RunPython.noop),
+    ]
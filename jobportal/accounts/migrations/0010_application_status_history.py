@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_status_counters(apps, schema_editor):
+    Job = apps.get_model('accounts', 'Job')
+    JobApplication = apps.get_model('accounts', 'JobApplication')
+
+    def counted(status):
+        rows = (
+            JobApplication.objects.filter(job=OuterRef('pk'), status=status)
+            .order_by().values('job').annotate(n=Count('pk')).values('n')
+        )
+        return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+    Job.objects.update(
+        pending_count=counted('pending'),
+        shortlisted_count=counted('shortlisted'),
+        rejected_count=counted('rejected'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_jobapplication_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobApplicationStatusHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, choices=[('pending', 'Pending'), ('shortlisted', 'Shortlisted'), ('approved', 'Approved'), ('rejected', 'Rejected')], max_length=20, null=True)),
+                ('to_status', models.CharField(choices=[('pending', 'Pending'), ('shortlisted', 'Shortlisted'), ('approved', 'Approved'), ('rejected', 'Rejected')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='pending_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='rejected_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='shortlisted_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['job', 'status'], name='accounts_jo_job_id_eeaf16_idx'),
+        ),
+        migrations.AddField(
+            model_name='jobapplicationstatushistory',
+            name='application',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='accounts.jobapplication'),
+        ),
+        migrations.AddField(
+            model_name='jobapplicationstatushistory',
+            name='changed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='jobapplicationstatushistory',
+            name='job',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='accounts.job'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplicationstatushistory',
+            index=models.Index(fields=['job', 'created_at'], name='accounts_jo_job_id_d76dba_idx'),
+        ),
+        migrations.RunPython(backfill_status_counters, migrations.RunPython.noop),
+    ]
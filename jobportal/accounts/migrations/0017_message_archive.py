@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_account_token_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedThread',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message_count', models.PositiveIntegerField(default=0)),
+                ('first_at', models.DateTimeField()),
+                ('last_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MessageSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(db_index=True)),
+                ('path', models.CharField(max_length=255, unique=True)),
+                ('codec', models.CharField(max_length=10)),
+                ('message_count', models.PositiveIntegerField(default=0)),
+                ('blocks', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['sender', 'recipient', 'created_at'], name='accounts_me_sender__7bfdff_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedthread',
+            name='user_high',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedthread',
+            name='user_low',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivedthread',
+            name='segment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='threads', to='accounts.messagesegment'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedthread',
+            index=models.Index(fields=['user_low', 'user_high', 'last_at'], name='accounts_ar_user_lo_cf7f57_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='archivedthread',
+            unique_together={('user_low', 'user_high', 'segment')},
+        ),
+    ]
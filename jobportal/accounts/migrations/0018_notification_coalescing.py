@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:13
+
+from django.db import migrations, models
+
+
+def backfill_kind(apps, schema_editor):
+    # JobApplyView wrote "<username> applied for your job '<role>'"
+    Notification = apps.get_model('accounts', 'Notification')
+    Notification.objects.filter(
+        actor__isnull=False, job__isnull=False, verb__contains=" applied for your job '",
+    ).update(kind='application')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_message_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='actor_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='kind',
+            field=models.CharField(blank=True, choices=[('application', 'Application')], default='', max_length=20),
+        ),
+        migrations.RunPython(backfill_kind, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'created_at'], name='accounts_no_recipie_59193a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'job', 'kind', 'is_read'], name='accounts_no_recipie_ac662e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['is_read', 'created_at'], name='accounts_no_is_read_e9d68f_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_notification_coalescing'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobapplicationstatushistory',
+            name='application',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='status_history', to='accounts.jobapplication'),
+        ),
+        migrations.AlterField(
+            model_name='jobapplicationstatushistory',
+            name='job',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='status_history', to='accounts.job'),
+        ),
+        migrations.AlterField(
+            model_name='jobstatsdaily',
+            name='job',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='daily_stats', to='accounts.job'),
+        ),
+        migrations.AlterField(
+            model_name='jobstatshourly',
+            name='job',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='hourly_stats', to='accounts.job'),
+        ),
+        migrations.AlterField(
+            model_name='savedsearchmatch',
+            name='job',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='saved_search_matches', to='accounts.job'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:46
+
+from django.db import migrations, models
+
+from accounts.salaries import salary_amount
+
+
+def backfill_salary_amount(apps, schema_editor):
+    Job = apps.get_model('accounts', 'Job')
+    jobs = []
+    for job in Job.objects.exclude(salary=None).exclude(salary='').only('id', 'salary').iterator(chunk_size=2000):
+        job.salary_amount = salary_amount(job.salary)
+        jobs.append(job)
+        if len(jobs) == 2000:
+            Job.objects.bulk_update(jobs, ['salary_amount'])
+            jobs = []
+    Job.objects.bulk_update(jobs, ['salary_amount'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0019_keep_history_on_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='salary_amount',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(backfill_salary_amount, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db.models import JSONField
+from django.utils import timezone
+
+from . import geo, salaries
 
 class AccountManager(BaseUserManager):
     def create_user(self, username, email, password=None, role='user', company_name=None):
@@ -36,6 +39,10 @@ class Account(AbstractBaseUser, PermissionsMixin):
 
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
+    # embedded in issued JWTs as the "ver" claim; bumping it logs the user out everywhere
+    token_version = models.PositiveIntegerField(default=0)
+    # the job list ETag reads it, since the list renders posters' and applicants' accounts
+    updated_at = models.DateTimeField(auto_now=True)
 
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['email']
@@ -45,6 +52,14 @@ class Account(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.username
 
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # A user built from token claims (accounts/authentication.py) has most fields deferred.
+        # The first time one is touched, load all of them in one query rather than one per field.
+        if fields is not None and getattr(self, '_from_claims', False):
+            self._from_claims = False
+            fields = {*fields, *self.get_deferred_fields()}
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
 
 # --- Profile, Skill, Language models for profile editing and dropdowns ---
 class Skill(models.Model):
@@ -97,9 +112,26 @@ class Profile(models.Model):
     # Posted works for companies
     posted_works = JSONField(default=list, blank=True)
 
+    # Free-text location plus its gazetteer match (see accounts/geo.py)
+    location = models.CharField(max_length=255, null=True, blank=True)
+    place = models.CharField(max_length=100, null=True, blank=True, db_index=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True, db_index=True)
+
+    # bumped on every save; feeds the ETag of the profile endpoint
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
         return f"Profile for {self.user.username}"
 
+    def save(self, *args, **kwargs):
+        geo.apply_location(self, self.location)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'location' in update_fields:
+            kwargs['update_fields'] = {*update_fields, *geo.GEO_FIELDS}
+        super().save(*args, **kwargs)
+
 
 class ProfileSkill(models.Model):
     PROFICIENCY = (
@@ -148,20 +180,22 @@ from django.dispatch import receiver
 
 @receiver(post_save, sender=Account)
 def create_user_profile(sender, instance, created, **kwargs):
+    # The profile is only written when the account is created. Later Account saves
+    # (last_login, update_fields saves, admin edits) never touch the profile table.
     if created:
         Profile.objects.create(user=instance)
 
 
-@receiver(post_save, sender=Account)
-def save_user_profile(sender, instance, **kwargs):
-    try:
-        instance.profile.save()
-    except Exception:
-        # profile may not exist yet
-        pass
+# --- Job Posting Models ---
+class JobQuerySet(models.QuerySet):
+    def open(self):
+        # jobs still accepting applications; backed by the (deadline, created_at) index
+        return self.filter(deadline__gt=timezone.now())
+
+    def expired(self, before=None):
+        return self.filter(deadline__lte=before or timezone.now())
 
 
-# --- Job Posting Models ---
 class Job(models.Model):
     JOB_TYPE_CHOICES = (
         ('full_time', 'Full Time'),
@@ -178,29 +212,209 @@ class Job(models.Model):
     job_type = models.CharField(max_length=20, choices=JOB_TYPE_CHOICES)
     location = models.CharField(max_length=255)
     salary = models.CharField(max_length=255, null=True, blank=True)
+    # parsed from `salary` on save (see accounts/salaries.py), so the salary filter runs in SQL
+    salary_amount = models.PositiveIntegerField(null=True, blank=True, db_index=True)
     max_members = models.IntegerField(default=1)
     deadline = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Gazetteer match for `location` (see accounts/geo.py), filled on save
+    place = models.CharField(max_length=100, null=True, blank=True, db_index=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True, db_index=True)
+
+    # Denormalized counters, kept in sync with F() updates in the apply/approve views.
+    # Run `manage.py reconcile_job_counters` to repair any drift.
+    applications_count = models.PositiveIntegerField(default=0)
+    pending_count = models.PositiveIntegerField(default=0)
+    shortlisted_count = models.PositiveIntegerField(default=0)
+    approved_count = models.PositiveIntegerField(default=0)
+    rejected_count = models.PositiveIntegerField(default=0)
+
+    # application status -> counter column above
+    STATUS_COUNTERS = {
+        'pending': 'pending_count',
+        'shortlisted': 'shortlisted_count',
+        'approved': 'approved_count',
+        'rejected': 'rejected_count',
+    }
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deadline', 'created_at']),
+        ]
+
     def __str__(self):
         return f"{self.role} at {self.company_name}"
 
+    def save(self, *args, **kwargs):
+        geo.apply_location(self, self.location)
+        self.salary_amount = salaries.salary_amount(self.salary)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'location' in update_fields:
+            kwargs['update_fields'] = {*update_fields, *geo.GEO_FIELDS}
+        if update_fields is not None and 'salary' in update_fields:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'salary_amount'}
+        super().save(*args, **kwargs)
+
+    @property
+    def is_open(self):
+        return self.deadline > timezone.now()
+
 
 class JobApplication(models.Model):
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('shortlisted', 'Shortlisted'),
+        ('approved', 'Approved'),
+        ('rejected', 'Rejected'),
+    )
+
+    # allowed moves of the application state machine
+    TRANSITIONS = {
+        'pending': {'shortlisted', 'approved', 'rejected'},
+        'shortlisted': {'pending', 'approved', 'rejected'},
+        'approved': {'rejected'},
+        'rejected': {'pending', 'shortlisted'},
+    }
+
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='applications')
     applied_by = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='job_applications')
     created_at = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # kept in sync with status == 'approved' for existing clients
     approved = models.BooleanField(default=False)
     approved_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = ('job', 'applied_by')
+        indexes = [
+            models.Index(fields=['job', 'status']),
+        ]
+
+    @classmethod
+    def can_transition(cls, from_status, to_status):
+        return to_status in cls.TRANSITIONS.get(from_status, ())
 
     def __str__(self):
         return f"{self.applied_by.username} applied for {self.job.role}"
 
 
+class JobApplicationStatusHistory(models.Model):
+    # append-only audit trail; rows are only ever inserted (with bulk_create). They outlive
+    # withdrawn applications and archived jobs (ArchivedJob / ArchivedJobApplication keep the
+    # same ids), so the links are plain ids without a DB constraint or cascade.
+    application = models.ForeignKey(
+        JobApplication, on_delete=models.DO_NOTHING, db_constraint=False, related_name='status_history',
+    )
+    job = models.ForeignKey(Job, on_delete=models.DO_NOTHING, db_constraint=False, related_name='status_history')
+    from_status = models.CharField(max_length=20, choices=JobApplication.STATUS_CHOICES, null=True, blank=True)
+    to_status = models.CharField(max_length=20, choices=JobApplication.STATUS_CHOICES)
+    changed_by = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['job', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Application {self.application_id}: {self.from_status} -> {self.to_status}"
+
+
+# --- Saved searches / job alerts ---
+class SavedSearch(models.Model):
+    FREQUENCY_CHOICES = (
+        ('instant', 'Instant'),
+        ('daily', 'Daily digest'),
+    )
+
+    user = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='saved_searches')
+    name = models.CharField(max_length=255, blank=True, default='')
+    # same filters as JobSearchFilterView; blank means "any"
+    role = models.CharField(max_length=255, blank=True, default='')
+    location = models.CharField(max_length=255, blank=True, default='')
+    job_type = models.CharField(max_length=20, choices=Job.JOB_TYPE_CHOICES, blank=True, default='')
+    salary = models.CharField(max_length=20, blank=True, default='')
+    radius_km = models.FloatField(null=True, blank=True)
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default='daily')
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # resolved from `location` on save (see accounts/geo.py)
+    place = models.CharField(max_length=100, null=True, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True)
+
+    def save(self, *args, **kwargs):
+        geo.apply_location(self, self.location)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Saved search {self.name or self.pk} for {self.user_id}"
+
+
+class SavedSearchMatch(models.Model):
+    search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name='matches')
+    # kept when the job is archived, like the status history
+    job = models.ForeignKey(
+        Job, on_delete=models.DO_NOTHING, db_constraint=False, related_name='saved_search_matches',
+    )
+    notified = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('search', 'job')
+        indexes = [
+            models.Index(fields=['notified', 'search']),
+        ]
+
+    def __str__(self):
+        return f"Job {self.job_id} matched search {self.search_id}"
+
+
+# --- Archive of expired jobs ---
+# Rows keep their original primary keys; filled by `manage.py archive_expired_jobs`.
+class ArchivedJob(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    posted_by = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='archived_jobs')
+    company_name = models.CharField(max_length=255)
+    role = models.CharField(max_length=255)
+    description = models.TextField()
+    job_type = models.CharField(max_length=20, choices=Job.JOB_TYPE_CHOICES)
+    location = models.CharField(max_length=255)
+    salary = models.CharField(max_length=255, null=True, blank=True)
+    max_members = models.IntegerField(default=1)
+    deadline = models.DateTimeField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    applications_count = models.PositiveIntegerField(default=0)
+    approved_count = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.role} at {self.company_name} (archived)"
+
+
+class ArchivedJobApplication(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    job = models.ForeignKey(ArchivedJob, on_delete=models.CASCADE, related_name='applications')
+    applied_by = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='archived_job_applications')
+    created_at = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=JobApplication.STATUS_CHOICES, default='pending')
+    approved = models.BooleanField(default=False)
+    approved_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.applied_by_id} applied for archived job {self.job_id}"
+
+
 # --- Connection/Network Models ---
 class Connection(models.Model):
     from_user = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='connections_sent')
@@ -224,22 +438,118 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # a thread is two (sender, recipient) ranges already in created_at order
+            models.Index(fields=['sender', 'recipient', 'created_at']),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender.username} to {self.recipient.username}"
 
 
+# --- Cold message archive ---
+# Whole months of old messages live in compressed segment files (accounts/message_archive.py);
+# filled by `manage.py archive_messages`.
+class MessageSegment(models.Model):
+    month = models.DateField(db_index=True)
+    path = models.CharField(max_length=255, unique=True)
+    codec = models.CharField(max_length=10)
+    message_count = models.PositiveIntegerField(default=0)
+    # sparse index: one [first pair, last pair, offset, length] entry per compressed block
+    blocks = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.path
+
+
+class ArchivedThread(models.Model):
+    """The part of one conversation stored in one segment; user_low < user_high"""
+    user_low = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='+')
+    user_high = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='+')
+    segment = models.ForeignKey(MessageSegment, on_delete=models.CASCADE, related_name='threads')
+    message_count = models.PositiveIntegerField(default=0)
+    first_at = models.DateTimeField()
+    last_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user_low', 'user_high', 'segment')
+        indexes = [
+            models.Index(fields=['user_low', 'user_high', 'last_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_low_id}/{self.user_high_id} in {self.segment_id}"
+
+
 # --- Notifications ---
 class Notification(models.Model):
+    # kinds that accounts/notifications.py coalesces into one unread row per (recipient, job)
+    APPLICATION = 'application'
+    KIND_CHOICES = [(APPLICATION, 'Application')]
+
     recipient = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='notifications')
+    # for a coalesced row, the most recent actor
     actor = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='notifications_sent', null=True, blank=True)
     verb = models.CharField(max_length=255)
     job = models.ForeignKey(Job, on_delete=models.CASCADE, null=True, blank=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, blank=True, default='')
+    actor_count = models.PositiveIntegerField(default=1)
     is_read = models.BooleanField(default=False)
+    # bumped when a coalesced row absorbs another event, so it sorts with the newest
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', 'created_at']),
+            models.Index(fields=['recipient', 'job', 'kind', 'is_read']),
+            # retention sweep (prune_notifications)
+            models.Index(fields=['is_read', 'created_at']),
+        ]
 
     def __str__(self):
         return f"Notification to {self.recipient.username}: {self.verb}"
+
+
+# --- Analytics rollups ---
+# Filled incrementally by `manage.py rollup_job_stats`; never written by request handlers.
+# They survive `archive_expired_jobs` (job_id then names an ArchivedJob), so analytics keep
+# covering expired jobs.
+class JobStatsHourly(models.Model):
+    job = models.ForeignKey(Job, on_delete=models.DO_NOTHING, db_constraint=False, related_name='hourly_stats')
+    hour = models.DateTimeField()
+    applications = models.PositiveIntegerField(default=0)
+    approvals = models.PositiveIntegerField(default=0)
+    # sum of (approval time - application time) over the approvals, for averages
+    approve_seconds = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('job', 'hour')
+
+    def __str__(self):
+        return f"{self.job_id} @ {self.hour:%Y-%m-%d %H:00}"
+
+
+class JobStatsDaily(models.Model):
+    job = models.ForeignKey(Job, on_delete=models.DO_NOTHING, db_constraint=False, related_name='daily_stats')
+    day = models.DateField()
+    applications = models.PositiveIntegerField(default=0)
+    approvals = models.PositiveIntegerField(default=0)
+    approve_seconds = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('job', 'day')
+
+    def __str__(self):
+        return f"{self.job_id} @ {self.day}"
+
+
+class RollupWatermark(models.Model):
+    # highest source row id already folded into the rollup tables, per source
+    name = models.CharField(max_length=100, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_id}"
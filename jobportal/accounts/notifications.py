@@ -0,0 +1,100 @@
+"""
+Coalescing and retention for Notification.
+
+Applications to a job do not add one row per applicant. Each applicant is
+folded into the poster's unread ``application`` notification for that job,
+which becomes "<latest> and N others applied for your job '<role>'". The row is
+updated in place and moves back to the top of the list. Once the poster reads
+it, the next applicant starts a new row.
+
+``manage.py prune_notifications`` keeps the table bounded. It merges unread
+per-applicant rows left from before coalescing (or by a race) into one
+aggregate, and deletes read notifications older than
+NOTIFICATION_RETENTION_DAYS in batches.
+"""
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Job, Notification
+
+
+def application_verb(username, count, role):
+    if count <= 1:
+        return f"{username} applied for your job '{role}'"
+    others = count - 1
+    return f"{username} and {others} other{'s' if others > 1 else ''} applied for your job '{role}'"
+
+
+def notify_application(job, actor):
+    """
+    Record ``actor``'s application in the poster's unread notification for ``job``.
+
+    Call inside the transaction that inserted the application, after lock_job. The job
+    row lock is held until commit, so concurrent applicants to one job take turns here
+    and never create two aggregates.
+    """
+    if job.posted_by_id == actor.id:
+        return None
+    note = (
+        Notification.objects.select_for_update()
+        .filter(recipient_id=job.posted_by_id, job=job, kind=Notification.APPLICATION, is_read=False)
+        .order_by('-created_at').first()
+    )
+    if note is None:
+        return Notification.objects.create(
+            recipient_id=job.posted_by_id, actor=actor, job=job, kind=Notification.APPLICATION,
+            verb=application_verb(actor.username, 1, job.role),
+        )
+    note.actor = actor
+    note.actor_count += 1
+    note.verb = application_verb(actor.username, note.actor_count, job.role)
+    note.created_at = timezone.now()
+    note.save(update_fields=['actor', 'actor_count', 'verb', 'created_at'])
+    return note
+
+
+def compact_applications(batch_size=500):
+    """Merge each (recipient, job)'s unread application notifications into one; returns rows removed"""
+    removed = 0
+    while True:
+        groups = list(
+            Notification.objects.filter(kind=Notification.APPLICATION, is_read=False, job__isnull=False)
+            .values('recipient_id', 'job_id').annotate(rows=Count('id')).filter(rows__gt=1)
+            .order_by('job_id', 'recipient_id')[:batch_size]
+        )
+        if not groups:
+            return removed
+        for group in groups:
+            with transaction.atomic():
+                # same lock as JobApplyView, so no applicant is folded in while we merge
+                job = Job.objects.select_for_update().filter(id=group['job_id']).only('id', 'role').first()
+                if job is None:
+                    continue
+                notes = list(
+                    Notification.objects.filter(
+                        recipient_id=group['recipient_id'], job=job, kind=Notification.APPLICATION, is_read=False,
+                    ).select_related('actor').order_by('-created_at', '-id')
+                )
+                if len(notes) < 2:
+                    continue
+                keep = notes[0]
+                keep.actor_count = sum(note.actor_count for note in notes)
+                username = keep.actor.username if keep.actor else 'Someone'
+                keep.verb = application_verb(username, keep.actor_count, job.role)
+                keep.save(update_fields=['actor_count', 'verb'])
+                removed += Notification.objects.filter(id__in=[note.id for note in notes[1:]]).delete()[0]
+
+
+def prune_read(before, batch_size=1000):
+    """Delete read notifications created before ``before``, ``batch_size`` rows per DELETE; yields the running total"""
+    deleted = 0
+    while True:
+        ids = list(
+            Notification.objects.filter(is_read=True, created_at__lt=before)
+            .order_by('created_at').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        deleted += Notification.objects.filter(id__in=ids).delete()[0]
+        yield deleted
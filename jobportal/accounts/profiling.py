@@ -0,0 +1,221 @@
+"""
+Opt-in sampling profiler for production requests.
+
+ProfilingMiddleware samples the request thread's Python stack every
+PROFILE_INTERVAL_MS from a background thread. It does not trace the
+request, so the request runs at normal speed. A request is profiled when
+any of the following holds:
+
+- it sends ``X-Profile: <PROFILE_TOKEN>``;
+- it is picked at random, with probability PROFILE_SAMPLE_RATE;
+- it is still running after PROFILE_SLOW_MS. Sampling starts at the
+  threshold, so the profile shows where the slow part of the request went.
+
+Each profile is saved under PROFILE_DIR as a speedscope file. Its weights
+are sample counts, one sample per interval. The directory is a ring buffer:
+only the newest PROFILE_KEEP profiles are kept. ``manage.py
+request_profiles`` lists them and dumps one as speedscope JSON or as
+collapsed stacks, which speedscope, flamegraph.pl and similar tools accept.
+Responses to X-Profile requests carry the profile id in ``X-Profile-Id``.
+
+With every trigger off (the default), the middleware is not loaded. Under
+ASGI the async views await on the event loop. Their samples show the
+request thread waiting; the queries run on the database threads of
+accounts/db/threads.py, which are not sampled.
+"""
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .instrumentation import view_name
+
+SUFFIX = '.speedscope.json'
+_UNSAFE = re.compile(r'[^\w.-]+')
+# about 100 s at the default interval; a stuck request stops growing its profile here
+MAX_SAMPLES = 20000
+
+
+def profile_dir():
+    return str(getattr(settings, 'PROFILE_DIR', os.path.join(settings.BASE_DIR, 'var', 'profiling')))
+
+
+class Capture:
+    __slots__ = ('ident', 'start_at', 'stacks', 'samples')
+
+    def __init__(self, ident, start_at):
+        self.ident = ident
+        self.start_at = start_at
+        # stack (outermost frame first) -> samples
+        self.stacks = Counter()
+        self.samples = 0
+
+
+def _stack(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+class Sampler:
+    """One daemon thread per process; it sleeps while no request is being captured"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._captures = {}
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def add(self, capture):
+        with self._cond:
+            # a forked worker inherits the object but not the thread
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+                self._thread.start()
+            self._captures[id(capture)] = capture
+            self._cond.notify()
+
+    def remove(self, capture):
+        # waits for a sample in progress, so the request reads a finished Counter
+        with self._cond:
+            self._captures.pop(id(capture), None)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._captures:
+                    self._cond.wait()
+                now = time.perf_counter()
+                due = [c for c in self._captures.values() if now >= c.start_at and c.samples < MAX_SAMPLES]
+                if due:
+                    frames = sys._current_frames()
+                    for capture in due:
+                        frame = frames.get(capture.ident)
+                        if frame is not None:
+                            capture.stacks[_stack(frame)] += 1
+                            capture.samples += 1
+                    del frames, frame
+            time.sleep(self.interval)
+
+
+def speedscope(capture, name):
+    """The capture as a speedscope file with one sampled profile"""
+    frames = {}
+    samples = []
+    weights = []
+    for stack, count in capture.stacks.most_common():
+        samples.append([frames.setdefault(frame, len(frames)) for frame in stack])
+        weights.append(count)
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'jobportal accounts.profiling',
+        'activeProfileIndex': 0,
+        'shared': {'frames': [{'name': n, 'file': f, 'line': line} for n, f, line in frames]},
+        'profiles': [{
+            'type': 'sampled', 'name': name, 'unit': 'none',
+            'startValue': 0, 'endValue': capture.samples, 'samples': samples, 'weights': weights,
+        }],
+    }
+
+
+def collapsed(data):
+    """Collapsed stacks ("outer;inner count" per line) from a saved speedscope file"""
+    frames = data['shared']['frames']
+    profile = data['profiles'][0]
+    lines = Counter()
+    for stack, weight in zip(profile['samples'], profile['weights']):
+        # ';' separates frames in this format
+        lines[';'.join(frames[i]['name'].replace(';', ':') for i in stack)] += weight
+    return ''.join(f'{stack} {count}\n' for stack, count in lines.items())
+
+
+def save(capture, name, label):
+    """Write one profile into the ring buffer; returns its id"""
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    # ids sort in the order the profiles were taken
+    profile_id = f"{datetime.now():%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:6]}-{_UNSAFE.sub('_', label)}"
+    path = os.path.join(directory, profile_id + SUFFIX)
+    with open(path + '.tmp', 'w') as fh:
+        json.dump(speedscope(capture, name), fh, separators=(',', ':'))
+    os.replace(path + '.tmp', path)
+
+    keep = getattr(settings, 'PROFILE_KEEP', 50)
+    for old in list_profiles()[:-keep]:
+        try:
+            os.remove(os.path.join(directory, old + SUFFIX))
+        except FileNotFoundError:
+            # another worker trimmed it first
+            pass
+    return profile_id
+
+
+def list_profiles():
+    """Saved profile ids, oldest first"""
+    try:
+        names = os.listdir(profile_dir())
+    except FileNotFoundError:
+        return []
+    return sorted(name[:-len(SUFFIX)] for name in names if name.endswith(SUFFIX))
+
+
+def load(profile_id):
+    with open(os.path.join(profile_dir(), profile_id + SUFFIX)) as fh:
+        return json.load(fh)
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.token = getattr(settings, 'PROFILE_TOKEN', '')
+        self.rate = getattr(settings, 'PROFILE_SAMPLE_RATE', 0.0)
+        slow_ms = getattr(settings, 'PROFILE_SLOW_MS', 0)
+        self.slow = slow_ms / 1000 if slow_ms else None
+        if not (self.token or self.rate or self.slow):
+            raise MiddlewareNotUsed
+        self.sampler = Sampler(getattr(settings, 'PROFILE_INTERVAL_MS', 5) / 1000)
+        self.get_response = get_response
+
+    def trigger(self, request):
+        header = request.META.get('HTTP_X_PROFILE')
+        if self.token and header and hmac.compare_digest(header.encode(), self.token.encode()):
+            return 'header'
+        if self.rate and random.random() < self.rate:
+            return 'sampled'
+        return None
+
+    def __call__(self, request):
+        reason = self.trigger(request)
+        if reason is None and self.slow is None:
+            return self.get_response(request)
+        start = time.perf_counter()
+        capture = Capture(threading.get_ident(), start if reason else start + self.slow)
+        self.sampler.add(capture)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.sampler.remove(capture)
+        elapsed = time.perf_counter() - start
+        if reason is None and elapsed >= self.slow:
+            reason = 'slow'
+        if reason and capture.samples:
+            view = view_name(request)
+            name = f"{request.method} {request.path} ({view}) {elapsed * 1000:.0f} ms, {reason}"
+            profile_id = save(capture, name, f'{view}-{request.method}-{elapsed * 1000:.0f}ms')
+            if reason == 'header':
+                response['X-Profile-Id'] = profile_id
+        return response
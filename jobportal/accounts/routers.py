@@ -0,0 +1,159 @@
+"""
+Read-replica routing with read-your-writes stickiness.
+
+ReplicaRoutingMiddleware opens a routing state for each request.
+ReplicaRouter reads it:
+
+- GET/HEAD/OPTIONS requests read from one replica, chosen round-robin per
+  request so every query sees the same snapshot, unless the client wrote
+  within the last REPLICA_PIN_SECONDS. In that case they read from the
+  primary.
+- Other methods use the primary throughout.
+- Any write (``db_for_write``) also moves the rest of its request to the
+  primary and pins the client, so the next reads see what it just wrote,
+  whatever the view.
+- Code outside a request (management commands, shell) is not routed and
+  uses ``default``.
+
+The client is identified by the ``user_id`` claim of its bearer token, or by
+its IP when it has none. The token is decoded without verification because
+the result only chooses a database; authentication still happens in the view.
+Pins live in the default cache, so use a shared backend when running several
+workers.
+
+The middleware runs natively on both handlers, so under ASGI it does not
+push each request through a thread.
+
+Streamed bodies (``?stream=``) are produced after the middleware has returned
+and read from the primary.
+"""
+import base64
+import contextvars
+import itertools
+import json
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.settings import api_settings
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = contextvars.ContextVar('replica_routing', default=None)
+_cycle = None
+_cycle_lock = threading.Lock()
+
+
+class RoutingState:
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.wrote = False
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def next_replica():
+    global _cycle
+    with _cycle_lock:
+        if _cycle is None:
+            _cycle = itertools.cycle(replicas())
+        return next(_cycle)
+
+
+def client_key(request):
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if header.startswith('Bearer '):
+        try:
+            payload = header[7:].split('.')[1]
+            claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+            return f"user:{claims[api_settings.USER_ID_CLAIM]}"
+        except (IndexError, KeyError, TypeError, ValueError):
+            pass
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def _pin_key(key):
+    return f'replica-pin:{key}'
+
+
+def is_pinned(key):
+    until = cache.get(_pin_key(key))
+    return until is not None and until > time.time()
+
+
+def pin(key):
+    seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+    cache.set(_pin_key(key), time.time() + seconds, timeout=int(seconds) + 1)
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replicas():
+            return self.get_response(request)
+        key, state = self.route(request)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            pin(key)
+        return response
+
+    async def __acall__(self, request):
+        if not replicas():
+            return await self.get_response(request)
+        key, state = self.route(request)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote:
+            pin(key)
+        return response
+
+    def route(self, request):
+        key = client_key(request)
+        use_primary = request.method not in SAFE_METHODS or is_pinned(key)
+        return key, RoutingState(None if use_primary else next_replica())
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.replica is None:
+            return None
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            # read-your-writes: the rest of this request reads from the primary too
+            state.wrote = True
+            state.replica = None
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas get their schema through replication
+        return db == 'default'
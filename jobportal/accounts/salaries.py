@@ -0,0 +1,53 @@
+"""
+Salary parsing for the search filters and job alerts.
+
+Job.salary is free text ("50,000", "12 LPA", "40k"). Job.save() stores the
+parsed amount in Job.salary_amount, so the salary filter runs in SQL. The
+facet index and the saved-search matcher bucket the same amount.
+"""
+import re
+
+# (upper bound exclusive, bucket name); salaries are free text so they are bucketed heuristically
+SALARY_BUCKETS = (
+    (25000, 'under_25k'),
+    (50000, '25k_50k'),
+    (100000, '50k_100k'),
+    (float('inf'), '100k_plus'),
+)
+_SALARY_RE = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*(k|lpa|lakhs?|l)?', re.IGNORECASE)
+_MULTIPLIERS = {'k': 1000, 'l': 100000, 'lpa': 100000, 'lakh': 100000, 'lakhs': 100000}
+
+
+def salary_amount(salary):
+    """The amount in a free-text salary, or None when it has no number"""
+    match = _SALARY_RE.search(salary or '')
+    if not match:
+        return None
+    amount = float(match.group(1).replace(',', ''))
+    return int(amount * _MULTIPLIERS.get((match.group(2) or '').lower(), 1))
+
+
+def salary_bucket(salary):
+    """Map a free-text salary to a coarse bucket name"""
+    amount = salary_amount(salary)
+    if amount is None:
+        return 'unspecified'
+    for upper, name in SALARY_BUCKETS:
+        if amount < upper:
+            return name
+    return SALARY_BUCKETS[-1][1]
+
+
+def bucket_filter(name):
+    """Queryset filter kwargs on Job.salary_amount for a bucket name, or None if the name is unknown"""
+    if name == 'unspecified':
+        return {'salary_amount__isnull': True}
+    lower = 0
+    for upper, bucket in SALARY_BUCKETS:
+        if bucket == name:
+            bounds = {'salary_amount__gte': lower}
+            if upper != float('inf'):
+                bounds['salary_amount__lt'] = upper
+            return bounds
+        lower = upper
+    return None
@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from .instrumentation import TimedRepresentationMixin
 from .models import Account
 
-class RegisterSerializer(serializers.ModelSerializer):
+class RegisterSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     confirm_password = serializers.CharField(write_only=True)
 
@@ -29,6 +30,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token = super().get_token(user)
         token['username'] = user.username
         token['role'] = getattr(user, 'role', None)
+        # checked by ClaimsJWTAuthentication; bumped by revoke_tokens() to force a logout
+        token['ver'] = user.token_version
         return token
 
     def validate(self, attrs):
@@ -46,22 +49,128 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
 
 from .models import Skill, Language, Profile, ProfileSkill, ProfileLanguage, Job, JobApplication, Connection, Message, Notification
+from .models import ArchivedJob, SavedSearch
+from .salaries import SALARY_BUCKETS
+from . import geo
 from rest_framework import serializers
+from django.db.models import Exists, OuterRef, Prefetch
 
 
-class SkillSerializer(serializers.ModelSerializer):
+def _split_param(value):
+    if value is None:
+        return None
+    return {part.strip() for part in value.split(',') if part.strip()}
+
+
+class CollapsedField(serializers.Field):
+    """Stand-in for an unexpanded nested field: the related id, or a list of ids"""
+
+    def __init__(self, attr='pk', many=False, **kwargs):
+        kwargs['read_only'] = True
+        self.attr = attr
+        self.many = many
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if self.many:
+            return [getattr(item, self.attr) for item in value.all()]
+        return value
+
+
+class SparseFieldsetMixin:
+    """
+    Sparse fieldsets for read endpoints.
+
+    ``?fields=a,b`` limits the output to those top-level fields. ``?expand=x,y`` picks
+    which of ``Meta.expandable`` are rendered in full; the rest collapse to ids. With
+    neither parameter everything is rendered as before. Views should pass their
+    queryset through ``optimize_queryset`` so the same choice drives only() /
+    select_related / prefetch_related.
+    """
+
+    @classmethod
+    def sparse_plan(cls, context):
+        """(selected field names or None for all, names of expanded fields)"""
+        if 'fields' in context or 'expand' in context:
+            fields, expand = context.get('fields'), context.get('expand')
+        else:
+            request = context.get('request')
+            params = request.query_params if request is not None else {}
+            fields, expand = _split_param(params.get('fields')), _split_param(params.get('expand'))
+        expandable = set(cls.Meta.expandable)
+        if fields is None and expand is None:
+            return None, expandable
+        return fields, expandable & (expand or set())
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self._is_root():
+            return fields
+        selected, expanded = self.sparse_plan(self.context)
+        if selected is not None:
+            fields = {name: field for name, field in fields.items() if name in selected}
+        for name, spec in self.Meta.expandable.items():
+            if name in fields and name not in expanded:
+                source = spec['collapsed']
+                fields[name] = CollapsedField(
+                    attr=spec.get('attr', 'pk'), many=spec.get('many', False),
+                    **({'source': source} if source != name else {}),
+                )
+        return fields
+
+    @classmethod
+    def optimize_queryset(cls, queryset, context):
+        selected, expanded = cls.sparse_plan(context)
+        meta = cls.Meta
+        wanted = set(meta.fields) if selected is None else selected & set(meta.fields)
+        columns = getattr(meta, 'columns', {})
+        concrete = {f.name for f in meta.model._meta.concrete_fields}
+
+        # foreign key columns are cheap and keep related managers from lazy-loading them per row
+        only = {'id', *(f.name for f in meta.model._meta.concrete_fields if f.is_relation)}
+        full_row = selected is None
+        select_related, prefetch_related = [], []
+        for name in wanted:
+            spec = meta.expandable.get(name)
+            if spec is None:
+                only.update(columns.get(name, [name] if name in concrete else []))
+            elif name in expanded:
+                only.update(spec.get('only', []))
+                full_row = full_row or spec.get('full_row', False)
+                select_related += spec.get('select_related', [])
+                prefetch_related += spec.get('prefetch_related', [])
+            else:
+                only.update(spec.get('collapsed_only', []))
+                prefetch_related += spec.get('collapsed_prefetch', [])
+
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        if not full_row:
+            queryset = queryset.only(*only)
+        return queryset
+
+
+class SkillSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = Skill
         fields = ['id', 'name']
 
 
-class LanguageSerializer(serializers.ModelSerializer):
+class LanguageSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = Language
         fields = ['id', 'name']
 
 
-class ProfileSkillSerializer(serializers.ModelSerializer):
+class ProfileSkillSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     id = serializers.IntegerField(source='skill.id', read_only=True)
     name = serializers.CharField(source='skill.name', read_only=True)
 
@@ -70,7 +179,7 @@ class ProfileSkillSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'proficiency']
 
 
-class ProfileLanguageSerializer(serializers.ModelSerializer):
+class ProfileLanguageSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     id = serializers.IntegerField(source='language.id', read_only=True)
     name = serializers.CharField(source='language.name', read_only=True)
 
@@ -79,7 +188,7 @@ class ProfileLanguageSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'read', 'write', 'speak', 'proficiency']
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(TimedRepresentationMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     user = serializers.SerializerMethodField()
     skills = ProfileSkillSerializer(source='profileskill_set', many=True, read_only=True)
     languages = ProfileLanguageSerializer(source='profilelanguage_set', many=True, read_only=True)
@@ -92,8 +201,37 @@ class ProfileSerializer(serializers.ModelSerializer):
             'experience', 'it_details', 'resume', 'certifications', 'recruiting',
             'experience_enabled', 'urls_enabled', 'certifications_enabled', 'resume_enabled',
             'skills_enabled', 'languages_enabled', 'currently_enabled', 'job_preference_enabled', 'it_details_enabled',
-            'website_urls', 'posted_works', 'applications'
+            'website_urls', 'posted_works', 'location', 'place', 'latitude', 'longitude', 'applications'
         ]
+        read_only_fields = ['place', 'latitude', 'longitude']
+        expandable = {
+            'user': {
+                'collapsed': 'user_id',
+                'collapsed_only': ['user'],
+                'select_related': ['user'],
+                'only': ['user__id', 'user__username', 'user__email', 'user__role', 'user__company_name'],
+            },
+            'skills': {
+                'collapsed': 'profileskill_set', 'many': True, 'attr': 'skill_id',
+                'collapsed_prefetch': ['profileskill_set'],
+                'prefetch_related': ['profileskill_set__skill'],
+            },
+            'languages': {
+                'collapsed': 'profilelanguage_set', 'many': True, 'attr': 'language_id',
+                'collapsed_prefetch': ['profilelanguage_set'],
+                'prefetch_related': ['profilelanguage_set__language'],
+            },
+            'applications': {
+                'collapsed': 'user.job_applications', 'many': True,
+                'collapsed_only': ['user'],
+                'collapsed_prefetch': ['user__job_applications'],
+                'only': ['user'],
+                'prefetch_related': [
+                    'user__job_applications__job__posted_by',
+                    'user__job_applications__applied_by__profile',
+                ],
+            },
+        }
 
     def get_user(self, obj):
         return {
@@ -105,24 +243,44 @@ class ProfileSerializer(serializers.ModelSerializer):
         }
 
     def get_applications(self, obj):
-        # Get all job applications for this user
-        applications = JobApplication.objects.filter(applied_by=obj.user)
+        # Get all job applications for this user (prefetched by optimize_queryset)
+        applications = obj.user.job_applications.all()
         return JobApplicationSerializer(applications, many=True).data
 
 
-class JobApplicationSerializer(serializers.ModelSerializer):
+class JobApplicationSerializer(TimedRepresentationMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     applied_by = serializers.SerializerMethodField()
     job = serializers.SerializerMethodField()
+    status = serializers.CharField(read_only=True)
     approved = serializers.BooleanField(read_only=True)
     approved_at = serializers.DateTimeField(read_only=True)
 
     class Meta:
         model = JobApplication
-        fields = ['id', 'job', 'applied_by', 'created_at', 'approved', 'approved_at']
+        fields = ['id', 'job', 'applied_by', 'created_at', 'status', 'approved', 'approved_at']
+        expandable = {
+            'job': {
+                'collapsed': 'job_id',
+                'collapsed_only': ['job'],
+                'select_related': ['job__posted_by'],
+                'full_row': True,
+            },
+            'applied_by': {
+                'collapsed': 'applied_by_id',
+                'collapsed_only': ['applied_by'],
+                'select_related': ['applied_by__profile'],
+                'only': [
+                    'applied_by__id', 'applied_by__username', 'applied_by__email',
+                    'applied_by__profile__profile_picture', 'applied_by__profile__description',
+                    'applied_by__profile__currently', 'applied_by__profile__experience',
+                ],
+            },
+        }
 
     def get_applied_by(self, obj):
         user = obj.applied_by
-        profile = Profile.objects.filter(user=user).first()
+        # reverse one-to-one; None when the profile row is missing
+        profile = getattr(user, 'profile', None)
         return {
             'id': user.id,
             'username': user.username,
@@ -153,12 +311,12 @@ class JobApplicationSerializer(serializers.ModelSerializer):
             'max_members': job.max_members,
             'deadline': job.deadline,
             'created_at': job.created_at,
-            'applications_count': job.applications.count(),
+            'applications_count': job.applications_count,
             'has_applied': True,
         }
 
 
-class JobSerializer(serializers.ModelSerializer):
+class JobSerializer(TimedRepresentationMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     posted_by = serializers.SerializerMethodField()
     applications = JobApplicationSerializer(many=True, read_only=True)
     applications_count = serializers.SerializerMethodField()
@@ -168,9 +326,39 @@ class JobSerializer(serializers.ModelSerializer):
         model = Job
         fields = [
             'id', 'posted_by', 'company_name', 'role', 'description', 'job_type',
-            'location', 'salary', 'max_members', 'deadline', 'created_at',
+            'location', 'place', 'latitude', 'longitude', 'salary', 'max_members', 'deadline', 'created_at',
             'applications', 'applications_count', 'has_applied'
         ]
+        read_only_fields = ['place', 'latitude', 'longitude']
+        expandable = {
+            'posted_by': {
+                'collapsed': 'posted_by_id',
+                'collapsed_only': ['posted_by'],
+                'select_related': ['posted_by'],
+                'only': ['posted_by__id', 'posted_by__username', 'posted_by__email', 'posted_by__company_name'],
+            },
+            'applications': {
+                'collapsed': 'applications', 'many': True,
+                'collapsed_prefetch': [Prefetch('applications', queryset=JobApplication.objects.only('id', 'job_id'))],
+                'prefetch_related': ['applications__applied_by__profile'],
+                # the nested applications render their job in full
+                'full_row': True,
+                'select_related': ['posted_by'],
+            },
+        }
+        columns = {'has_applied': []}
+
+    @classmethod
+    def optimize_queryset(cls, queryset, context):
+        queryset = super().optimize_queryset(queryset, context)
+        selected, _ = cls.sparse_plan(context)
+        request = context.get('request')
+        if (selected is None or 'has_applied' in selected) and request and request.user.is_authenticated:
+            # one EXISTS subquery instead of a query per job
+            queryset = queryset.annotate(has_applied_annotation=Exists(
+                JobApplication.objects.filter(job=OuterRef('pk'), applied_by=request.user)
+            ))
+        return queryset
 
     def get_posted_by(self, obj):
         return {
@@ -181,25 +369,89 @@ class JobSerializer(serializers.ModelSerializer):
         }
 
     def get_applications_count(self, obj):
-        return obj.applications.count()
+        return obj.applications_count
 
     def get_has_applied(self, obj):
+        if hasattr(obj, 'has_applied_annotation'):
+            return obj.has_applied_annotation
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.applications.filter(applied_by=request.user).exists()
         return False
 
 
-class ConnectionSerializer(serializers.ModelSerializer):
+class ArchivedJobSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    posted_by = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedJob
+        fields = [
+            'id', 'posted_by', 'company_name', 'role', 'description', 'job_type',
+            'location', 'salary', 'max_members', 'deadline', 'created_at',
+            'applications_count', 'approved_count', 'archived_at'
+        ]
+
+    def get_posted_by(self, obj):
+        return {
+            'id': obj.posted_by.id,
+            'username': obj.posted_by.username,
+            'email': obj.posted_by.email,
+            'company_name': obj.posted_by.company_name,
+        }
+
+
+class SavedSearchSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    class Meta:
+        model = SavedSearch
+        fields = [
+            'id', 'name', 'role', 'location', 'job_type', 'salary', 'radius_km',
+            'frequency', 'is_active', 'place', 'created_at'
+        ]
+        read_only_fields = ['place', 'created_at']
+
+    def validate_salary(self, value):
+        buckets = [name for _, name in SALARY_BUCKETS] + ['unspecified']
+        if value and value not in buckets:
+            raise serializers.ValidationError(f"Must be one of {', '.join(buckets)}")
+        return value
+
+    def validate(self, data):
+        location = data.get('location', getattr(self.instance, 'location', ''))
+        if data.get('radius_km') and not geo.normalize_location(location):
+            raise serializers.ValidationError("radius_km needs a location we can place on the map")
+        return data
+
+
+class ConnectionSerializer(TimedRepresentationMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     from_user = serializers.SerializerMethodField()
     to_user = serializers.SerializerMethodField()
 
     class Meta:
         model = Connection
         fields = ['id', 'from_user', 'to_user', 'created_at']
+        expandable = {
+            'from_user': {
+                'collapsed': 'from_user_id',
+                'collapsed_only': ['from_user'],
+                'select_related': ['from_user__profile'],
+                'only': [
+                    'from_user__id', 'from_user__username', 'from_user__email',
+                    'from_user__profile__profile_picture', 'from_user__profile__description',
+                ],
+            },
+            'to_user': {
+                'collapsed': 'to_user_id',
+                'collapsed_only': ['to_user'],
+                'select_related': ['to_user__profile'],
+                'only': [
+                    'to_user__id', 'to_user__username', 'to_user__email',
+                    'to_user__profile__profile_picture', 'to_user__profile__description',
+                ],
+            },
+        }
 
     def get_from_user(self, obj):
-        profile = Profile.objects.filter(user=obj.from_user).first()
+        profile = getattr(obj.from_user, 'profile', None)
         return {
             'id': obj.from_user.id,
             'username': obj.from_user.username,
@@ -209,7 +461,7 @@ class ConnectionSerializer(serializers.ModelSerializer):
         }
 
     def get_to_user(self, obj):
-        profile = Profile.objects.filter(user=obj.to_user).first()
+        profile = getattr(obj.to_user, 'profile', None)
         return {
             'id': obj.to_user.id,
             'username': obj.to_user.username,
@@ -219,7 +471,7 @@ class ConnectionSerializer(serializers.ModelSerializer):
         }
 
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     sender = serializers.SerializerMethodField()
     recipient = serializers.SerializerMethodField()
 
@@ -242,14 +494,14 @@ class MessageSerializer(serializers.ModelSerializer):
         }
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     actor = serializers.SerializerMethodField()
     recipient = serializers.SerializerMethodField()
     job = serializers.SerializerMethodField()
 
     class Meta:
         model = Notification
-        fields = ['id', 'actor', 'recipient', 'verb', 'job', 'is_read', 'created_at']
+        fields = ['id', 'actor', 'actor_count', 'recipient', 'verb', 'job', 'is_read', 'created_at']
 
     def get_actor(self, obj):
         if not obj.actor:
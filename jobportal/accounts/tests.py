@@ -1,3 +1,1055 @@
-from django.test import TestCase
+import asyncio
+import json
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.contrib.auth import hashers
+from django.contrib.auth.models import update_last_login
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import urlencode
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import alerts, bulk_import, fastpath, instrumentation, message_archive, notifications, routers
+from .async_views import AsyncJobDetailView, AsyncMessageView, AsyncNotificationsView, AsyncSkillListView
+from .authentication import ClaimsJWTAuthentication, revoke_tokens, user_state
+from .conditional import job_list_etag
+from .db.pool import ConnectionPool, PoolTimeout
+from .facets import FacetIndex
+from .throttling import get_store
+from .serializers import CustomTokenObtainPairSerializer, JobSerializer
+from .models import (
+    Account, ArchivedJob, Job, JobApplication, JobApplicationStatusHistory, JobStatsDaily, JobStatsHourly,
+    Message, Notification, Profile, RollupWatermark, SavedSearch, SavedSearchMatch, Skill,
+)
+
+
+def make_job(poster, **fields):
+    fields = {
+        'company_name': 'Co', 'role': 'Backend', 'description': 'd', 'job_type': 'full_time',
+        'location': 'Bangalore', 'max_members': 5, 'deadline': timezone.now() + timedelta(days=3), **fields,
+    }
+    return Job.objects.create(posted_by=poster, **fields)
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AccountImportTests(TestCase):
+    path = '/api/accounts/accounts/import/'
+    csv = (
+        'username,email,password,role,company_name,location\n'
+        'ann,ann@x.com,Str0ng-pass!9,user,,Pune\n'
+        'bad,not-an-email,,user,,\n'
+        'boss,boss@x.com,,admin,,\n'
+        'ann,ann2@x.com,,user,,\n'
+        'taken,t2@x.com,,user,,\n'
+        'acme,hr@acme.com,,company,Acme,\n'
+    )
+
+    def setUp(self):
+        Account.objects.create_user('taken', 'taken@x.com', 'pw12345!')
+        self.staff = Account.objects.create_superuser('root', 'root@x.com', 'pw12345!')
+
+    def upload(self, content, **params):
+        file = SimpleUploadedFile('accounts.csv', content.encode(), content_type='text/csv')
+        return client_for(self.staff).post(f'{self.path}?{urlencode(params)}', {'file': file}, format='multipart')
+
+    def test_counts_created_rows_and_reports_errors_by_line(self):
+        response = self.upload(self.csv)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['rows'], response.data['created'], response.data['failed']), (6, 2, 4))
+        self.assertEqual([error['line'] for error in response.data['errors']], [3, 4, 5, 6])
+        self.assertEqual(response.data['errors'][0]['error'], 'invalid email')
+        self.assertIn('role must be one of', response.data['errors'][1]['error'])
+        self.assertEqual(response.data['errors'][2]['error'], 'duplicate username in file')
+        self.assertEqual(response.data['errors'][3]['error'], 'username already exists')
+
+        ann = Account.objects.get(username='ann')
+        self.assertTrue(ann.check_password('Str0ng-pass!9'))
+        self.assertEqual(ann.profile.location, 'Pune')
+        acme = Account.objects.get(username='acme')
+        self.assertEqual((acme.role, acme.company_name), ('company', 'Acme'))
+        self.assertFalse(acme.has_usable_password())
+
+    def test_dry_run_and_a_second_upload_create_nothing(self):
+        response = self.upload(self.csv, dry_run=1)
+        self.assertEqual((response.status_code, response.data['created']), (200, 2))
+        self.assertFalse(Account.objects.filter(username__in=['ann', 'acme']).exists())
+
+        self.upload(self.csv)
+        response = self.upload(self.csv)
+        self.assertEqual((response.status_code, response.data['created'], response.data['failed']), (200, 0, 6))
+        self.assertEqual(Account.objects.filter(username='ann').count(), 1)
+
+    def test_the_api_hashes_in_process_and_caps_the_file(self):
+        with override_settings(ACCOUNT_IMPORT_API_MAX_ROWS=5):
+            response = self.upload(self.csv)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Account.objects.filter(username='ann').exists())
+        with mock.patch.object(bulk_import, 'ProcessPoolExecutor') as pool:
+            self.assertEqual(self.upload(self.csv).status_code, 201)
+        pool.assert_not_called()
+
+    def test_staff_only(self):
+        user = Account.objects.create_user('u', 'u@x.com', 'pw12345!')
+        file = SimpleUploadedFile('accounts.csv', self.csv.encode())
+        self.assertEqual(client_for(user).post(self.path, {'file': file}, format='multipart').status_code, 403)
+
+
+@override_settings(JWT_USER_STATE_TTL=30)
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        user_state.clear()
+        self.user = Account.objects.create_user('alice', 'a@x.com', 'pw12345!', role='company', company_name='Co')
+        self.token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+
+    def authenticate(self):
+        request = RequestFactory().get('/x', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+
+    def after_ttl(self):
+        return mock.patch('accounts.authentication.time.monotonic', return_value=time.monotonic() + 31)
+
+    def test_no_queries_once_the_user_state_is_cached(self):
+        with self.assertNumQueries(1):
+            self.authenticate()
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+            self.assertEqual((user.id, user.username, user.role), (self.user.id, 'alice', 'company'))
+
+    def test_bumped_token_version_is_rejected_after_the_ttl(self):
+        self.authenticate()
+        # as another worker would: the database changes, this process's cache does not
+        Account.objects.filter(pk=self.user.pk).update(token_version=F('token_version') + 1)
+        self.assertEqual(self.authenticate().id, self.user.id)
+        with self.after_ttl(), self.assertRaises(AuthenticationFailed) as raised:
+            self.authenticate()
+        self.assertEqual(raised.exception.get_codes(), 'token_revoked')
+
+    def test_deactivated_user_is_rejected_after_the_ttl(self):
+        self.authenticate()
+        Account.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.authenticate().id, self.user.id)
+        with self.after_ttl(), self.assertRaises(AuthenticationFailed) as raised:
+            self.authenticate()
+        self.assertEqual(raised.exception.get_codes(), 'user_inactive')
+
+    def test_revoke_tokens_applies_at_once_in_this_process(self):
+        self.authenticate()
+        revoke_tokens(self.user)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+
+class PasswordHasherProfileTests(TestCase):
+    def test_default_profile_hashes_like_djangos_default(self):
+        baseline = hashers.PBKDF2PasswordHasher()
+        encoded = baseline.encode('correct horse', baseline.salt())
+        self.assertEqual(settings.PASSWORD_HASHER_PROFILE, 'pbkdf2')
+        hasher = hashers.get_hasher()
+        self.assertEqual((hasher.algorithm, hasher.iterations), (baseline.algorithm, baseline.iterations))
+        # existing hashes verify and are not rehashed on login
+        self.assertFalse(hasher.must_update(encoded))
+        self.assertTrue(hashers.check_password('correct horse', encoded))
+
+
+class AccountSaveTests(TestCase):
+    def setUp(self):
+        self.user = Account.objects.create_user('alice', 'a@x.com', 'pw12345!')
+
+    def assertNoProfileQueries(self, queries):
+        touched = [q['sql'] for q in queries.captured_queries if 'accounts_profile' in q['sql']]
+        self.assertEqual(touched, [])
+
+    def test_create_user_creates_one_profile(self):
+        self.assertEqual(Profile.objects.filter(user=self.user).count(), 1)
+
+    def test_login_and_refresh_do_not_touch_profile(self):
+        client = APIClient()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post('/api/accounts/login/', {'username': 'alice', 'password': 'pw12345!'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertNoProfileQueries(queries)
+
+        with CaptureQueriesContext(connection) as queries:
+            refreshed = client.post('/api/accounts/token/refresh/', {'refresh': response.data['refresh']}, format='json')
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertNoProfileQueries(queries)
+
+    def test_account_edits_do_not_touch_profile(self):
+        with self.assertNumQueries(1):
+            update_last_login(None, self.user)
+        self.user.first_name = 'Alice'
+        self.user.email = 'alice@x.com'
+        with CaptureQueriesContext(connection) as queries:
+            self.user.save()
+        self.assertEqual(len(queries), 1)
+        self.assertNoProfileQueries(queries)
+
+
+class ConcurrentApplyTests(TransactionTestCase):
+    def setUp(self):
+        connection = connections['default']
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest("needs a database shared between threads (set DB_TEST_NAME for SQLite)")
+
+    def test_counters_match_rows_after_concurrent_applies(self):
+        company = Account.objects.create_user('co', 'co@x.com', 'pw12345!', role='company', company_name='Co')
+        job = make_job(company)
+        applicants = [Account.objects.create_user(f'u{i}', f'u{i}@x.com', 'pw12345!') for i in range(12)]
+
+        def apply(user):
+            try:
+                # each applicant applies twice, like a double click
+                return [client_for(user).post(f'/api/accounts/jobs/{job.id}/apply/').status_code for _ in range(2)]
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            statuses = list(pool.map(apply, applicants))
+
+        self.assertEqual(statuses, [[201, 200]] * len(applicants))
+        job.refresh_from_db()
+        rows = JobApplication.objects.filter(job=job)
+        self.assertEqual(job.applications_count, rows.count())
+        self.assertEqual(job.pending_count, rows.filter(status='pending').count())
+        self.assertEqual(job.applications_count, len(applicants))
+
+    def test_response_counts_the_new_application_without_rereading_the_job(self):
+        company = Account.objects.create_user('co', 'co@x.com', 'pw12345!', role='company', company_name='Co')
+        job = make_job(company)
+        applicants = [Account.objects.create_user(f'u{i}', f'u{i}@x.com', 'pw12345!') for i in range(2)]
+        with mock.patch.object(Job, 'refresh_from_db') as refresh:
+            counts = [
+                client_for(user).post(f'/api/accounts/jobs/{job.id}/apply/').data['job']['applications_count']
+                for user in applicants
+            ]
+        refresh.assert_not_called()
+        self.assertEqual(counts, [1, 2])
+
+
+class ApplicantStatusTests(TestCase):
+    def setUp(self):
+        self.company = Account.objects.create_user('co', 'co@x.com', 'pw12345!', role='company', company_name='Co')
+        self.job = make_job(self.company)
+        self.applicants = [Account.objects.create_user(f'u{i}', f'u{i}@x.com', 'pw12345!') for i in range(2)]
+        for user in self.applicants:
+            client_for(user).post(f'/api/accounts/jobs/{self.job.id}/apply/')
+        self.apps = list(JobApplication.objects.filter(job=self.job).order_by('id'))
+
+    def bulk(self, client, job, status, ids):
+        return client.post(f'/api/accounts/jobs/{job.id}/applicants/bulk/', {'status': status, 'ids': ids}, format='json')
+
+    def test_bulk_change_leaves_foreign_applicants_alone(self):
+        rival = Account.objects.create_user('co2', 'co2@x.com', 'pw12345!', role='company', company_name='Co2')
+        rival_job = make_job(rival)
+        client_for(self.applicants[0]).post(f'/api/accounts/jobs/{rival_job.id}/apply/')
+        foreign = JobApplication.objects.get(job=rival_job)
+
+        # another company's job
+        response = self.bulk(client_for(rival), self.job, 'reject', [app.id for app in self.apps])
+        self.assertEqual(response.status_code, 403)
+        # an application of another job, listed against this one
+        response = self.bulk(client_for(self.company), self.job, 'reject', [self.apps[0].id, foreign.id])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(
+            response.data['results'],
+            [{'id': self.apps[0].id, 'result': 'updated'}, {'id': foreign.id, 'result': 'not_found'}],
+        )
+        self.assertEqual(JobApplication.objects.get(id=foreign.id).status, 'pending')
+        self.assertEqual(set(JobApplication.objects.filter(job=self.job).values_list('status', flat=True)),
+                         {'rejected', 'pending'})
+
+    def test_illegal_transitions_are_refused(self):
+        client = client_for(self.company)
+        self.bulk(client, self.job, 'approve', [self.apps[0].id])
+        self.bulk(client, self.job, 'reject', [self.apps[1].id])
+
+        # rejected -> approved is not a move of the state machine
+        response = client.post(f'/api/accounts/jobs/{self.job.id}/applicants/{self.apps[1].id}/approve/')
+        self.assertEqual(response.status_code, 400)
+        response = self.bulk(client, self.job, 'shortlist', [self.apps[0].id])
+        self.assertEqual(response.data['results'], [{'id': self.apps[0].id, 'result': 'invalid_transition'}])
+        self.assertEqual(JobApplication.objects.get(id=self.apps[0].id).status, 'approved')
+        self.assertEqual(JobApplication.objects.get(id=self.apps[1].id).status, 'rejected')
+
+    def test_history_rows_are_written(self):
+        client = client_for(self.company)
+        self.bulk(client, self.job, 'shortlist', [self.apps[0].id])
+        client.post(f'/api/accounts/jobs/{self.job.id}/applicants/{self.apps[0].id}/approve/')
+        history = JobApplicationStatusHistory.objects.filter(application_id=self.apps[0].id).order_by('id')
+        self.assertEqual(
+            [(row.from_status, row.to_status, row.changed_by_id, row.job_id) for row in history],
+            [
+                (None, 'pending', self.applicants[0].id, self.job.id),
+                ('pending', 'shortlisted', self.company.id, self.job.id),
+                ('shortlisted', 'approved', self.company.id, self.job.id),
+            ],
+        )
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.pending_count, self.job.approved_count), (1, 1))
+
+
+class NotificationCoalescingTests(TestCase):
+    def setUp(self):
+        self.company = Account.objects.create_user('co', 'co@x.com', 'pw12345!', role='company', company_name='Co')
+        self.job = make_job(self.company, role='Backend')
+        self.users = [Account.objects.create_user(f'u{i}', f'u{i}@x.com', 'pw12345!') for i in range(4)]
+
+    def apply(self, user):
+        self.assertEqual(client_for(user).post(f'/api/accounts/jobs/{self.job.id}/apply/').status_code, 201)
+
+    def inbox(self):
+        return Notification.objects.filter(recipient=self.company).order_by('created_at', 'id')
+
+    def test_applicants_fold_into_the_unread_notification(self):
+        for user in self.users[:3]:
+            self.apply(user)
+        [note] = self.inbox()
+        self.assertEqual((note.actor_id, note.actor_count), (self.users[2].id, 3))
+        self.assertEqual(note.verb, "u2 and 2 others applied for your job 'Backend'")
+
+        # once read, the next applicant starts a new notification
+        Notification.objects.filter(id=note.id).update(is_read=True)
+        self.apply(self.users[3])
+        self.assertEqual([(n.is_read, n.actor_count) for n in self.inbox()], [(True, 3), (False, 1)])
+
+    def test_prune_keeps_unread_and_recent_notifications(self):
+        old = timezone.now() - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS + 1)
+        old_read = Notification.objects.create(recipient=self.company, verb='old read', is_read=True)
+        old_unread = Notification.objects.create(recipient=self.company, verb='old unread')
+        recent_read = Notification.objects.create(recipient=self.company, verb='recent read', is_read=True)
+        Notification.objects.filter(id__in=[old_read.id, old_unread.id]).update(created_at=old)
+        # per-applicant rows left from before coalescing
+        for user in self.users[:2]:
+            Notification.objects.create(
+                recipient=self.company, actor=user, job=self.job, kind=Notification.APPLICATION,
+                verb=notifications.application_verb(user.username, 1, self.job.role),
+            )
+
+        call_command('prune_notifications', batch_size=1, stdout=StringIO())
+
+        remaining = {note.verb: note for note in self.inbox()}
+        self.assertNotIn('old read', remaining)
+        self.assertIn('old unread', remaining)
+        self.assertIn('recent read', remaining)
+        merged = remaining["u1 and 1 other applied for your job 'Backend'"]
+        self.assertEqual((merged.actor_count, merged.is_read), (2, False))
+        self.assertEqual(len(remaining), 3)
+
+
+class ArchiveKeepsAnalyticsTests(TestCase):
+    def test_history_and_rollups_survive_archival(self):
+        company = Account.objects.create_user('co', 'co@x.com', 'pw12345!', role='company', company_name='Co')
+        job = make_job(company)
+        applicants = [Account.objects.create_user(f'u{i}', f'u{i}@x.com', 'pw12345!') for i in range(2)]
+        for user in applicants:
+            client_for(user).post(f'/api/accounts/jobs/{job.id}/apply/')
+        application = JobApplication.objects.get(job=job, applied_by=applicants[0])
+        client_for(company).post(f'/api/accounts/jobs/{job.id}/applicants/{application.id}/approve/')
+        call_command('rollup_job_stats', settle_seconds=0, stdout=StringIO())
+        before = client_for(company).get('/api/accounts/jobs/analytics/').data['jobs']
+
+        Job.objects.filter(id=job.id).update(deadline=timezone.now() - timedelta(days=30))
+        call_command('archive_expired_jobs', stdout=StringIO())
+
+        self.assertFalse(Job.objects.filter(id=job.id).exists())
+        self.assertTrue(ArchivedJob.objects.filter(id=job.id).exists())
+        self.assertEqual(JobApplicationStatusHistory.objects.filter(job_id=job.id).count(), 3)
+        self.assertTrue(JobStatsHourly.objects.filter(job_id=job.id).exists())
+        self.assertTrue(JobStatsDaily.objects.filter(job_id=job.id).exists())
+        after = client_for(company).get('/api/accounts/jobs/analytics/').data['jobs']
+        self.assertEqual(after, before)
+        self.assertEqual((after[0]['applications'], after[0]['approvals']), (2, 1))
+
+    def test_job_id_is_validated_and_scoped_to_the_company(self):
+        company = Account.objects.create_user('co', 'co@x.com', 'pw12345!', role='company', company_name='Co')
+        other = Account.objects.create_user('co2', 'co2@x.com', 'pw12345!', role='company', company_name='Co2')
+        job, foreign = make_job(company), make_job(other)
+        client = client_for(company)
+        path = '/api/accounts/jobs/analytics/'
+        self.assertEqual(client.get(path, {'job_id': 'abc'}).status_code, 400)
+        self.assertEqual(client.get(path, {'job_id': foreign.id}).status_code, 403)
+        self.assertEqual(client.get(path, {'job_id': foreign.id + 100}).status_code, 404)
+        response = client.get(path, {'job_id': job.id})
+        self.assertEqual([row['id'] for row in response.data['jobs']], [job.id])
+
+
+class FacetIndexTests(TestCase):
+    def test_bitmaps_follow_open_jobs_not_largest_id(self):
+        company = Account.objects.create_user('co', 'co@x.com', 'pw12345!', role='company', company_name='Co')
+        jobs = [make_job(company, id=2_000_000 + i * 1000, salary='40k') for i in range(5)]
+        make_job(company, id=3_000_000, job_type='internship')
+        index = FacetIndex()
+
+        self.assertEqual(sorted(index.ids({'salary': lambda v: v == '25k_50k'})), [job.id for job in jobs])
+        self.assertLess(index._snapshot.open.bit_length(), 10)
+
+        index.discard(jobs[0].id)
+        index.update(make_job(company, id=4_000_000))
+        # the freed slot is reused
+        self.assertLess(index._snapshot.open.bit_length(), 10)
+        counts = index.counts({}, candidates=[jobs[1].id, 3_000_000, 4_000_000])
+        self.assertEqual(counts['job_type'], [{'value': 'full_time', 'count': 2}, {'value': 'internship', 'count': 1}])
+
+
+class SalaryFilterTests(TestCase):
+    def setUp(self):
+        company = Account.objects.create_user('co', 'co@x.com', 'pw12345!', role='company', company_name='Co')
+        self.mid = make_job(company, salary='40k')
+        self.high = make_job(company, salary='12 LPA')
+        self.none = make_job(company, salary='Negotiable')
+        self.client = client_for(company)
+
+    def search(self, **params):
+        response = self.client.get('/api/accounts/search/jobs/', params)
+        return response.status_code, sorted(job['id'] for job in response.data) if response.status_code == 200 else None
+
+    def test_buckets_filter_in_sql(self):
+        self.assertEqual(self.search(salary='25k_50k'), (200, [self.mid.id]))
+        self.assertEqual(self.search(salary='100k_plus'), (200, [self.high.id]))
+        self.assertEqual(self.search(salary='unspecified'), (200, [self.none.id]))
+        self.assertEqual(self.search(salary='lots')[0], 400)
+
+    def test_results_do_not_depend_on_the_in_process_index(self):
+        self.client.get('/api/accounts/search/jobs/', {'salary': '25k_50k', 'facets': 1})
+        # a write from another worker: no signal reaches this process's facet index
+        Job.objects.filter(id=self.none.id).update(salary='30,000', salary_amount=30000)
+        self.assertEqual(self.search(salary='25k_50k'), (200, [self.mid.id, self.none.id]))
+
+
+class RadiusSearchTests(TestCase):
+    path = '/api/accounts/search/jobs/'
+
+    def setUp(self):
+        company = Account.objects.create_user('co', 'co@x.com', 'pw12345!', role='company', company_name='Co')
+        self.bangalore = make_job(company, location='BLR, India')
+        self.mysore = make_job(company, location='Mysore')  # about 130 km from Bangalore
+        self.chennai = make_job(company, location='Chennai')  # about 290 km
+        self.unplaced = make_job(company, location='Somewhere unknown')
+
+    def found(self, **params):
+        response = self.client.get(self.path, params)
+        self.assertEqual(response.status_code, 200)
+        return {row['id'] for row in response.data}
+
+    def test_radius_around_a_place_or_a_point(self):
+        self.assertEqual(self.found(location='Bengaluru', radius_km=50), {self.bangalore.id})
+        self.assertEqual(self.found(location='Bengaluru', radius_km=200), {self.bangalore.id, self.mysore.id})
+        self.assertEqual(self.found(lat=12.97, lon=77.59, radius_km=400),
+                         {self.bangalore.id, self.mysore.id, self.chennai.id})
+        self.assertEqual(self.found(lat=13.08, lon=80.27, radius_km=10), {self.chennai.id})
+
+    def test_bad_coordinates(self):
+        for params in (
+            {'lat': 'north', 'lon': 77.59},
+            {'lat': 12.97},
+            {'lat': 95, 'lon': 77.59},
+            {'lat': 12.97, 'lon': 181},
+            {'lat': 'nan', 'lon': 77.59},
+            {'location': 'Somewhere unknown'},
+        ):
+            with self.subTest(params):
+                self.assertEqual(self.client.get(self.path, {**params, 'radius_km': 50}).status_code, 400)
+        self.assertEqual(self.client.get(self.path, {'location': 'Bengaluru', 'radius_km': 'far'}).status_code, 400)
+
+
+class FastpathParityTests(TestCase):
+    def setUp(self):
+        company = Account.objects.create_user('co', 'co@x.com', 'pw12345!', role='company', company_name='Acmé')
+        self.alice = Account.objects.create_user('alice', 'a@x.com', 'pw12345!')
+        bob = Account.objects.create_user('bob', 'b@x.com', 'pw12345!')
+        Profile.objects.filter(user=bob).update(description='Ünïcode "quoted"\n', experience=None)
+        placed = make_job(company, location='Bengaluru', salary='12 LPA')
+        make_job(company, location='Somewhere unknown', salary='', description='<b>&</b> \u2028')
+        for user in (self.alice, bob):
+            client_for(user).post(f'/api/accounts/jobs/{placed.id}/apply/')
+        application = JobApplication.objects.get(job=placed, applied_by=bob)
+        client_for(company).post(f'/api/accounts/jobs/{placed.id}/applicants/{application.id}/approve/')
+        Notification.objects.create(recipient=self.alice, verb='system notice')
+        Notification.objects.create(recipient=self.alice, actor=company, verb='viewed you', job=placed, is_read=True)
+        for i in range(3):
+            Message.objects.create(sender=self.alice if i % 2 else company, recipient=company if i % 2 else self.alice,
+                                   content=f'message {i} ✓')
+        self.company = company
+
+    def assertSameBytes(self, path, params=None):
+        client = client_for(self.alice)
+        fast = client.get(path, params)
+        with override_settings(FAST_SERIALIZERS=False):
+            slow = client.get(path, params)
+        self.assertEqual((fast.status_code, slow.status_code), (200, 200))
+        self.assertTrue(fast.content.startswith(b'['))
+        self.assertEqual(fast.content, slow.content)
+
+    def test_byte_identical_to_the_drf_serializers(self):
+        self.assertSameBytes('/api/accounts/jobs/')
+        self.assertSameBytes('/api/accounts/notifications/')
+        self.assertSameBytes('/api/accounts/messages/', {'user_id': self.company.id})
+
+    def test_stdlib_encoder_matches_too(self):
+        with mock.patch.object(fastpath, 'orjson', None):
+            self.assertSameBytes('/api/accounts/jobs/')
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        company = Account.objects.create_user('co', 'co@x.com', 'pw12345!', role='company', company_name='Co')
+        self.user = Account.objects.create_user('alice', 'a@x.com', 'pw12345!')
+        applicants = [Account.objects.create_user(f'u{i}', f'u{i}@x.com', 'pw12345!') for i in range(3)]
+        for i in range(3):
+            job = make_job(company, role=f'Role {i}')
+            for user in applicants:
+                JobApplication.objects.create(job=job, applied_by=user)
+
+    def serialize(self, **params):
+        """(rows, SQL of each query) for the job list as the views build it"""
+        request = Request(APIRequestFactory().get('/api/accounts/jobs/', params))
+        request.user = self.user
+        context = {'request': request}
+        with CaptureQueriesContext(connection) as queries:
+            jobs = JobSerializer.optimize_queryset(Job.objects.order_by('id'), context)
+            rows = JobSerializer(jobs, many=True, context=context).data
+        return rows, [query['sql'] for query in queries]
+
+    def test_fields_drop_columns_and_queries(self):
+        full_rows, full_sql = self.serialize()
+        rows, sql = self.serialize(fields='id,role')
+        self.assertEqual([set(row) for row in rows], [{'id', 'role'}] * 3)
+        self.assertEqual([row['role'] for row in rows], [row['role'] for row in full_rows])
+        self.assertEqual(len(sql), 1)
+        self.assertLess(len(sql), len(full_sql))
+        self.assertIn('"description"', full_sql[0])
+        self.assertNotIn('"description"', sql[0])
+
+    def test_expand_joins_only_what_is_asked_for(self):
+        rows, sql = self.serialize(fields='id,posted_by,applications')
+        self.assertEqual(rows[0]['posted_by'], Job.objects.get(id=rows[0]['id']).posted_by_id)
+        self.assertEqual(len(rows[0]['applications']), 3)
+        self.assertTrue(all(isinstance(app, int) for app in rows[0]['applications']))
+        self.assertNotIn('accounts_account', sql[0])
+        # the collapsed applications are one prefetch of ids, whatever the number of jobs
+        self.assertEqual(len(sql), 2)
+
+        rows, sql = self.serialize(fields='id,posted_by', expand='posted_by')
+        self.assertEqual(rows[0]['posted_by']['username'], 'co')
+        self.assertEqual(len(sql), 1)
+        self.assertIn('accounts_account', sql[0])
+
+    def test_view_honours_fields(self):
+        response = client_for(self.user).get('/api/accounts/jobs/', {'fields': 'id,role'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({key for row in response.data for key in row}, {'id', 'role'})
+
+
+class JobListETagTests(TestCase):
+    def setUp(self):
+        company = Account.objects.create_user('co', 'co@x.com', 'pw12345!', role='company', company_name='Co')
+        self.job = make_job(company)
+        self.user = Account.objects.create_user('alice', 'a@x.com', 'pw12345!')
+        self.client = client_for(self.user)
+
+    def etag(self):
+        response = self.client.get('/api/accounts/jobs/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/accounts/jobs/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        return response['ETag']
+
+    def test_etag_is_two_aggregates(self):
+        request = RequestFactory().get('/api/accounts/jobs/')
+        request.user = self.user
+        with self.assertNumQueries(2):
+            job_list_etag(request)
+
+    def test_applications_and_applicant_profiles_change_the_etag(self):
+        # updated_at resolution is coarse on some backends; make the change unambiguous
+        Job.objects.filter(id=self.job.id).update(updated_at=timezone.now() - timedelta(minutes=1))
+        first = self.etag()
+        self.assertEqual(self.client.post(f'/api/accounts/jobs/{self.job.id}/apply/').status_code, 201)
+        applied = self.etag()
+        self.assertNotEqual(applied, first)
+
+        Job.objects.filter(id=self.job.id).update(updated_at=timezone.now() - timedelta(minutes=1))
+        before = self.etag()
+        profile = Profile.objects.get(user=self.user)
+        profile.description = 'Python developer'
+        with CaptureQueriesContext(connection) as queries:
+            profile.save()
+        self.assertEqual(len(queries), 1)
+        edited = self.etag()
+        self.assertNotEqual(edited, before)
+
+        Account.objects.filter(id=self.user.id).update(updated_at=timezone.now() - timedelta(minutes=1))
+        before = self.etag()
+        self.user.email = 'alice@example.com'
+        self.user.save()
+        self.assertNotEqual(self.etag(), before)
+
+    def test_poster_account_changes_the_etag(self):
+        Account.objects.filter(id=self.job.posted_by_id).update(updated_at=timezone.now() - timedelta(minutes=1))
+        before = self.etag()
+        company = self.job.posted_by
+        company.username = 'co-renamed'
+        company.save()
+        self.assertNotEqual(self.etag(), before)
+
+
+class IncrementalRollupTests(TestCase):
+    def setUp(self):
+        company = Account.objects.create_user('co', 'co@x.com', 'pw12345!', role='company', company_name='Co')
+        self.job = make_job(company)
+
+    def apply(self, username, age=None):
+        user = Account.objects.create_user(username, f'{username}@x.com', 'pw12345!')
+        application = JobApplication.objects.create(job=self.job, applied_by=user)
+        if age is not None:
+            JobApplication.objects.filter(id=application.id).update(created_at=timezone.now() - age)
+        return application
+
+    def rollup(self):
+        call_command('rollup_job_stats', stdout=StringIO())
+        return sum(JobStatsDaily.objects.filter(job=self.job).values_list('applications', flat=True))
+
+    def test_unsettled_rows_hold_back_the_watermark(self):
+        settled = self.apply('a', age=timedelta(minutes=30))
+        fresh = self.apply('b')
+        # committed after "b" even though its id is higher; stands in for a slow transaction
+        self.apply('c', age=timedelta(minutes=30))
+
+        self.assertEqual(self.rollup(), 1)
+        self.assertEqual(RollupWatermark.objects.get(name='applications').last_id, settled.id)
+
+        JobApplication.objects.filter(id=fresh.id).update(created_at=timezone.now() - timedelta(minutes=10))
+        self.assertEqual(self.rollup(), 3)
+        # nothing is counted twice on the next run
+        self.assertEqual(self.rollup(), 3)
+        self.apply('d', age=timedelta(minutes=10))
+        self.assertEqual(self.rollup(), 4)
+
+
+class JobAlertTests(TestCase):
+    def setUp(self):
+        self.company = Account.objects.create_user('co', 'co@x.com', 'pw12345!', role='company', company_name='Co')
+        self.user = Account.objects.create_user('u0', 'u0@x.com', 'pw12345!')
+
+    def post_job(self):
+        return client_for(self.company).post('/api/accounts/jobs/', {
+            'company_name': 'Co', 'role': 'Python Developer', 'description': 'd', 'job_type': 'full_time',
+            'location': 'Pune', 'max_members': 1, 'deadline': (timezone.now() + timedelta(days=3)).isoformat(),
+        }, format='json')
+
+    def test_matches_searches_with_large_ids(self):
+        searches = [
+            SavedSearch.objects.create(id=5_000_000 + i, user=self.user, role=role, frequency='daily')
+            for i, role in enumerate(['python', 'java', ''])
+        ]
+        alerts.percolator._index = None
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post_job()
+        self.assertEqual(response.status_code, 201)
+        matched = SavedSearchMatch.objects.filter(job_id=response.data['id']).values_list('search_id', flat=True)
+        self.assertEqual(sorted(matched), [searches[0].id, searches[2].id])
+        self.assertLess(alerts.percolator._index._wildcard['role'].bit_length(), 10)
+
+    def test_stale_index_is_rebuilt_in_the_background(self):
+        percolator = alerts.SearchPercolator()
+        job = make_job(self.company, role='Python Developer')
+        python = SavedSearch.objects.create(user=self.user, role='python')
+        self.assertEqual(percolator.match(job), [python.id])
+
+        percolator._built_at -= 3600
+        threads = []
+        with mock.patch.object(alerts.threading, 'Thread') as thread:
+            thread.side_effect = lambda **kwargs: threads.append(kwargs['target']) or mock.Mock()
+            # the expired index still answers; the rebuild is only scheduled
+            with self.assertNumQueries(0):
+                self.assertEqual(percolator.match(job), [python.id])
+        self.assertEqual(len(threads), 1)
+
+        developer = SavedSearch.objects.create(user=self.user, role='developer')
+        # a save signalled while the rebuild runs is replayed onto the new index
+        percolator.update(developer)
+        with mock.patch.object(alerts.connections, 'close_all'):
+            threads[0]()
+        self.assertEqual(sorted(percolator.match(job)), [python.id, developer.id])
+        self.assertIsNone(percolator._pending)
+
+    def test_failed_delivery_does_not_fail_the_request(self):
+        with mock.patch.object(alerts, 'deliver_matches', side_effect=RuntimeError('boom')):
+            with self.assertLogs('accounts.alerts', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+                response = self.post_job()
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Job.objects.filter(id=response.data['id']).exists())
+
+
+@override_settings(MESSAGE_ARCHIVE_DIR=tempfile.mkdtemp())
+# the async view queries from the database thread pool, which cannot see a TestCase transaction
+class MessageArchiveLinkTests(TransactionTestCase):
+    def setUp(self):
+        self.alice = Account.objects.create_user('alice', 'a@x.com', 'pw12345!')
+        self.bob = Account.objects.create_user('bob', 'b@x.com', 'pw12345!')
+        old = Message.objects.create(sender=self.alice, recipient=self.bob, content='old')
+        Message.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=400))
+        for month in message_archive.months_to_archive(message_archive.archive_cutoff()):
+            message_archive.archive_month(month)
+        self.new = Message.objects.create(sender=self.bob, recipient=self.alice, content='new')
+        self.path = '/api/accounts/messages/'
+
+    def assertPrevLink(self, response):
+        self.assertEqual(response.status_code, 200)
+        before = json.loads(response.content)[0]['created_at']
+        expected = f'<{self.path}?{urlencode({"user_id": self.bob.id, "before": before})}>; rel="prev"'
+        self.assertEqual(response['Link'], expected)
+
+    def test_sync_view_links_to_archive(self):
+        self.assertPrevLink(client_for(self.alice).get(self.path, {'user_id': self.bob.id}))
+
+    def test_async_view_links_to_archive(self):
+        token = RefreshToken.for_user(self.alice).access_token
+        request = RequestFactory().get(self.path, {'user_id': self.bob.id}, HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertPrevLink(async_to_sync(AsyncMessageView.as_view())(request))
+
+    def test_no_link_without_archive(self):
+        response = client_for(self.bob).get(self.path, {'user_id': Account.objects.create_user('c', 'c@x.com', 'pw').id})
+        self.assertNotIn('Link', response)
+
+
+class AsyncViewParityTests(TransactionTestCase):
+    def setUp(self):
+        user_state.clear()
+        self.alice = Account.objects.create_user('alice', 'a@x.com', 'pw12345!')
+        self.co = Account.objects.create_user('co', 'co@x.com', 'pw12345!', role='company', company_name='Co')
+        self.job = make_job(self.co, salary='12 LPA')
+        JobApplication.objects.create(job=self.job, applied_by=self.alice)
+        for i in range(3):
+            Message.objects.create(sender=self.alice, recipient=self.co, content=f'hi {i}')
+        Notification.objects.create(recipient=self.alice, actor=self.co, verb='viewed your profile', job=self.job)
+        Skill.objects.create(name='python')
+        self.token = RefreshToken.for_user(self.alice).access_token
+
+    def assertSameResponse(self, async_view, path, data=None, **kwargs):
+        request = RequestFactory().get(path, data, HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        expected = async_view.sync_view.as_view()(request, **kwargs)
+        if hasattr(expected, 'render'):
+            expected.render()
+        request = RequestFactory().get(path, data, HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        actual = async_to_sync(async_view.as_view())(request, **kwargs)
+        self.assertEqual(actual.status_code, expected.status_code)
+        self.assertEqual(actual.content, expected.content)
+
+    def test_same_body_as_the_sync_views(self):
+        self.assertSameResponse(AsyncSkillListView, '/api/accounts/skills/')
+        self.assertSameResponse(AsyncJobDetailView, f'/api/accounts/jobs/{self.job.id}/', job_id=self.job.id)
+        self.assertSameResponse(AsyncJobDetailView, '/api/accounts/jobs/0/', job_id=0)
+        self.assertSameResponse(AsyncMessageView, '/api/accounts/messages/')
+        self.assertSameResponse(AsyncMessageView, '/api/accounts/messages/', {'user_id': self.co.id})
+        self.assertSameResponse(AsyncNotificationsView, '/api/accounts/notifications/')
+
+
+@override_settings(STREAM_CHUNK_SIZE=200)
+class StreamingMemoryTests(TestCase):
+    def setUp(self):
+        self.alice = Account.objects.create_user('alice', 'a@x.com', 'pw12345!')
+        self.bob = Account.objects.create_user('bob', 'b@x.com', 'pw12345!')
+
+    def stream_peak(self, rows):
+        Message.objects.all().delete()
+        Message.objects.bulk_create(
+            [Message(sender=self.alice, recipient=self.bob, content='x' * 200) for _ in range(rows)], batch_size=1000,
+        )
+        response = client_for(self.alice).get('/api/accounts/messages/', {'user_id': self.bob.id, 'stream': 'ndjson'})
+        self.assertTrue(response.streaming)
+        lines = size = 0
+        tracemalloc.start()
+        try:
+            for chunk in response.streaming_content:
+                lines += chunk.count(b'\n')
+                size += len(chunk)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(lines, rows)
+        return peak, size
+
+    def test_peak_memory_does_not_grow_with_rows(self):
+        small, _ = self.stream_peak(1000)
+        large, size = self.stream_peak(10000)
+        # ten times the rows: the peak stays about one batch, far below the body size
+        self.assertLess(large, small * 1.5)
+        self.assertLess(large, size / 4)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(TestCase):
+    def pool(self, ping=lambda conn: None, **options):
+        options = {'max_size': 2, 'timeout': 0.05, 'max_idle': 300, 'max_lifetime': 1800, 'check_interval': 30, **options}
+        return ConnectionPool(ping, **options)
+
+    def test_released_connections_are_checked_out_again(self):
+        pool = self.pool()
+        first, second = pool.acquire(FakeConnection), pool.acquire(FakeConnection)
+        self.assertIsNot(first, second)
+        pool.release(first)
+        pool.release(second)
+        # LIFO: the most recently returned connection is the warmest
+        self.assertIs(pool.acquire(FakeConnection), second)
+        self.assertEqual(pool.status(), {
+            'size': 2, 'idle': 1, 'max_size': 2, 'opened': 2, 'closed': 0, 'reused': 1, 'waits': 0, 'timeouts': 0,
+        })
+
+    def test_full_pool_waits_then_times_out(self):
+        pool = self.pool()
+        held = [pool.acquire(FakeConnection), pool.acquire(FakeConnection)]
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(FakeConnection)
+        self.assertEqual((pool.stats['waits'], pool.stats['timeouts']), (1, 1))
+
+        pool.timeout = 5
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            waiter = executor.submit(pool.acquire, FakeConnection)
+            time.sleep(0.05)
+            pool.release(held[0])
+            self.assertIs(waiter.result(timeout=5), held[0])
+
+    def test_broken_expired_and_dead_connections_are_replaced(self):
+        dead = set()
+
+        def ping(conn):
+            if conn in dead:
+                raise OSError('gone')
+
+        pool = self.pool(ping=ping, check_interval=0)
+        broken = pool.acquire(FakeConnection)
+        pool.release(broken, broken=True)
+        self.assertTrue(broken.closed)
+        self.assertEqual(pool.status()['size'], 0)
+
+        stale = pool.acquire(FakeConnection)
+        pool.release(stale)
+        dead.add(stale)
+        fresh = pool.acquire(FakeConnection)
+        self.assertIsNot(fresh, stale)
+        self.assertTrue(stale.closed)
+
+        pool.max_lifetime = 0
+        pool.release(fresh)
+        self.assertTrue(fresh.closed)
+        self.assertEqual(pool.status()['size'], 0)
+
+    def test_failed_connect_frees_its_slot(self):
+        pool = self.pool(max_size=1)
+
+        def refuse():
+            raise OSError('refused')
+
+        with self.assertRaises(OSError):
+            pool.acquire(refuse)
+        self.assertIsInstance(pool.acquire(FakeConnection), FakeConnection)
+
+    def test_closing_a_pooled_wrapper_returns_its_connection(self):
+        wrapper = connections.create_connection('default')
+        if not getattr(wrapper, 'pool_options', lambda: None)():
+            self.skipTest("the default database is not pooled (DB_ENGINE=accounts.db.sqlite3 with DB_POOL=1)")
+        try:
+            wrapper.ensure_connection()
+            raw, pool = wrapper.connection, wrapper._pool
+            idle = pool.status()['idle']
+            wrapper.close()
+            self.assertEqual(pool.status()['idle'], idle + 1)
+            wrapper.ensure_connection()
+            self.assertIs(wrapper.connection, raw)
+        finally:
+            wrapper.close()
+
+
+class MetricsEndpointTests(TestCase):
+    def test_hidden_until_configured(self):
+        with override_settings(METRICS_TOKEN='', METRICS_ALLOWED_IPS=[]):
+            self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    @override_settings(METRICS_TOKEN='s3cret', METRICS_ALLOWED_IPS=['10.0.0.5'])
+    def test_token_or_allowlisted_address(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer nope').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.5').status_code, 200)
+
+    def test_concurrent_async_requests_count_their_own_queries(self):
+        async def view(request):
+            for _ in range(int(request.GET['n'])):
+                # thread-sensitive, so both requests query through the same thread and connection
+                await sync_to_async(Account.objects.count)()
+                await asyncio.sleep(0)
+            return HttpResponse('ok')
+
+        middleware = instrumentation.InstrumentationMiddleware(view)
+        observed = {}
+
+        def observe(request, response, metrics, elapsed):
+            observed[request.GET['n']] = metrics.queries
+
+        async def both():
+            factory = RequestFactory()
+            await asyncio.gather(*(middleware(factory.get('/x', {'n': n})) for n in (1, 5)))
+
+        with mock.patch.object(middleware, 'observe', observe):
+            async_to_sync(both)()
+        self.assertEqual(observed, {'1': 1, '5': 5})
+
+    def test_sync_requests_count_their_own_queries_on_one_wrapper(self):
+        def view(request):
+            for _ in range(int(request.GET['n'])):
+                Account.objects.count()
+            return HttpResponse('ok')
+
+        middleware = instrumentation.InstrumentationMiddleware(view)
+        observed = {}
+
+        def observe(request, response, metrics, elapsed):
+            observed[request.GET['n']] = metrics.queries
+
+        with mock.patch.object(middleware, 'observe', observe):
+            middleware(RequestFactory().get('/x', {'n': 2}))
+            middleware(RequestFactory().get('/x', {'n': 3}))
+        self.assertEqual(observed, {'2': 2, '3': 3})
+        self.assertEqual(connection.execute_wrappers.count(instrumentation._record_query), 1)
+
+    def test_drf_serializers_and_renderer_are_timed(self):
+        user = Account.objects.create_user('alice', 'a@x.com', 'pw12345!')
+
+        def serialize_seconds():
+            return instrumentation.SERIALIZE_TIME._series.get(('profile', 'GET'), [0, 0])[-2]
+
+        before = serialize_seconds()
+        with override_settings(FAST_SERIALIZERS=False):
+            self.assertEqual(client_for(user).get('/api/accounts/profile/').status_code, 200)
+        self.assertGreater(serialize_seconds(), before)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRoutingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # a second SQLite file standing in for the replica; only the skill table is needed.
+        # It is added here rather than in settings so the test runner does not create it.
+        cls.replica_file = tempfile.NamedTemporaryFile(suffix='.sqlite3')
+        connections.settings['replica1'] = {
+            **connections.settings['default'],
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': cls.replica_file.name, 'OPTIONS': {},
+        }
+        with connections['replica1'].schema_editor() as editor:
+            editor.create_model(Skill)
+        cls.databases = {'default', 'replica1'}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica1'].close()
+        del connections['replica1']
+        del connections.settings['replica1']
+        cls.replica_file.close()
+
+    @classmethod
+    def setUpTestData(cls):
+        Skill.objects.create(name='primary')
+        Skill.objects.using('replica1').create(name='replica')
+
+    def setUp(self):
+        routers._cycle = None
+        cache.clear()
+
+    @staticmethod
+    def view(request):
+        if request.method == 'POST':
+            Skill.objects.create(name='written')
+        return HttpResponse(','.join(Skill.objects.order_by('name').values_list('name', flat=True)))
+
+    def request(self, method, ip='10.0.0.1'):
+        request = getattr(RequestFactory(), method)('/x', REMOTE_ADDR=ip)
+        return routers.ReplicaRoutingMiddleware(self.view)(request).content.decode()
+
+    def test_get_reads_the_replica_and_post_the_primary(self):
+        self.assertEqual(self.request('get'), 'replica')
+        self.assertEqual(self.request('post', ip='10.0.0.2'), 'primary,written')
+
+    def test_a_write_pins_the_client_to_the_primary(self):
+        self.request('post')
+        self.assertEqual(self.request('get'), 'primary,written')
+        # other clients still read the replica
+        self.assertEqual(self.request('get', ip='10.0.0.2'), 'replica')
+
+    def test_async_requests_are_routed_the_same(self):
+        async def view(request):
+            return await sync_to_async(self.view)(request)
+
+        middleware = routers.ReplicaRoutingMiddleware(view)
+        factory = RequestFactory()
+
+        async def both():
+            return await asyncio.gather(
+                middleware(factory.get('/x', REMOTE_ADDR='10.0.0.1')),
+                middleware(factory.post('/x', REMOTE_ADDR='10.0.0.2')),
+            )
+
+        reads, writes = async_to_sync(both)()
+        self.assertEqual(reads.content, b'replica')
+        self.assertEqual(writes.content, b'primary,written')
+        self.assertEqual(self.request('get', ip='10.0.0.2'), 'primary,written')
+
+
+class ThrottleIdentityTests(TestCase):
+    def setUp(self):
+        get_store().clear()
+        self.addCleanup(get_store().clear)
+
+    def test_spoofed_forwarded_for_keeps_the_same_bucket(self):
+        client = APIClient()
+        statuses = [
+            client.post('/api/accounts/register/', {}, format='json', HTTP_X_FORWARDED_FOR=f'203.0.113.{i}').status_code
+            for i in range(6)
+        ]
+        # the register scope allows 5 per minute per client
+        self.assertEqual(statuses, [400] * 5 + [429])
+
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1})
+    def test_one_proxy_keys_on_the_address_it_appended(self):
+        client = APIClient()
+        # the client's own XFF entry comes first; the proxy appends the real address last
+        statuses = [
+            client.post('/api/accounts/register/', {}, format='json', HTTP_X_FORWARDED_FOR=f'10.9.9.{i}, 198.51.100.7').status_code
+            for i in range(6)
+        ]
+        self.assertEqual(statuses, [400] * 5 + [429])
+        other = client.post('/api/accounts/register/', {}, format='json', HTTP_X_FORWARDED_FOR='198.51.100.8')
+        self.assertEqual(other.status_code, 400)
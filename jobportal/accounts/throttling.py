@@ -0,0 +1,165 @@
+"""
+Token-bucket throttles for DRF.
+
+Rates use DRF's ``"<n>/<period>"`` syntax in ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']``.
+A rate of 10/min is a bucket holding 10 tokens that refills continuously at
+10 per minute. Short bursts are absorbed and the long-run rate is enforced
+without DRF's per-request timestamp history.
+
+The bucket state lives in a store chosen by settings.THROTTLE_BUCKET_STORE:
+
+- LocalBucketStore (default): a plain dict per worker process with no lock.
+  Each update replaces one tuple, which is atomic under the GIL. Two threads
+  racing on the same key can at worst let one extra request through. Limits
+  apply per process.
+- CacheBucketStore: keeps the buckets in the Django cache so every worker
+  shares them. The read-modify-write is not atomic, so the same small
+  over-admission applies under contention.
+
+Anonymous requests are keyed on DRF's get_ident(). It takes the client address
+from X-Forwarded-For only as far as REST_FRAMEWORK['NUM_PROXIES'] trusted
+proxies allow, and from REMOTE_ADDR when that is 0.
+"""
+import math
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'10/min' -> (capacity 10, refill 10/60 tokens per second); None disables the throttle"""
+    if rate is None:
+        return None
+    num, period = rate.split('/')
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+class LocalBucketStore:
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = {}
+
+    def consume(self, key, capacity, refill, cost=1):
+        """(allowed, seconds until ``cost`` tokens are available)"""
+        now = time.monotonic()
+        state = self._buckets.get(key)
+        tokens = capacity if state is None else min(capacity, state[0] + (now - state[1]) * refill)
+        if tokens < cost:
+            return False, (cost - tokens) / refill
+        tokens -= cost
+        # third item: when the bucket will be full again, so idle keys can be swept
+        self._buckets[key] = (tokens, now, now + (capacity - tokens) / refill)
+        if len(self._buckets) > self.max_keys:
+            self._sweep(now)
+        return True, 0.0
+
+    def _sweep(self, now):
+        # a bucket that has refilled is the same as no bucket
+        for key, state in list(self._buckets.items()):
+            if state[2] <= now:
+                self._buckets.pop(key, None)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.clear()
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class CacheBucketStore:
+    def __init__(self, alias='default', prefix='throttle'):
+        self.cache = caches[alias]
+        self.prefix = prefix
+
+    def consume(self, key, capacity, refill, cost=1):
+        key = f'{self.prefix}:{key}'
+        now = time.time()
+        state = self.cache.get(key)
+        tokens = capacity if state is None else min(capacity, state[0] + (now - state[1]) * refill)
+        if tokens < cost:
+            return False, (cost - tokens) / refill
+        tokens -= cost
+        self.cache.set(key, (tokens, now), timeout=math.ceil((capacity - tokens) / refill) + 1)
+        return True, 0.0
+
+    def clear(self):
+        self.cache.clear()
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        path = getattr(settings, 'THROTTLE_BUCKET_STORE', 'accounts.throttling.LocalBucketStore')
+        _store = import_string(path)()
+    return _store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Base class; subclasses set ``scope`` and ``get_key``"""
+    scope = None
+
+    def get_rate(self, view):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_key(self, request, view):
+        raise NotImplementedError('.get_key() must be overridden')
+
+    def allow_request(self, request, view):
+        self._wait = None
+        rate = parse_rate(self.get_rate(view))
+        if rate is None:
+            return True
+        key = self.get_key(request, view)
+        if key is None:
+            return True
+        allowed, self._wait = get_store().consume(key, *rate)
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Per authenticated user, across all endpoints"""
+    scope = 'user'
+
+    def get_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return None
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Per client IP for anonymous requests"""
+    scope = 'anon'
+
+    def get_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return f'anon:{self.get_ident(request)}'
+
+
+class ScopedTokenBucketThrottle(TokenBucketThrottle):
+    """Per endpoint: views set ``throttle_scope``, limited per user (or per IP when anonymous)"""
+
+    def get_rate(self, view):
+        self.scope = getattr(view, 'throttle_scope', None)
+        if self.scope is None:
+            return None
+        return super().get_rate(view)
+
+    def get_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f'{self.scope}:user:{request.user.pk}'
+        return f'{self.scope}:ip:{self.get_ident(request)}'
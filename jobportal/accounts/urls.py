@@ -1,34 +1,53 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
     RegisterView, SkillListView, LanguageListView, ProfileView,
     JobListCreateView, JobDetailView, JobApplyView, JobApplicantsView,
     UserSearchView, JobSearchFilterView, ConnectionView, MessageView
 )
-from .views import ApproveApplicantView, NotificationsView
+from .views import ArchivedJobListView, ArchivedJobDetailView, SavedSearchView
+from .views import ApproveApplicantView, BulkApplicantStatusView, CompanyDashboardView, CompanyAnalyticsView, NotificationsView
+from .views import CompanyJobExportView, AccountImportView
 from rest_framework_simplejwt.views import TokenRefreshView, TokenObtainPairView
 from .serializers import CustomTokenObtainPairSerializer
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_scope = 'login'
+
+
+if settings.ASYNC_VIEWS:
+    from .async_views import AsyncJobDetailView, AsyncMessageView, AsyncNotificationsView, AsyncSkillListView
+    SkillListView, JobDetailView = AsyncSkillListView, AsyncJobDetailView
+    MessageView, NotificationsView = AsyncMessageView, AsyncNotificationsView
 
 
 urlpatterns = [
-    path("register/", RegisterView.as_view()),
-    path("login/", CustomTokenObtainPairView.as_view()),
-    path("token/refresh/", TokenRefreshView.as_view()),
-    path("profile/", ProfileView.as_view()),
-    path("profile/<int:user_id>/", ProfileView.as_view()),
-    path("skills/", SkillListView.as_view()),
-    path("languages/", LanguageListView.as_view()),
-    path("jobs/", JobListCreateView.as_view()),
-    path("jobs/<int:job_id>/", JobDetailView.as_view()),
-    path("jobs/<int:job_id>/apply/", JobApplyView.as_view()),
-    path("jobs/<int:job_id>/applicants/", JobApplicantsView.as_view()),
-    path("jobs/<int:job_id>/applicants/<int:application_id>/approve/", ApproveApplicantView.as_view()),
-    path("search/users/", UserSearchView.as_view()),
-    path("search/jobs/", JobSearchFilterView.as_view()),
-    path("connections/", ConnectionView.as_view()),
-    path("messages/", MessageView.as_view()),
-    path("notifications/", NotificationsView.as_view()),
+    path("register/", RegisterView.as_view(), name="register"),
+    path("accounts/import/", AccountImportView.as_view(), name="account-import"),
+    path("login/", CustomTokenObtainPairView.as_view(), name="login"),
+    path("token/refresh/", TokenRefreshView.as_view(), name="token-refresh"),
+    path("profile/", ProfileView.as_view(), name="profile"),
+    path("profile/<int:user_id>/", ProfileView.as_view(), name="profile-detail"),
+    path("skills/", SkillListView.as_view(), name="skills"),
+    path("languages/", LanguageListView.as_view(), name="languages"),
+    path("jobs/", JobListCreateView.as_view(), name="jobs"),
+    path("jobs/dashboard/", CompanyDashboardView.as_view(), name="job-dashboard"),
+    path("jobs/analytics/", CompanyAnalyticsView.as_view(), name="job-analytics"),
+    path("jobs/export/", CompanyJobExportView.as_view(), name="job-export"),
+    path("jobs/archived/", ArchivedJobListView.as_view(), name="archived-jobs"),
+    path("jobs/archived/<int:job_id>/", ArchivedJobDetailView.as_view(), name="archived-job-detail"),
+    path("jobs/<int:job_id>/", JobDetailView.as_view(), name="job-detail"),
+    path("jobs/<int:job_id>/apply/", JobApplyView.as_view(), name="job-apply"),
+    path("jobs/<int:job_id>/applicants/", JobApplicantsView.as_view(), name="job-applicants"),
+    path("jobs/<int:job_id>/applicants/<int:application_id>/approve/", ApproveApplicantView.as_view(), name="applicant-approve"),
+    path("jobs/<int:job_id>/applicants/bulk/", BulkApplicantStatusView.as_view(), name="applicants-bulk"),
+    path("search/users/", UserSearchView.as_view(), name="user-search"),
+    path("search/jobs/", JobSearchFilterView.as_view(), name="job-search"),
+    path("search/saved/", SavedSearchView.as_view(), name="saved-searches"),
+    path("search/saved/<int:search_id>/", SavedSearchView.as_view(), name="saved-search-detail"),
+    path("connections/", ConnectionView.as_view(), name="connections"),
+    path("messages/", MessageView.as_view(), name="messages"),
+    path("notifications/", NotificationsView.as_view(), name="notifications"),
 ]
@@ -3,12 +3,25 @@ from rest_framework import status
 from rest_framework.views import APIView
 from .serializers import RegisterSerializer, JobSerializer, JobApplicationSerializer
 from .serializers import SkillSerializer, LanguageSerializer, ProfileSerializer
-from .serializers import ConnectionSerializer, MessageSerializer, NotificationSerializer
+from .serializers import ConnectionSerializer, MessageSerializer, NotificationSerializer, ArchivedJobSerializer
+from .serializers import SavedSearchSerializer
 from .models import Skill, Language, Profile, ProfileSkill, ProfileLanguage, Job, JobApplication, Account
-from .models import Connection, Message, Notification
+from .models import Connection, Message, Notification, JobStatsDaily, JobStatsHourly, ArchivedJob, SavedSearch
+from .idempotency import idempotent
+from . import application_status, bulk_import, fastpath, geo, message_archive, notifications, salaries, streaming
+from .conditional import job_list_etag, message_thread_etag, profile_etag
+from .facets import facet_index
 from django.utils import timezone
-from rest_framework.permissions import IsAuthenticated
-from django.db import models
+from django.utils.dateparse import parse_datetime
+from django.utils.decorators import method_decorator
+from django.utils.http import urlencode
+from django.views.decorators.http import condition
+from datetime import timedelta
+from itertools import islice
+import io
+from django.conf import settings
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from django.db import IntegrityError, models, transaction
 
 
 class SkillListView(APIView):
@@ -28,6 +41,7 @@ class LanguageListView(APIView):
 class ProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(condition(etag_func=profile_etag))
     def get(self, request, user_id=None):
         # If user_id is provided, get that user's profile; otherwise get current user's profile
         if user_id:
@@ -38,8 +52,11 @@ class ProfileView(APIView):
         else:
             target_user = request.user
 
-        profile, _ = Profile.objects.get_or_create(user=target_user)
-        serializer = ProfileSerializer(profile)
+        context = {'request': request}
+        profile = ProfileSerializer.optimize_queryset(Profile.objects.filter(user=target_user), context).first()
+        if profile is None:
+            profile, _ = Profile.objects.get_or_create(user=target_user)
+        serializer = ProfileSerializer(profile, context=context)
         return Response(serializer.data)
 
     def put(self, request, user_id=None):
@@ -55,6 +72,7 @@ class ProfileView(APIView):
         profile.job_preference = request.data.get('job_preference', profile.job_preference)
         profile.experience = request.data.get('experience', profile.experience)
         profile.it_details = request.data.get('it_details', profile.it_details)
+        profile.location = request.data.get('location', profile.location)
         recruiting = request.data.get('recruiting')
         if recruiting is not None:
             # accept 'true'/'false' strings too
@@ -168,6 +186,8 @@ class ProfileView(APIView):
         return Response(serializer.data)
 
 class RegisterView(APIView):
+    throttle_scope = 'register'
+
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
@@ -176,12 +196,44 @@ class RegisterView(APIView):
         return Response(serializer.errors, status=400)
 
 
+class AccountImportView(APIView):
+    """Staff-only bulk account import: multipart ``file`` (CSV or JSONL), optional ``?dry_run=1``"""
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "file is required"}, status=400)
+        fmt = request.data.get('format') or bulk_import.guess_format(upload.name)
+        if fmt not in bulk_import.FORMATS:
+            return Response({"error": f"format must be one of {', '.join(bulk_import.FORMATS)}"}, status=400)
+
+        # hashing runs in this request, so larger files go through `manage.py import_accounts`
+        limit = getattr(settings, 'ACCOUNT_IMPORT_API_MAX_ROWS', 100)
+        text = io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+        rows = list(islice(bulk_import.read_rows(text, fmt), limit + 1))
+        if len(rows) > limit:
+            return Response(
+                {"error": f"at most {limit} rows per upload; use manage.py import_accounts for larger files"},
+                status=400,
+            )
+
+        dry_run = str(request.query_params.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        result = bulk_import.import_rows(rows, dry_run=dry_run)
+        return Response(result.as_dict(), status=201 if result.created and not dry_run else 200)
+
+
 class JobListCreateView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(condition(etag_func=job_list_etag))
     def get(self, request):
-        jobs = Job.objects.all().order_by('-created_at')
-        serializer = JobSerializer(jobs, many=True, context={'request': request})
+        jobs = Job.objects.open().order_by('-created_at')
+        if fastpath.enabled(request):
+            return fastpath.FastJSONResponse(fastpath.jobs(jobs, request.user))
+        context = {'request': request}
+        jobs = JobSerializer.optimize_queryset(jobs, context)
+        serializer = JobSerializer(jobs, many=True, context=context)
         return Response(serializer.data)
 
     def post(self, request):
@@ -193,7 +245,9 @@ class JobListCreateView(APIView):
         data['posted_by'] = request.user.id
         serializer = JobSerializer(data=data, context={'request': request})
         if serializer.is_valid():
-            serializer.save(posted_by=request.user)
+            # saved-search alerts are delivered once this commits (see alerts.py)
+            with transaction.atomic():
+                serializer.save(posted_by=request.user)
             return Response(serializer.data, status=201)
         return Response(serializer.errors, status=400)
 
@@ -202,44 +256,53 @@ class JobDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, job_id):
+        context = {'request': request}
         try:
-            job = Job.objects.get(id=job_id)
+            job = JobSerializer.optimize_queryset(Job.objects.all(), context).get(id=job_id)
         except Job.DoesNotExist:
             return Response({"error": "Job not found"}, status=404)
 
-        serializer = JobSerializer(job, context={'request': request})
+        serializer = JobSerializer(job, context=context)
         return Response(serializer.data)
 
 
 class JobApplyView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def post(self, request, job_id):
         try:
             job = Job.objects.get(id=job_id)
         except Job.DoesNotExist:
             return Response({"error": "Job not found"}, status=404)
 
-        # Check if user already applied
-        existing = JobApplication.objects.filter(job=job, applied_by=request.user).exists()
-        if existing:
-            return Response({"error": "You have already applied for this job"}, status=400)
-
-        # Create application
-        application = JobApplication.objects.create(job=job, applied_by=request.user)
+        if not job.is_open:
+            return Response({"error": "Applications for this job are closed"}, status=400)
 
-        # Create notification for the job poster
+        # Insert-or-ignore: the unique (job, applied_by) constraint decides who wins,
+        # so concurrent clicks never surface as an IntegrityError
         try:
-            if job.posted_by != request.user:
-                Notification.objects.create(
-                    recipient=job.posted_by,
-                    actor=request.user,
-                    verb=f"{request.user.username} applied for your job '{job.role}'",
-                    job=job
-                )
-        except Exception:
-            # don't fail application if notification fails
-            pass
+            with transaction.atomic():
+                # Lock the job before inserting: the insert's FK check takes a shared lock on the
+                # job row, and two applicants upgrading it for the counter UPDATE would deadlock
+                job = application_status.lock_job(job.pk)
+                application = JobApplication.objects.create(job=job, applied_by=request.user)
+                application_status.record_application(job, application, request.user)
+                # Fold the applicant into the poster's notification for this job, under the same lock
+                try:
+                    with transaction.atomic():
+                        notifications.notify_application(job, request.user)
+                except Exception:
+                    # don't fail application if notification fails
+                    pass
+        except Job.DoesNotExist:
+            return Response({"error": "Job not found"}, status=404)
+        except IntegrityError:
+            application = JobApplication.objects.filter(job=job, applied_by=request.user).first()
+            if application is None:
+                return Response({"error": "Job not found"}, status=404)
+            serializer = JobApplicationSerializer(application)
+            return Response(serializer.data, status=200)
 
         serializer = JobApplicationSerializer(application)
         return Response(serializer.data, status=201)
@@ -250,12 +313,15 @@ class JobApplyView(APIView):
         except Job.DoesNotExist:
             return Response({"error": "Job not found"}, status=404)
 
-        try:
-            application = JobApplication.objects.get(job=job, applied_by=request.user)
+        with transaction.atomic():
+            # Lock the job so the status counters can't change under us
+            application_status.lock_job(job.pk)
+            application = JobApplication.objects.filter(job=job, applied_by=request.user).only('id', 'status').first()
+            if application is None:
+                return Response({"error": "No application found"}, status=404)
             application.delete()
-            return Response({"message": "Application withdrawn"}, status=200)
-        except JobApplication.DoesNotExist:
-            return Response({"error": "No application found"}, status=404)
+            application_status.forget_application(job, application.status)
+        return Response({"message": "Application withdrawn"}, status=200)
 
 
 class JobApplicantsView(APIView):
@@ -268,15 +334,29 @@ class JobApplicantsView(APIView):
             return Response({"error": "Job not found"}, status=404)
 
         # Only job poster can view applicants
-        if job.posted_by != request.user:
+        if job.posted_by_id != request.user.id:
             return Response({"error": "You can only view applicants for your own jobs"}, status=403)
 
         applications = job.applications.all()
-        serializer = JobApplicationSerializer(applications, many=True)
+        # optional ?status= filter, served by the (job, status) index
+        status_filter = request.query_params.get('status', '').strip()
+        if status_filter:
+            applications = applications.filter(status=status_filter)
+
+        fmt = streaming.stream_format(request)
+        if fmt:
+            rows = streaming.export_rows(request, applications, JobApplicationSerializer, fastpath.applications)
+            return streaming.stream_response(rows, fmt)
+
+        context = {'request': request}
+        applications = JobApplicationSerializer.optimize_queryset(applications, context)
+        serializer = JobApplicationSerializer(applications, many=True, context=context)
         return Response(serializer.data)
 
 
 class UserSearchView(APIView):
+    throttle_scope = 'user_search'
+
     def get(self, request):
         query = request.query_params.get('search', '').strip()
         if not query or len(query) < 2:
@@ -305,33 +385,154 @@ class UserSearchView(APIView):
 
 class JobSearchFilterView(APIView):
     def get(self, request):
-        jobs = Job.objects.all()
+        jobs = Job.objects.open()
+        facet_filters = {}
 
         # Filter by role/title
         role_query = request.query_params.get('role', '').strip()
         if role_query:
             jobs = jobs.filter(role__icontains=role_query)
 
-        # Filter by location
+        # Filter by location: "Bangalore", "Bengaluru" and "BLR" all resolve to the same
+        # gazetteer place; unknown places fall back to a substring match
         location_query = request.query_params.get('location', '').strip()
-        if location_query:
+        place = geo.normalize_location(location_query)
+        center = None
+        try:
+            radius_km = min(float(request.query_params.get('radius_km', 0)), 500.0)
+        except ValueError:
+            return Response({"error": "radius_km must be a number"}, status=400)
+        if radius_km > 0:
+            try:
+                if 'lat' in request.query_params:
+                    center = (float(request.query_params['lat']), float(request.query_params['lon']))
+                elif place:
+                    center = (place.lat, place.lon)
+            except (KeyError, ValueError):
+                return Response({"error": "lat and lon must both be numbers"}, status=400)
+            # also rejects nan and inf
+            if center and not (-90 <= center[0] <= 90 and -180 <= center[1] <= 180):
+                return Response({"error": "lat must be within -90..90 and lon within -180..180"}, status=400)
+            if center is None:
+                return Response({"error": "radius_km needs a known location or lat/lon"}, status=400)
+        elif place:
+            jobs = jobs.filter(place=place.name)
+            facet_filters['location'] = lambda value: value == place.name
+        elif location_query:
             jobs = jobs.filter(location__icontains=location_query)
+            facet_filters['location'] = lambda value: location_query.lower() in value.lower()
 
         # Filter by job type
         job_type = request.query_params.get('job_type', '').strip()
         if job_type:
             jobs = jobs.filter(job_type=job_type)
-
-        # Filter by salary (range: min_salary to max_salary)
-        # Note: We're storing salary as text, so filtering is limited
-        # For proper implementation, consider storing min_salary and max_salary as separate fields
+            facet_filters['job_type'] = lambda value: value == job_type
+
+        # Filter by salary bucket (see salaries.SALARY_BUCKETS) on the amount parsed at save time
+        salary = request.query_params.get('salary', '').strip()
+        if salary:
+            bounds = salaries.bucket_filter(salary)
+            if bounds is None:
+                return Response({"error": "Unknown salary bucket"}, status=400)
+            jobs = jobs.filter(**bounds)
+            facet_filters['salary'] = lambda value: value == salary
+
+        # Radius search: the geohash cells around the centre narrow it to a few indexed
+        # prefix scans, then the exact distance is checked on those candidates only
+        nearby_ids = None
+        if center:
+            nearby_ids = [
+                job_id
+                for job_id, lat, lon in jobs.filter(geo.within_radius_q(*center, radius_km))
+                .values_list('id', 'latitude', 'longitude')
+                if geo.haversine_km(center[0], center[1], lat, lon) <= radius_km
+            ]
+            jobs = jobs.filter(id__in=nearby_ids)
 
         # Sort by newest first
         jobs = jobs.order_by('-created_at')
 
-        serializer = JobSerializer(jobs[:50], many=True, context={'request': request})
+        context = {'request': request}
+        serializer = JobSerializer(JobSerializer.optimize_queryset(jobs, context)[:50], many=True, context=context)
+        if not request.query_params.get('facets'):
+            return Response(serializer.data)
+
+        # Counts per facet value given the other active filters, for "Full Time (1,204)" labels
+        candidates = None
+        if role_query:
+            candidates = set(Job.objects.open().filter(role__icontains=role_query).values_list('id', flat=True))
+        if nearby_ids is not None:
+            candidates = set(nearby_ids) if candidates is None else candidates.intersection(nearby_ids)
+        return Response({
+            'results': serializer.data,
+            'facets': facet_index.counts(facet_filters, candidates=candidates),
+        })
+
+
+class SavedSearchView(APIView):
+    """Saved job searches; new jobs matching them are delivered as notifications"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        searches = SavedSearch.objects.filter(user=request.user).order_by('-created_at')
+        serializer = SavedSearchSerializer(searches, many=True)
         return Response(serializer.data)
 
+    def post(self, request):
+        serializer = SavedSearchSerializer(data=request.data)
+        if serializer.is_valid():
+            serializer.save(user=request.user)
+            return Response(serializer.data, status=201)
+        return Response(serializer.errors, status=400)
+
+    def delete(self, request, search_id):
+        deleted, _ = SavedSearch.objects.filter(id=search_id, user=request.user).delete()
+        if not deleted:
+            return Response({"error": "Saved search not found"}, status=404)
+        return Response({"message": "Saved search removed"})
+
+
+class ArchivedJobListView(APIView):
+    """Expired jobs that were moved out of the live tables by archive_expired_jobs"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        jobs = ArchivedJob.objects.select_related('posted_by')
+
+        role_query = request.query_params.get('role', '').strip()
+        if role_query:
+            jobs = jobs.filter(role__icontains=role_query)
+
+        company_query = request.query_params.get('company', '').strip()
+        if company_query:
+            jobs = jobs.filter(company_name__icontains=company_query)
+
+        if request.query_params.get('mine'):
+            jobs = jobs.filter(posted_by=request.user)
+
+        serializer = ArchivedJobSerializer(jobs.order_by('-deadline')[:50], many=True)
+        return Response(serializer.data)
+
+
+class ArchivedJobDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        try:
+            job = ArchivedJob.objects.select_related('posted_by').get(id=job_id)
+        except ArchivedJob.DoesNotExist:
+            return Response({"error": "Job not found"}, status=404)
+
+        data = ArchivedJobSerializer(job).data
+        # only the poster gets to see who applied
+        if job.posted_by_id == request.user.id:
+            data['applications'] = list(
+                job.applications.order_by('created_at').values(
+                    'id', 'applied_by_id', 'applied_by__username', 'created_at', 'status', 'approved', 'approved_at'
+                )
+            )
+        return Response(data)
+
 
 # --- Connection/Network Views ---
 class ConnectionView(APIView):
@@ -366,8 +567,9 @@ class ConnectionView(APIView):
 
     def get(self, request):
         """Get all connections for current user"""
-        connections = Connection.objects.filter(from_user=request.user)
-        serializer = ConnectionSerializer(connections, many=True)
+        context = {'request': request}
+        connections = ConnectionSerializer.optimize_queryset(Connection.objects.filter(from_user=request.user), context)
+        serializer = ConnectionSerializer(connections, many=True, context=context)
         return Response(serializer.data)
 
     def delete(self, request):
@@ -411,6 +613,7 @@ class MessageView(APIView):
         serializer = MessageSerializer(message)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @method_decorator(condition(etag_func=message_thread_etag))
     def get(self, request):
         """Get messages with a specific user"""
         other_user_id = request.query_params.get('user_id')
@@ -434,54 +637,270 @@ class MessageView(APIView):
         except Account.DoesNotExist:
             return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
 
+        # ?before=<ISO datetime> pages back through older history, including the cold archive
+        if 'before' in request.query_params:
+            return self.get_older(request, other_user)
+
         # Get messages between current user and other user
         messages = Message.objects.filter(
             (models.Q(sender=request.user, recipient=other_user) |
              models.Q(sender=other_user, recipient=request.user))
         ).order_by('created_at')
 
-        serializer = MessageSerializer(messages, many=True)
-        return Response(serializer.data)
+        # ?stream=json|ndjson exports the whole thread without holding it in memory
+        fmt = streaming.stream_format(request)
+        if fmt:
+            rows = streaming.export_rows(request, messages, MessageSerializer, fastpath.messages)
+            return streaming.stream_response(rows, fmt)
+
+        if fastpath.enabled(request):
+            data = fastpath.messages(messages)
+            response = fastpath.FastJSONResponse(data)
+        else:
+            data = MessageSerializer(messages, many=True).data
+            response = Response(data)
+        # archived months are not in the live thread; point the client at the first page of them
+        if message_archive.has_archive(request.user, other_user):
+            before = data[0]['created_at'] if data else timezone.now().isoformat()
+            query = urlencode({'user_id': other_user.id, 'before': before})
+            response['Link'] = f'<{request.path}?{query}>; rel="prev"'
+        return response
+
+    def get_older(self, request, other_user):
+        before = parse_datetime(request.query_params.get('before', ''))
+        if before is None:
+            return Response({"error": "before must be an ISO 8601 datetime"}, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(before):
+            before = timezone.make_aware(before)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 200)
+        except ValueError:
+            return Response({"error": "limit must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = message_archive.older_messages(request.user, other_user, before, limit)
+        response = fastpath.FastJSONResponse(data) if fastpath.enabled(request) else Response(data)
+        if len(data) == limit:
+            query = urlencode({'user_id': other_user.id, 'before': data[0]['created_at'], 'limit': limit})
+            response['Link'] = f'<{request.path}?{query}>; rel="prev"'
+        return response
 
 
 class ApproveApplicantView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     def post(self, request, job_id, application_id):
-        try:
-            job = Job.objects.get(id=job_id)
-        except Job.DoesNotExist:
-            return Response({"error": "Job not found"}, status=404)
+        with transaction.atomic():
+            try:
+                job = application_status.lock_job(job_id)
+            except Job.DoesNotExist:
+                return Response({"error": "Job not found"}, status=404)
+
+            # Only poster can approve
+            if job.posted_by_id != request.user.id:
+                return Response({"error": "You can only approve applicants for your own jobs"}, status=403)
+
+            row = JobApplication.objects.filter(id=application_id, job=job).values('id', 'status', 'applied_by_id').first()
+            if row is None:
+                return Response({"error": "Application not found"}, status=404)
+
+            if row['status'] == 'approved':
+                return Response({"message": "Applicant already approved"}, status=200)
+            if not JobApplication.can_transition(row['status'], 'approved'):
+                return Response({"error": f"Cannot approve a {row['status']} application"}, status=400)
+            if job.approved_count >= job.max_members:
+                return Response({"error": "All positions for this job have been filled"}, status=400)
+
+            application_status.change_status(job, [row], 'approved', request.user)
+
+        application = JobApplication.objects.select_related('job__posted_by', 'applied_by').get(id=application_id)
+        serializer = JobApplicationSerializer(application)
+        return Response(serializer.data)
 
-        # Only poster can approve
-        if job.posted_by != request.user:
-            return Response({"error": "You can only approve applicants for your own jobs"}, status=403)
 
+class BulkApplicantStatusView(APIView):
+    """Approve, reject or shortlist many applicants of one job in a single request"""
+    permission_classes = [IsAuthenticated]
+
+    ACTIONS = {
+        'approve': 'approved',
+        'reject': 'rejected',
+        'shortlist': 'shortlisted',
+    }
+    MAX_IDS = 1000
+
+    @idempotent
+    def post(self, request, job_id):
+        action = request.data.get('status')
+        ids = request.data.get('ids')
+
+        target = self.ACTIONS.get(action)
+        if target is None:
+            return Response({"error": f"status must be one of {', '.join(self.ACTIONS)}"}, status=400)
+        if not isinstance(ids, list) or not ids:
+            return Response({"error": "ids must be a non-empty list"}, status=400)
+        if len(ids) > self.MAX_IDS:
+            return Response({"error": f"At most {self.MAX_IDS} ids per request"}, status=400)
         try:
-            application = JobApplication.objects.get(id=application_id, job=job)
-        except JobApplication.DoesNotExist:
-            return Response({"error": "Application not found"}, status=404)
+            # de-duplicate while keeping the caller's order (it decides who gets the last seats)
+            ids = list(dict.fromkeys(int(i) for i in ids))
+        except (TypeError, ValueError):
+            return Response({"error": "ids must be integers"}, status=400)
+
+        with transaction.atomic():
+            try:
+                job = application_status.lock_job(job_id)
+            except Job.DoesNotExist:
+                return Response({"error": "Job not found"}, status=404)
+
+            if job.posted_by_id != request.user.id:
+                return Response({"error": "You can only update applicants for your own jobs"}, status=403)
+
+            current = {
+                row['id']: row
+                for row in JobApplication.objects.filter(job=job, id__in=ids)
+                .values('id', 'status', 'applied_by_id')
+            }
+
+            seats = job.max_members - job.approved_count
+            results = {}
+            changed = []
+            for app_id in ids:
+                row = current.get(app_id)
+                if row is None:
+                    results[app_id] = 'not_found'
+                elif row['status'] == target:
+                    results[app_id] = 'unchanged'
+                elif not JobApplication.can_transition(row['status'], target):
+                    results[app_id] = 'invalid_transition'
+                elif target == 'approved' and seats <= 0:
+                    results[app_id] = 'no_seats'
+                else:
+                    if target == 'approved':
+                        seats -= 1
+                    results[app_id] = 'updated'
+                    changed.append(row)
+
+            application_status.change_status(job, changed, target, request.user)
+
+        return Response({
+            "status": target,
+            "updated": len(changed),
+            "results": [{"id": app_id, "result": results[app_id]} for app_id in ids],
+        })
+
+
+class CompanyDashboardView(APIView):
+    """Per-status applicant counts for every job the company posted"""
+    permission_classes = [IsAuthenticated]
 
-        if application.approved:
-            return Response({"message": "Applicant already approved"}, status=200)
+    COUNT_FIELDS = ['applications_count', 'pending_count', 'shortlisted_count', 'approved_count', 'rejected_count']
 
-        application.approved = True
-        application.approved_at = timezone.now()
-        application.save()
+    def get(self, request):
+        if request.user.role != 'company':
+            return Response({"error": "Only companies have a dashboard"}, status=403)
+
+        # served straight from the denormalized counters on Job, no per-application scan
+        jobs = (
+            Job.objects.filter(posted_by=request.user)
+            .order_by('-created_at')
+            .values('id', 'role', 'max_members', 'deadline', 'created_at', *self.COUNT_FIELDS)
+        )
+        jobs = list(jobs)
+        totals = {field: sum(job[field] for job in jobs) for field in self.COUNT_FIELDS}
+        return Response({"totals": totals, "jobs": jobs})
+
+
+class CompanyJobExportView(APIView):
+    """Every job the company has posted (open or past deadline), streamed as JSON or NDJSON"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role != 'company':
+            return Response({"error": "Only companies can export jobs"}, status=403)
+
+        fmt = streaming.stream_format(request) or 'json'
+        jobs = Job.objects.filter(posted_by=request.user)
+        rows = streaming.export_rows(request, jobs, JobSerializer, fastpath.jobs, request.user)
+        return streaming.stream_response(rows, fmt)
+
+
+class CompanyAnalyticsView(APIView):
+    """Application volume, approval rate and time-to-approve for a company's jobs, read from the rollup tables"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role != 'company':
+            return Response({"error": "Only companies have analytics"}, status=403)
 
-        # Notify the applicant
         try:
-            Notification.objects.create(
-                recipient=application.applied_by,
-                actor=request.user,
-                verb=f"Your application for '{job.role}' was approved",
-                job=job
-            )
-        except Exception:
-            pass
+            days = min(max(int(request.query_params.get('days', 30)), 1), 365)
+        except ValueError:
+            return Response({"error": "days must be an integer"}, status=400)
+        granularity = request.query_params.get('granularity', 'day')
+        if granularity not in ('day', 'hour'):
+            return Response({"error": "granularity must be day or hour"}, status=400)
+
+        jobs = Job.objects.filter(posted_by=request.user)
+        # rollups outlive archival, so expired jobs keep their history
+        archived = ArchivedJob.objects.filter(posted_by=request.user)
+        job_id = request.query_params.get('job_id')
+        if job_id:
+            try:
+                job_id = int(job_id)
+            except ValueError:
+                return Response({"error": "job_id must be an integer"}, status=400)
+            jobs = jobs.filter(id=job_id)
+            archived = archived.filter(id=job_id)
+        jobs = {job['id']: job for job in jobs.values('id', 'role')}
+        jobs.update({job['id']: job for job in archived.values('id', 'role')})
+        if job_id and not jobs:
+            if Job.objects.filter(id=job_id).exists() or ArchivedJob.objects.filter(id=job_id).exists():
+                return Response({"error": "You can only view analytics for your own jobs"}, status=403)
+            return Response({"error": "Job not found"}, status=404)
 
-        serializer = JobApplicationSerializer(application)
-        return Response(serializer.data)
+        since = timezone.now() - timedelta(days=days)
+        if granularity == 'hour':
+            rows = JobStatsHourly.objects.filter(job_id__in=jobs, hour__gte=since).order_by('hour')
+            bucket_field = 'hour'
+        else:
+            rows = JobStatsDaily.objects.filter(job_id__in=jobs, day__gte=since.date()).order_by('day')
+            bucket_field = 'day'
+
+        series = {job_id: [] for job_id in jobs}
+        for row in rows.values('job_id', bucket_field, 'applications', 'approvals', 'approve_seconds'):
+            series[row['job_id']].append(row)
+
+        def summarize(points):
+            applications = sum(p['applications'] for p in points)
+            approvals = sum(p['approvals'] for p in points)
+            seconds = sum(p['approve_seconds'] for p in points)
+            return {
+                'applications': applications,
+                'approvals': approvals,
+                'approval_rate': round(approvals / applications, 4) if applications else None,
+                'avg_time_to_approve_seconds': round(seconds / approvals) if approvals else None,
+            }
+
+        results = []
+        for job_id, points in series.items():
+            results.append({
+                'id': job_id,
+                'role': jobs[job_id]['role'],
+                **summarize(points),
+                'series': [
+                    {bucket_field: p[bucket_field], 'applications': p['applications'], 'approvals': p['approvals']}
+                    for p in points
+                ],
+            })
+
+        all_points = [p for points in series.values() for p in points]
+        return Response({
+            'days': days,
+            'granularity': granularity,
+            'totals': summarize(all_points),
+            'jobs': results,
+        })
 
 
 class NotificationsView(APIView):
@@ -489,6 +908,8 @@ class NotificationsView(APIView):
 
     def get(self, request):
         notes = Notification.objects.filter(recipient=request.user).order_by('-created_at')[:100]
+        if fastpath.enabled(request):
+            return fastpath.FastJSONResponse(fastpath.notifications(notes))
         serializer = NotificationSerializer(notes, many=True)
         return Response(serializer.data)
 
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jobportal.settings')
+# The async read views (settings.ASYNC_VIEWS) are opt-in: set JOBPORTAL_ASYNC_VIEWS=1 once
+# `manage.py bench_async` shows a gain at the production query latency.
 
 application = get_asgi_application()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,8 +44,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # outermost, so its timings and sizes cover the whole stack (accounts/instrumentation.py)
+    'accounts.instrumentation.InstrumentationMiddleware',
+    # only loaded when a PROFILE_* trigger is set (accounts/profiling.py)
+    'accounts.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'accounts.middleware.CompressionMiddleware',
+    'accounts.routers.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -57,10 +65,110 @@ AUTH_USER_MODEL = 'accounts.Account'
 ROOT_URLCONF = 'jobportal.urls'
 CORS_ALLOW_ALL_ORIGINS = True
 REST_FRAMEWORK = {
+    # builds request.user from the token claims instead of a SELECT per request
+    # (swap back to rest_framework_simplejwt.authentication.JWTAuthentication to disable)
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'accounts.authentication.ClaimsJWTAuthentication',
+    ),
+    # JSONRenderer that reports its time to accounts/instrumentation.py
+    'DEFAULT_RENDERER_CLASSES': (
+        'accounts.instrumentation.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    # proxies in front of the app that append to X-Forwarded-For. Anonymous buckets key on the
+    # address the outermost trusted proxy saw; 0 uses REMOTE_ADDR, so a client-sent XFF cannot
+    # pick a fresh bucket. DRF's default (None) trusts the whole header.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '0')),
+    # token buckets (accounts/throttling.py): "10/min" = 10 tokens, refilled at 10 per minute
+    'DEFAULT_THROTTLE_CLASSES': (
+        'accounts.throttling.UserTokenBucketThrottle',
+        'accounts.throttling.IPTokenBucketThrottle',
+        'accounts.throttling.ScopedTokenBucketThrottle',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'user': '600/min',
+        'anon': '120/min',
+        # per-endpoint scopes, set with `throttle_scope` on the view
+        'login': '10/min',
+        'register': '5/min',
+        'user_search': '30/min',
+    },
 }
+# Seconds a worker trusts its cached is_active / token_version for a user
+# (accounts/authentication.py); bounds how long a revoked token keeps working elsewhere.
+JWT_USER_STATE_TTL = 30
+
+# Where token buckets live. LocalBucketStore is per process; use
+# 'accounts.throttling.CacheBucketStore' with a shared cache to limit across workers.
+THROTTLE_BUCKET_STORE = 'accounts.throttling.LocalBucketStore'
+
+# How long (seconds) a replayable response is kept for an Idempotency-Key header.
+# Keys live in the default cache, so use a shared backend when running several workers.
+IDEMPOTENCY_KEY_TTL = 60 * 10
+
+# Seconds before the in-process job facet index is rebuilt from the database.
+# Saves in the same process update it immediately; this bounds staleness across workers.
+FACET_INDEX_TTL = 60 * 5
+# Same idea for the saved-search (job alert) matcher in accounts/alerts.py.
+SAVED_SEARCH_INDEX_TTL = 60 * 5
+
+# `manage.py rollup_job_stats` only folds in rows at least this many seconds old. Ids are
+# allocated at INSERT but become visible at COMMIT, so a younger row can still have an
+# in-flight neighbour with a lower id that the watermark would step over for good.
+ROLLUP_SETTLE_SECONDS = 60 * 5
+
+# Serve the job list, notifications and message thread through accounts/fastpath.py
+# (values() rows encoded straight to JSON) instead of the DRF serializers.
+FAST_SERIALIZERS = True
+
+# Mount the async read views (accounts/async_views.py) for skills, job detail, messages and
+# notifications. Turn on with JOBPORTAL_ASYNC_VIEWS=1 under ASGI; under WSGI the sync views are cheaper.
+ASYNC_VIEWS = os.environ.get('JOBPORTAL_ASYNC_VIEWS', '0') == '1'
+# Threads the async views run their queries on (accounts/db/threads.py). Each holds one
+# connection while a query runs, so keep this at or below DB_POOL_MAX_SIZE.
+ASYNC_DB_THREADS = int(os.environ.get('ASYNC_DB_THREADS', '8'))
+
+# Largest file POST /api/accounts/accounts/import/ accepts. The API hashes passwords in the
+# request; `manage.py import_accounts` has no limit and hashes in a process pool.
+ACCOUNT_IMPORT_API_MAX_ROWS = int(os.environ.get('ACCOUNT_IMPORT_API_MAX_ROWS', '100'))
+
+# Rows fetched per query when an endpoint streams with ?stream=json|ndjson (accounts/streaming.py).
+STREAM_CHUNK_SIZE = 1000
+
+# Cold message archive (accounts/message_archive.py): `manage.py archive_messages` moves whole
+# months older than MESSAGE_ARCHIVE_DAYS into compressed segment files under MESSAGE_ARCHIVE_DIR.
+MESSAGE_ARCHIVE_DAYS = int(os.environ.get('MESSAGE_ARCHIVE_DAYS', '180'))
+MESSAGE_ARCHIVE_DIR = os.environ.get('MESSAGE_ARCHIVE_DIR', str(BASE_DIR / 'archive' / 'messages'))
+# Messages per compressed block; a scroll-back page decompresses only the blocks of its thread
+MESSAGE_ARCHIVE_BLOCK_ROWS = 256
+
+# Read notifications older than this are deleted by `manage.py prune_notifications` (accounts/notifications.py).
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', '90'))
+
+# Per-request wall time, DB queries, serializer time and response size, by URL name, served on
+# /metrics in Prometheus format (accounts/instrumentation.py). /metrics is a 404 until METRICS_TOKEN
+# ("Authorization: Bearer <token>") or METRICS_ALLOWED_IPS (scraper REMOTE_ADDRs, comma-separated) is set.
+PERF_INSTRUMENTATION = os.environ.get('JOBPORTAL_PERF_INSTRUMENTATION', '1') == '1'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip.strip()]
+# A request running one SQL shape more than this many times is logged as a possible N+1
+N_PLUS_ONE_THRESHOLD = 10
+
+# Sampling profiler (accounts/profiling.py), off unless a trigger is set: an "X-Profile: <token>"
+# header, a random sample rate (0-1), or requests still running after PROFILE_SLOW_MS.
+# The newest PROFILE_KEEP profiles are kept in PROFILE_DIR; see `manage.py request_profiles`.
+# Profiles show code paths and URLs, so keep PROFILE_DIR out of MEDIA/STATIC and anything served
+# ("profiles/" is where profile pictures are uploaded).
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_SLOW_MS = int(os.environ.get('PROFILE_SLOW_MS', '0'))
+PROFILE_INTERVAL_MS = 5
+PROFILE_DIR = os.environ.get('PROFILE_DIR', str(BASE_DIR / 'var' / 'profiling'))
+PROFILE_KEEP = 50
+
+# Responses smaller than this many bytes are sent uncompressed (accounts/middleware.py).
+# Brotli is used when the optional `brotli` package is installed, gzip otherwise.
+COMPRESSION_MIN_SIZE = 1024
 
 TEMPLATES = [
     {
@@ -83,20 +191,91 @@ WSGI_APPLICATION = 'jobportal.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Connection settings come from the environment (DB_*). accounts.db.mysql is Django's MySQL
+# backend plus an optional connection pool (accounts/db/pool.py); accounts.db.sqlite3 is the
+# same for a local SQLite file (DB_NAME is then its path).
+#
+# DB_POOL=1 keeps up to DB_POOL_MAX_SIZE connections per process and hands them from request
+# to request (CONN_MAX_AGE must then be 0). Without the pool, DB_CONN_MAX_AGE > 0 keeps one
+# persistent connection per thread instead.
+DB_POOL = os.environ.get('DB_POOL', '1') == '1'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': 'jobportal_db',
-        'USER': 'root',
-        'PASSWORD': 'iamazifaliz',
-        'HOST': 'localhost',
-        'PORT': '3306',
+        'ENGINE': os.environ.get('DB_ENGINE', 'accounts.db.mysql'),
+        'NAME': os.environ.get('DB_NAME', 'jobportal_db'),
+        'USER': os.environ.get('DB_USER', 'root'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', 'localhost'),
+        'PORT': os.environ.get('DB_PORT', '3306'),
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get('DB_CONN_MAX_AGE', '0')),
+        # ping a persistent connection before reusing it in a new request
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        # the test database; for accounts.db.sqlite3 a file path, since the concurrency
+        # tests need one (the default in-memory database can't be shared between threads)
+        'TEST': {'NAME': os.environ.get('DB_TEST_NAME') or None},
+        'OPTIONS': {
+            'pool': {
+                'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+                # seconds to wait for a free connection before the request fails
+                'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '5')),
+                'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', '300')),
+                # keep below MySQL's wait_timeout (8 hours by default)
+                'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', '1800')),
+                'check_interval': float(os.environ.get('DB_POOL_CHECK_INTERVAL', '30')),
+            } if DB_POOL else False,
+        },
     }
 }
 
+# Read replicas (accounts/routers.py): DB_REPLICAS is a comma-separated list of replica hosts
+# ("host" or "host:port") with the same credentials as the primary, or of database files for the
+# SQLite stand-in (e.g. a copy of the primary's file). Reads on GET requests go to a replica unless
+# the client wrote within REPLICA_PIN_SECONDS.
+DATABASE_REPLICAS = []
+for _number, _replica in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), 1):
+    _config = {
+        **DATABASES['default'],
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        # tests run against the primary only
+        'TEST': {'MIRROR': 'default'},
+    }
+    if _config['ENGINE'].endswith('sqlite3'):
+        _config['NAME'] = _replica.strip()
+    else:
+        _config['HOST'], _, _port = _replica.strip().partition(':')
+        _config['PORT'] = _port or _config['PORT']
+    DATABASES[f'replica{_number}'] = _config
+    DATABASE_REPLICAS.append(f'replica{_number}')
+
+DATABASE_ROUTERS = ['accounts.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', '5'))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+# Password hashing profiles (accounts/hashers.py). The selected profile hashes new
+# passwords; the others stay listed so existing hashes verify and are upgraded to the
+# selected profile on the next successful login. `manage.py bench_hashers` reports
+# logins per second per core for each profile. The default, pbkdf2, hashes exactly like
+# Django's default hasher; set PASSWORD_HASHER_PROFILE=scrypt or argon2 to opt in to another.
+PASSWORD_HASHER_PROFILES = {
+    # OWASP minimum for Argon2id; needs the argon2-cffi package
+    'argon2': {'hasher': 'accounts.hashers.Argon2PasswordHasher', 'time_cost': 2, 'memory_cost': 19456, 'parallelism': 1},
+    # 32 MiB of memory per hash, about a quarter of the CPU time of Django's default PBKDF2
+    'scrypt': {'hasher': 'accounts.hashers.ScryptPasswordHasher', 'work_factor': 2 ** 15, 'block_size': 8, 'parallelism': 1},
+    # Django's default iterations, so existing hashes are not rehashed
+    'pbkdf2': {'hasher': 'accounts.hashers.PBKDF2PasswordHasher'},
+}
+PASSWORD_HASHER_PROFILE = os.environ.get('PASSWORD_HASHER_PROFILE', 'pbkdf2')
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]['hasher'],
+    *(profile['hasher'] for name, profile in PASSWORD_HASHER_PROFILES.items() if name != PASSWORD_HASHER_PROFILE),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+# Hash in a pool of this many processes instead of on the request thread (0 = inline).
+PASSWORD_HASHING_WORKERS = int(os.environ.get('PASSWORD_HASHING_WORKERS', 0))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',